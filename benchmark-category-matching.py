@@ -0,0 +1,63 @@
+import random
+import string
+import time
+from ingest import compile_category_map, apply_category_mapping
+
+# Micro-benchmark comparing the per-keyword substring loop that ingest used to run
+# for every transaction against the compiled category matcher.
+
+RULE_SET_SIZES = [10, 100, 1000, 5000]
+DESCRIPTION_COUNT = 5000
+
+def random_token(rng):
+    return ''.join(rng.choices(string.ascii_uppercase, k=rng.randint(3, 10)))
+
+def generate_category_map(rng, size):
+    category_map = {}
+    while len(category_map) < size:
+        keyword = ' '.join(random_token(rng) for _ in range(rng.randint(1, 2)))
+        category_map[keyword] = f"Category {len(category_map) % 50}"
+    return category_map
+
+def generate_descriptions(rng, category_map, count):
+    keywords = list(category_map)
+    descriptions = []
+    for _ in range(count):
+        words = [random_token(rng) for _ in range(rng.randint(2, 5))]
+        # Roughly half of the transactions hit a rule, like a real statement
+        if rng.random() < 0.5:
+            words.insert(rng.randint(0, len(words)), rng.choice(keywords))
+        descriptions.append(' '.join(words) + f" #{rng.randint(1000, 9999)}")
+    return descriptions
+
+def legacy_category_mapping(description, category_map):
+    for key, value in category_map.items():
+        if key.lower() in description.lower():
+            return value
+    return None
+
+def time_call(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+def main():
+    rng = random.Random(42)
+    print(f"{'keywords':>10} {'legacy (s)':>12} {'compile (s)':>12} {'compiled (s)':>13} {'speedup':>9} {'hits':>6}")
+    for size in RULE_SET_SIZES:
+        category_map = generate_category_map(rng, size)
+        descriptions = generate_descriptions(rng, category_map, DESCRIPTION_COUNT)
+
+        legacy_time, legacy_results = time_call(
+            lambda: [legacy_category_mapping(d, category_map) for d in descriptions])
+        compile_time, compiled_map = time_call(lambda: compile_category_map(category_map))
+        compiled_time, compiled_results = time_call(
+            lambda: [apply_category_mapping(d, compiled_map) for d in descriptions])
+
+        hits = sum(result is not None for result in compiled_results)
+        assert hits == sum(result is not None for result in legacy_results)
+        speedup = legacy_time / (compile_time + compiled_time)
+        print(f"{size:>10} {legacy_time:>12.4f} {compile_time:>12.4f} {compiled_time:>13.4f} {speedup:>8.1f}x {hits:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import time
+import duckdb
+from db_operations import get_month_range, month_range_predicate
+
+# Benchmark comparing the month filters db_operations used to build (strftime and
+# EXTRACT on "Transaction Date") with the half-open date range predicate. Rows are
+# generated in date order, like statements appended month after month, so DuckDB's
+# per-row-group min/max stats let the range predicate skip most of the table.
+
+ROW_COUNT = 5_000_000
+REPEATS = 5
+YEAR, MONTH = 2022, 6
+
+PREDICATES = {
+    'strftime': ("""strftime('%Y', "Transaction Date") = ? AND strftime('%m', "Transaction Date") = ?""",
+                 [str(YEAR), str(MONTH).zfill(2)]),
+    'extract': ("""EXTRACT(YEAR FROM "Transaction Date") = ? AND EXTRACT(MONTH FROM "Transaction Date") = ?""",
+                [YEAR, MONTH]),
+    'date range': (month_range_predicate(), list(get_month_range(YEAR, MONTH))),
+}
+
+def create_synthetic_transactions(conn, row_count):
+    conn.execute(f"""
+    CREATE TABLE consolidated_transactions AS
+    SELECT i AS id,
+           'Card' || (i % 4) AS "Card",
+           CAST(DATE '2015-01-01' + to_days(CAST(i * 3650 // {row_count} AS INTEGER)) AS DATE) AS "Transaction Date",
+           'VENDOR ' || (hash(i) % 5000) AS "Description",
+           'Category ' || (hash(i * 7) % 40) AS "Category",
+           CAST(-((hash(i * 13) % 50000) / 100.0) AS DECIMAL(10, 2)) AS "Amount"
+    FROM range({row_count}) t(i)
+    ORDER BY i
+    """)
+
+def time_query(conn, query, params):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = conn.execute(query, params).fetchall()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        conn = duckdb.connect(os.path.join(temp_dir, 'benchmark.db'))
+        print(f"Generating {ROW_COUNT:,} synthetic transactions...")
+        create_synthetic_transactions(conn, ROW_COUNT)
+        conn.execute("CHECKPOINT")
+
+        print(f"{'predicate':>12} {'best of ' + str(REPEATS) + ' (s)':>16} {'speedup':>9} {'rows':>8}")
+        baseline = None
+        expected = None
+        for name, (predicate, params) in PREDICATES.items():
+            query = f"""
+            SELECT "Category", COUNT(*), SUM("Amount")
+            FROM consolidated_transactions
+            WHERE {predicate}
+            GROUP BY 1
+            ORDER BY 1
+            """
+            elapsed, result = time_query(conn, query, params)
+            if expected is None:
+                baseline, expected = elapsed, result
+            assert result == expected, f"{name} returned different results"
+            row_count = sum(row[1] for row in result)
+            print(f"{name:>12} {elapsed:>16.4f} {baseline / elapsed:>8.1f}x {row_count:>8}")
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+import time
+
+# Startup profile of interaction.py using python -X importtime. Prints the wall time of
+# importing interaction against a bare interpreter, the modules that dominate import time
+# and whether any of the heavy dependencies that should load lazily were imported.
+
+REPEATS = 5
+TOP_MODULES = 10
+LAZY_MODULES = ['pandas', 'numpy', 'matplotlib', 'dateutil', 'duckdb', 'transactions', 'db_operations']
+STARTUP_STATEMENT = "import interaction"
+
+def run_python(args):
+    return subprocess.run([sys.executable, *args], cwd=os.path.dirname(os.path.abspath(__file__)),
+                          capture_output=True, text=True, check=True)
+
+def time_statement(statement):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        run_python(['-c', statement])
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def parse_importtime(stderr):
+    """Return {module: cumulative microseconds} from python -X importtime output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+def main():
+    baseline = time_statement("pass")
+    startup = time_statement(STARTUP_STATEMENT)
+    print(f"{'python -c pass':>28} {baseline * 1000:>8.1f} ms (best of {REPEATS})")
+    print(f"{STARTUP_STATEMENT:>28} {startup * 1000:>8.1f} ms (+{(startup - baseline) * 1000:.1f} ms)")
+
+    modules = parse_importtime(run_python(['-X', 'importtime', '-c', STARTUP_STATEMENT]).stderr)
+    print(f"\nTop {TOP_MODULES} modules by cumulative import time:")
+    for name, cumulative in sorted(modules.items(), key=lambda item: item[1], reverse=True)[:TOP_MODULES]:
+        print(f"{name:>40} {cumulative / 1000:>8.1f} ms")
+
+    loaded_eagerly = [name for name in LAZY_MODULES if name in modules]
+    print(f"\nLazy dependencies imported at startup: {', '.join(loaded_eagerly) or 'none'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+import duckdb
+import numpy as np
+import pandas as pd
+import db_operations
+import ingest
+import plot_cache
+import synthetic_data
+from recurring import refresh_recurring_series
+from transactions import review_extraordinary_spendings, calculate_and_conditionally_insert_monthly_breakdowns
+
+# End-to-end benchmark of the hot paths on synthetic histories of configurable size.
+# Each size gets a pristine database (generated once per --work-dir and copied for every
+# run), Chase/Schwab exports of the month after the history, and timings for ingest,
+# inserts, the month summary, the extraordinary spendings review, goal breakdowns and
+# the spending chart. Results are written as JSON; --compare prints the change against
+# an earlier results file.
+
+RESULTS_DIR = 'benchmark-results'
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the budgeting tool on synthetic data.")
+    parser.add_argument('--sizes', nargs='+', default=['10k'],
+                        help="History sizes to benchmark, e.g. 10k 1m 10m (default: 10k).")
+    parser.add_argument('--categories', type=int, default=200, help="Number of categories (default: 200).")
+    parser.add_argument('--years', type=int, default=10, help="Years of history (default: 10).")
+    parser.add_argument('--csv-rows', default='20k', help="Rows in the Chase/Schwab exports that are ingested (default: 20k).")
+    parser.add_argument('--persist-rows', type=int, default=2000,
+                        help="Rows inserted with the row-by-row persist_data_in_db (default: 2000).")
+    parser.add_argument('--repeats', type=int, default=3, help="Best-of repeats for read-only benchmarks (default: 3).")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--work-dir', help="Keep generated databases here and reuse them on later runs.")
+    parser.add_argument('--output', help=f"Results file (default: {RESULTS_DIR}/<timestamp>-<commit>.json).")
+    parser.add_argument('--compare', help="Earlier results file to compare against.")
+    return parser.parse_args()
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+def load_visualize_module():
+    script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'visualize-results.py')
+    spec = importlib.util.spec_from_file_location("visualize_module", script_path)
+    visualize_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(visualize_module)
+    return visualize_module
+
+def time_call(func, repeats=1):
+    """Return (best seconds, last result) of calling func repeats times with its output silenced."""
+    timings = []
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def get_pristine_database(work_dir, transaction_count, args):
+    path = os.path.join(work_dir, f"synthetic-{transaction_count}-{args.categories}c-{args.years}y-seed{args.seed}.db")
+    if not os.path.exists(path):
+        conn = duckdb.connect(path)
+        elapsed, _ = time_call(lambda: synthetic_data.populate_database(
+            conn, transaction_count, args.categories, args.years, args.seed))
+        conn.close()
+        print(f"  generated {os.path.basename(path)} in {elapsed:.1f}s")
+    return path
+
+def benchmark_size(transaction_count, args, work_dir, visualize_module):
+    results = []
+
+    def record(name, seconds, rows=None, repeats=1):
+        results.append({'benchmark': name, 'seconds': round(seconds, 6), 'rows': rows, 'repeats': repeats})
+        print(f"  {name:<55} {seconds:>10.4f}s" + (f"  ({rows:,} rows)" if rows is not None else ""))
+
+    db_path = os.path.join(work_dir, 'benchmark-run.db')
+    shutil.copyfile(get_pristine_database(work_dir, transaction_count, args), db_path)
+    conn = duckdb.connect(db_path)
+    history_rows = conn.execute("SELECT COUNT(*) FROM consolidated_transactions").fetchone()[0]
+    categories = synthetic_data.generate_categories(args.categories)
+    vendors = synthetic_data.generate_vendors(categories, np.random.default_rng(args.seed))
+    year, month = synthetic_data.END_DATE.year, synthetic_data.END_DATE.month
+
+    # Ingest: parse and categorize a month of new statements
+    csv_files = synthetic_data.write_statement_csvs(vendors, synthetic_data.parse_size(args.csv_rows),
+                                                    os.path.join(work_dir, 'csv'), synthetic_data.END_DATE + timedelta(days=1))
+    elapsed, category_map = time_call(lambda: ingest.compile_category_map(db_operations.get_category_mapping_from_db(conn)))
+    record('ingest.compile_category_map', elapsed, len(db_operations.get_category_mapping_from_db(conn)))
+    global_categories = db_operations.get_global_categories_from_db(conn)
+    review_queue = {}
+    processed = {}
+    for bank_type, process_func in (('Chase', ingest.process_chase_csv), ('Charles Schwab', ingest.process_schwab_csv)):
+        elapsed, frames = time_call(lambda: [process_func(path, global_categories, {}, category_map, review_queue)
+                                             for path in csv_files[bank_type]])
+        processed[bank_type] = ingest.apply_review_choices(pd.concat(frames, ignore_index=True),
+                                                           {description: 'Misc' for description in review_queue})
+        record(f'ingest.{process_func.__name__}', elapsed, len(processed[bank_type]))
+
+    # Read paths, cold (first call builds the rollup / recurring series) and warm
+    elapsed, summary = time_call(lambda: db_operations.get_month_summary(conn, year, month))
+    record('get_month_summary (cold, builds monthly rollup)', elapsed, history_rows)
+    elapsed, summary = time_call(lambda: db_operations.get_month_summary(conn, year, month), args.repeats)
+    record('get_month_summary', elapsed, history_rows, args.repeats)
+
+    db_operations.create_recurring_series_tables(conn)
+    elapsed, _ = time_call(lambda: refresh_recurring_series(conn))
+    record('recurring.refresh_recurring_series', elapsed, history_rows)
+    elapsed, _ = time_call(lambda: review_extraordinary_spendings(conn, year, month), args.repeats)
+    record('review_extraordinary_spendings', elapsed, history_rows, args.repeats)
+
+    goal_start = datetime(year - args.years + 1, 1, 1).strftime('%Y-%m-%d')
+    breakdown_id = synthetic_data.insert_goal(conn, categories, goal_start)
+    elapsed, _ = time_call(lambda: calculate_and_conditionally_insert_monthly_breakdowns(conn, breakdown_id, goal_start))
+    item_count = conn.execute("SELECT COUNT(*) FROM surplus_and_deficit_breakdown_items").fetchone()[0]
+    record('calculate_and_conditionally_insert_monthly_breakdowns', elapsed, item_count)
+
+    # Spending chart: a full render and a cache hit
+    plot_data = summary[summary['category_group'] != 'Revenue'].sort_values('specified_month_sum', ascending=False)[
+        visualize_module.PLOT_COLUMNS]
+    cache_dir = os.path.join(work_dir, 'plot-cache')
+    plot_file = os.path.join(work_dir, 'plot.png')
+    elapsed, _ = time_call(lambda: visualize_module.render_plot(plot_data, plot_file))
+    record('visualize render_plot', elapsed, len(plot_data))
+    key = plot_cache.get_plot_cache_key(plot_data, visualize_module.PLOT_STYLE_VERSION)
+    plot_cache.store_plot(key, plot_file, cache_dir)
+    elapsed, _ = time_call(lambda: plot_cache.get_cached_plot(
+        plot_cache.get_plot_cache_key(plot_data, visualize_module.PLOT_STYLE_VERSION), cache_dir), args.repeats)
+    record('visualize cached plot lookup', elapsed, len(plot_data), args.repeats)
+
+    # Writes last, since they change the history
+    elapsed, _ = time_call(lambda: db_operations.persist_data_in_db_bulk(conn, processed['Chase'], 'consolidated_transactions'))
+    record('persist_data_in_db_bulk', elapsed, len(processed['Chase']))
+    rows = processed['Charles Schwab'].head(args.persist_rows)
+    elapsed, _ = time_call(lambda: db_operations.persist_data_in_db(conn, rows, 'consolidated_transactions'))
+    record('persist_data_in_db', elapsed, len(rows))
+
+    conn.close()
+    os.remove(db_path)
+    return history_rows, results
+
+def print_comparison(current, previous_path):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    baseline = {(run['size'], result['benchmark']): result['seconds']
+                for run in previous['sizes'] for result in run['results']}
+    print(f"\nCompared with {previous_path} ({previous['run'].get('commit')}):")
+    for run in current['sizes']:
+        for result in run['results']:
+            before = baseline.get((run['size'], result['benchmark']))
+            if before:
+                print(f"  {run['size']:>10} {result['benchmark']:<55} {before:>10.4f}s -> {result['seconds']:>10.4f}s"
+                      f"  {before / result['seconds']:>6.2f}x")
+
+def main():
+    args = parse_args()
+    commit, dirty = git_revision()
+    visualize_module = load_visualize_module()
+    started_at = datetime.now()
+    report = {
+        'run': {
+            'started_at': started_at.isoformat(timespec='seconds'),
+            'commit': commit,
+            'dirty': dirty,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'duckdb': duckdb.__version__,
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'args': vars(args),
+        },
+        'sizes': [],
+    }
+
+    with contextlib.ExitStack() as stack:
+        work_dir = args.work_dir or stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(work_dir, exist_ok=True)
+        for size in args.sizes:
+            transaction_count = synthetic_data.parse_size(size)
+            print(f"\n{transaction_count:,} transactions, {args.categories} categories, {args.years} years")
+            history_rows, results = benchmark_size(transaction_count, args, work_dir, visualize_module)
+            report['sizes'].append({'size': transaction_count, 'history_rows': history_rows, 'results': results})
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{started_at:%Y%m%d-%H%M%S}-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        print_comparison(report, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
-import duckdb
 import pandas as pd
 from datetime import datetime
+from db_operations import persist_data_in_db_bulk
+from db_session import get_connection, close_connection
 
-def insert_csv_into_duckdb(db_name, table_name, csv_file):
-    conn = duckdb.connect(db_name)
+def insert_csv_into_duckdb(table_name, csv_file):
+    conn = get_connection()
     
     # Quote the table name to handle special characters and numbers
     quoted_table_name = f'"{table_name}"'
@@ -14,9 +15,6 @@ def insert_csv_into_duckdb(db_name, table_name, csv_file):
         df = pd.read_csv(csv_file)
         print(f"CSV loaded. Total rows: {len(df)}")
 
-        # Convert 'Transaction Date' to datetime
-        df['Transaction Date'] = pd.to_datetime(df['Transaction Date'], format='%m/%d/%Y')
-
         # Step 3: Check if a primary key exists on the table
         check_pk = f"""
         SELECT COUNT(*)
@@ -29,35 +27,10 @@ def insert_csv_into_duckdb(db_name, table_name, csv_file):
             print('Fatal error: primary key missing from table {quoted_table_name}')
             return
 
-        # Step 4: Insert data
+        # Step 4: Insert data in one set-based pass; duplicates are skipped and the
+        # monthly_category_totals rollup is refreshed for the inserted months
         print("\nStep 4: Inserting data")
-        inserted_count = 0
-        error_count = 0
-        imploded_col_names = ', '.join(f'"{col}"' for col in df.columns.to_list())
-
-        for index, row in df.iterrows():
-            insert_query = f"""
-            INSERT INTO {quoted_table_name} ({imploded_col_names}) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """
-            try:
-                conn.execute(insert_query, (
-                    row['Card'],
-                    row['Transaction Date'].strftime('%Y-%m-%d'),  # Convert to YYYY-MM-DD
-                    row['Description'],
-                    row['Category'],
-                    row['Type'],
-                    row['Amount'],
-                    row['Memo']
-                ))
-                inserted_count += 1
-            except duckdb.ConstraintException as ce:
-                print(f"ConstraintException for row {index}: {str(ce)}")
-                error_count += 1
-            except Exception as e:
-                print(f"Error inserting row {index}: {str(e)}")
-                error_count += 1
-
-        print(f"Insertion complete. Rows inserted: {inserted_count}, Rows failed: {error_count}")
+        persist_data_in_db_bulk(conn, df, quoted_table_name)
 
         # Step 5: Verify data
         print("\nStep 5: Verifying data")
@@ -69,17 +42,15 @@ def insert_csv_into_duckdb(db_name, table_name, csv_file):
         for row in sample_data:
             print(row)
 
-        conn.commit()
         print("\nAll operations completed successfully")
     except Exception as e:
+        # persist_data_in_db_bulk has already rolled back its transaction
         print(f"\nAn error occurred during the process: {str(e)}")
-        conn.rollback()
     finally:
-        conn.close()
+        close_connection()
 
 # Usage
-db_name = 'budgeting-tool.db'
 table_name = 'consolidated_transactions'
 csv_file = 'finance-2024-combined.csv'
 
-insert_csv_into_duckdb(db_name, table_name, csv_file)
+insert_csv_into_duckdb(table_name, csv_file)
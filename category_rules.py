@@ -0,0 +1,74 @@
+import re
+
+# Substring matchers for categorization rules, shared by ingest and the rule replay so a
+# rule matches the same descriptions in both. Rules are merged into one trie-shaped regex,
+# so each description is scanned once however many rules exist; the leftmost occurrence
+# wins, then the longest rule starting there.
+
+def build_trie_pattern(trie):
+    """Turn a character trie into a regex that prefers the longest rule at each position."""
+    is_rule_end = '' in trie
+    branches = [re.escape(char) + build_trie_pattern(child) for char, child in sorted(trie.items()) if char != '']
+    if not branches:
+        return ''
+    if len(branches) == 1 and not is_rule_end:
+        return branches[0]
+    pattern = '(?:' + '|'.join(branches) + ')'
+    return pattern + '?' if is_rule_end else pattern
+
+def compile_trie_regex(rules):
+    """Compile rule strings into one regex; matches nothing when there are no rules."""
+    trie = {}
+    for rule in rules:
+        node = trie
+        for char in rule:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return re.compile(build_trie_pattern(trie) if rules else '(?!)')
+
+def normalize_description(description):
+    """Case- and whitespace-insensitive form used to match vendor mappings."""
+    return ' '.join(description.upper().split()) if isinstance(description, str) else None
+
+def normalize_descriptions(descriptions):
+    # Column-wise equivalent of normalize_description
+    return descriptions.str.replace(r'\s+', ' ', regex=True).str.strip().str.upper()
+
+def compile_vendor_matcher(vendor_mapping):
+    """
+    Compile vendor_category_mapping rows into a substring matcher.
+
+    Vendors are the substrings users typed (e.g. "STARBUCKS"), so they match anywhere in a
+    description, ignoring case and runs of whitespace. Vendors that only differ by case or
+    spacing map to the category of the alphabetically first spelling.
+
+    Args:
+    vendor_mapping (dict): Vendor -> category.
+
+    Returns:
+    tuple: (compiled regex over normalized vendors, dict of normalized vendor -> (vendor, category))
+    """
+    vendors = {}
+    for vendor in sorted(vendor_mapping or {}):
+        category = vendor_mapping[vendor]
+        if normalize_description(vendor) and category:
+            vendors.setdefault(normalize_description(vendor), (vendor, category))
+    return compile_trie_regex(list(vendors)), vendors
+
+def match_vendor(description, vendor_matcher):
+    """Return the (vendor, category) mapping matching description, or None."""
+    pattern, vendors = vendor_matcher
+    if not isinstance(description, str):
+        return None
+    match = pattern.search(normalize_description(description))
+    return vendors[match.group(0)] if match else None
+
+def match_vendors(descriptions, vendor_matcher):
+    """
+    Column-wise match_vendor.
+
+    Returns:
+    pd.Series: The matched normalized vendor per description, NaN where none matches.
+    """
+    pattern, vendors = vendor_matcher
+    return normalize_descriptions(descriptions.astype(object).fillna('')).str.extract(f'({pattern.pattern})', expand=False)
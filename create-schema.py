@@ -1,6 +1,7 @@
-import duckdb
-import os
 import db_operations
+from db_session import get_connection, close_connection
+import recurring
+import sql_templates
 
 def create_table(conn, table_name, columns):
     db_operations.execute_query(conn, f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(columns)})")
@@ -22,7 +23,8 @@ def create_table_consolidated_transactions(conn):
         '"Category" VARCHAR',
         '"Type" VARCHAR',
         '"Amount" DECIMAL(10, 2)',
-        '"Memo" VARCHAR'
+        '"Memo" VARCHAR',
+        "parent_id BIGINT"  # Links amortization installments to the original transaction
     ]
     create_table_with_sequence(conn, table_name, columns, ["Card", "Transaction Date", "Description", "Amount"])
 
@@ -64,12 +66,7 @@ def create_table_category_budgets(conn):
 
 def create_current_budgets_view(conn):
     try:
-        # Read the SQL query from the file
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        sql_file_path = os.path.join(current_dir, 'current-budgets.sql')
-        
-        with open(sql_file_path, 'r') as sql_file:
-            view_query = sql_file.read()
+        view_query = sql_templates.get_template('current-budgets')
 
         # Create the view
         create_view_query = f"CREATE OR REPLACE VIEW current_budgets AS {view_query}"
@@ -132,6 +129,54 @@ def create_table_flagged_transactions(conn):
     create_table(conn, table_name, columns)
     print(f"Table {table_name} created successfully")
 
+# Rows parked by `ingest.py --park-unresolved`; the date is kept as exported (MM/DD/YYYY)
+def create_table_pending_review_transactions(conn):
+    table_name = "pending_review_transactions"
+    columns = [
+        f"id BIGINT DEFAULT nextval('{table_name}_id_seq') PRIMARY KEY",
+        '"Card" VARCHAR',
+        '"Transaction Date" VARCHAR',
+        '"Description" VARCHAR',
+        '"Type" VARCHAR',
+        '"Amount" DECIMAL(10, 2)',
+        '"Memo" VARCHAR',
+        "parked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+    ]
+    create_table_with_sequence(conn, table_name, columns)
+    print(f"Table {table_name} created successfully")
+
+# One row per imported statement file, keyed by content hash so re-imports can be skipped
+def create_table_ingested_files(conn):
+    table_name = "ingested_files"
+    columns = [
+        "sha256 VARCHAR PRIMARY KEY",
+        "file_name VARCHAR",
+        "size_bytes BIGINT",
+        "bank_type VARCHAR",
+        "row_count INTEGER",
+        "imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+    ]
+    create_table(conn, table_name, columns)
+    print(f"Table {table_name} created successfully")
+
+# Category-by-month totals kept up to date by the db_operations write helpers
+def create_table_monthly_category_totals(conn):
+    db_operations.create_monthly_category_totals(conn)
+    db_operations.rebuild_monthly_category_totals(conn)
+    print("Table monthly_category_totals created and backfilled successfully")
+
+# Recurring charge series and their member transactions, re-detected after every ingest
+def create_table_recurring_series(conn):
+    db_operations.create_recurring_series_tables(conn)
+    recurring.refresh_recurring_series(conn)
+    print("Tables recurring_series and recurring_series_members created successfully")
+
+# Trigram index over distinct descriptions used by vendor search, extended after every ingest
+def create_table_description_index(conn):
+    db_operations.create_description_index(conn)
+    new_count = db_operations.refresh_description_index(conn)
+    print(f"Tables description_index and description_trigrams created successfully ({new_count} descriptions indexed)")
+
 def create_schema_menu(conn):
     while True:
         print("\nCreate Schema Menu:")
@@ -141,9 +186,14 @@ def create_schema_menu(conn):
         print("4. Create vendor_category_mapping table")
         print("5. Create surplus_and_deficit_breakdowns table")
         print("6. Create flagged_transactions table")  # Add this line
-        print("7. Exit")  # Update this line
+        print("7. Create pending_review_transactions table")
+        print("8. Create ingested_files table")
+        print("9. Create monthly_category_totals table")
+        print("10. Create recurring_series tables")
+        print("11. Create description_index tables")
+        print("12. Exit")
         
-        choice = input("Enter your choice (1-7): ")  # Update this line
+        choice = input("Enter your choice (1-12): ")
         
         if choice == '1':
             create_table_consolidated_transactions(conn)
@@ -157,20 +207,28 @@ def create_schema_menu(conn):
             create_table_surplus_and_deficit_breakdowns_and_items(conn)
         elif choice == '6':  # Add this block
             create_table_flagged_transactions(conn)
-        elif choice == '7':  # Update this line
+        elif choice == '7':
+            create_table_pending_review_transactions(conn)
+        elif choice == '8':
+            create_table_ingested_files(conn)
+        elif choice == '9':
+            create_table_monthly_category_totals(conn)
+        elif choice == '10':
+            create_table_recurring_series(conn)
+        elif choice == '11':
+            create_table_description_index(conn)
+        elif choice == '12':
             break
         else:
             print("Invalid choice. Please try again.")
 
 if __name__ == "__main__":
-    db_name = 'budgeting-tool.db'
-    
     try:
-        conn = duckdb.connect(db_name)
+        sql_templates.validate_templates()
+        conn = get_connection()
         create_schema_menu(conn)
         print("Schema creation completed.")
     except Exception as e:
         print(f"An error occurred: {str(e)}")
     finally:
-        if 'conn' in locals():
-            conn.close()
\ No newline at end of file
+        close_connection()
\ No newline at end of file
@@ -1,9 +1,107 @@
 import duckdb
-from datetime import datetime
+import functools
+import threading
+from collections import Counter, OrderedDict
+from datetime import date, datetime
 import pandas as pd
-def get_db_connection(db_name):
-    conn = duckdb.connect(db_name)
-    return conn
+import query_trace
+from category_rules import compile_vendor_matcher, match_vendors
+from sql_templates import get_parsed_template
+
+# Query results cached for the interactive session, keyed by (SQL, params, data generation).
+# Write helpers decorated with writes_data bump the generation, so results cached before a
+# write are never returned after it. Cached reads should not run inside an explicit
+# transaction that may be rolled back.
+QUERY_CACHE_MAX_ENTRIES = 128
+query_cache = OrderedDict()
+query_cache_stats = Counter()
+query_cache_lock = threading.Lock()
+query_cache_settings = {'enabled': False, 'max_entries': QUERY_CACHE_MAX_ENTRIES}
+data_generation = 0
+
+def enable_query_cache(max_entries=QUERY_CACHE_MAX_ENTRIES):
+    with query_cache_lock:
+        query_cache_settings.update(enabled=True, max_entries=max_entries)
+
+def disable_query_cache():
+    with query_cache_lock:
+        query_cache_settings['enabled'] = False
+        query_cache.clear()
+        query_cache_stats.clear()
+
+def bump_data_generation():
+    global data_generation
+    with query_cache_lock:
+        data_generation += 1
+
+def writes_data(func):
+    """Invalidate cached query results once the decorated write helper has run."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            bump_data_generation()
+    return wrapper
+
+def get_query_cache_stats():
+    with query_cache_lock:
+        return {'hits': query_cache_stats['hits'], 'misses': query_cache_stats['misses'],
+                'evictions': query_cache_stats['evictions'], 'entries': len(query_cache),
+                'generation': data_generation}
+
+def run_cached(query, params, run):
+    """Return run()'s result for (query, params) at the current data generation, memoized with LRU eviction."""
+    with query_cache_lock:
+        if not query_cache_settings['enabled']:
+            return run()
+        # Parsed template statements are keyed by their SQL text
+        key = (getattr(query, 'query', query), repr(params), data_generation)
+        hit = key in query_cache
+        if hit:
+            query_cache.move_to_end(key)
+            query_cache_stats['hits'] += 1
+            result = query_cache[key]
+        else:
+            query_cache_stats['misses'] += 1
+    if hit:
+        if query_trace.tracing_enabled():
+            query_trace.record_query(query, 0.0, params=params, cached=True)
+        return result
+
+    result = run()
+    with query_cache_lock:
+        # Stored under the generation the query started at; a write that raced it bumped past it
+        query_cache[key] = result
+        while len(query_cache) > query_cache_settings['max_entries']:
+            query_cache.popitem(last=False)
+            query_cache_stats['evictions'] += 1
+    return result
+
+def get_month_range(year, month):
+    """
+    Return the half-open [first_of_month, first_of_next_month) bounds of a month.
+
+    Filtering with these bounds instead of strftime/EXTRACT on the date column keeps
+    the predicate sargable, so DuckDB can skip row groups using their min/max stats.
+
+    Args:
+    year (int or str): The year.
+    month (int or str): The month, 1-12.
+
+    Returns:
+    tuple: (start, end) as datetime.date values.
+    """
+    start = date(int(year), int(month), 1)
+    end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start, end
+
+# Matches the memo of amortization installments 2..N; also works on databases without parent_id
+INSTALLMENT_MEMO_PREDICATE = "regexp_matches(COALESCE(Memo, ''), 'amortized transaction\\. Original transaction ID: \\d+')"
+
+def month_range_predicate(column='"Transaction Date"'):
+    """SQL fragment matching get_month_range bounds; takes two parameters (start, end)."""
+    return f"{column} >= ? AND {column} < ?"
 
 def execute_query(conn, query, params=None):
     try:
@@ -17,12 +115,18 @@ def execute_query(conn, query, params=None):
         print(f"Error message: {str(e)}")
         raise
 
-def query_and_return_df(conn, query_statement, params=None):
-    if params:
-        result = conn.execute(query_statement, params)
-    else:
-        result = conn.execute(query_statement)
-    return result.df()
+def query_and_return_df(conn, query_statement, params=None, cache=False):
+    def run():
+        if params:
+            result = conn.execute(query_statement, params)
+        else:
+            result = conn.execute(query_statement)
+        return result.df()
+
+    if cache:
+        # Copied so that callers can modify the frame without changing the cached one
+        return run_cached(query_statement, params, run).copy()
+    return run()
 
 def get_category_mapping_from_db(conn):
     query = """
@@ -35,15 +139,16 @@ def get_global_categories_from_db(conn):
     query = """
         select category from categories
     """
-    data = conn.execute(query).fetchall()
-    return [item[0] for item in data]
+    return query_and_return_df(conn, query, cache=True)['category'].tolist()
 
 # TODO: refactor this to be more specific rather than generic
+@writes_data
 def persist_data_in_db(conn, df, quoted_table_name):
     cols = df.columns.to_list()
     imploded_col_names = ', '.join(f'"{col}"' for col in cols)
     inserted_count = 0
     error_count = 0
+    inserted_cells = []
 
     for index, row in df.iterrows():
         insert_query = f"""
@@ -60,6 +165,7 @@ def persist_data_in_db(conn, df, quoted_table_name):
                 row[cols[6]]
             ))
             inserted_count += 1
+            inserted_cells.append((datetime.strptime(row[cols[1]], '%m/%d/%Y').replace(day=1), row[cols[3]]))
         except duckdb.ConstraintException as ce:
             #print(f"ConstraintException for row {index}: {str(ce)}")
             print(f"Duplicate entry rejected for row {index}, Transaction Date: {row[cols[1]]}, Description: {row[cols[2]]}, Amount: {row[cols[3]]}")
@@ -68,8 +174,175 @@ def persist_data_in_db(conn, df, quoted_table_name):
             print(f"Error inserting row {index}: {str(e)}")
             error_count += 1
     
+    refresh_monthly_category_totals(conn, pd.DataFrame(inserted_cells, columns=['month', 'category']))
     print(f"Insertion complete. Rows inserted: {inserted_count}, Rows failed: {error_count}")
 
+@writes_data
+def persist_data_in_db_bulk(conn, df, quoted_table_name, verbose=True):
+    """
+    Insert a processed transactions frame in one set-based pass.
+
+    The frame is registered with DuckDB once, dates are parsed column-wise and
+    rows whose (Card, Transaction Date, Description, Amount) key already exists
+    in the table, or appears earlier in the same frame, are reported as
+    duplicates instead of being rejected one by one by the unique index.
+
+    Args:
+    conn (duckdb.DuckDBPyConnection): The database connection.
+    df (pd.DataFrame): Seven-column frame produced by the ingest processors.
+    quoted_table_name (str): The target table, normally consolidated_transactions.
+    verbose (bool): Print the inserted/duplicate counts when done.
+
+    Returns:
+    pd.DataFrame: One row per input row with its key columns and a 'status'
+    column set to 'inserted' or 'duplicate'.
+    """
+    staged = df[['Card', 'Transaction Date', 'Description', 'Category', 'Type', 'Amount', 'Memo']].copy()
+    staged['Transaction Date'] = pd.to_datetime(staged['Transaction Date'], format='%m/%d/%Y').dt.date
+    staged['row_number'] = range(len(staged))
+
+    conn.register('staged_transactions_df', staged)
+    try:
+        conn.execute("BEGIN TRANSACTION")
+        conn.execute(f"""
+        CREATE OR REPLACE TEMP TABLE staged_transactions AS
+        WITH staged AS (
+            SELECT row_number,
+                   "Card",
+                   CAST("Transaction Date" AS DATE) AS "Transaction Date",
+                   "Description",
+                   "Category",
+                   "Type",
+                   CAST("Amount" AS DECIMAL(10, 2)) AS "Amount",
+                   "Memo"
+            FROM staged_transactions_df
+        ),
+        ranked AS (
+            SELECT *,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY "Card", "Transaction Date", "Description", "Amount"
+                       ORDER BY row_number
+                   ) AS occurrence
+            FROM staged
+        )
+        SELECT r.*,
+               CASE
+                   WHEN r.occurrence > 1 OR e."Card" IS NOT NULL THEN 'duplicate'
+                   ELSE 'inserted'
+               END AS status
+        FROM ranked r
+        LEFT JOIN (
+            SELECT DISTINCT "Card", "Transaction Date", "Description", "Amount"
+            FROM {quoted_table_name}
+        ) e
+          ON e."Card" = r."Card"
+         AND e."Transaction Date" = r."Transaction Date"
+         AND e."Description" = r."Description"
+         AND e."Amount" = r."Amount"
+        """)
+        conn.execute(f"""
+        INSERT INTO {quoted_table_name} ("Card", "Transaction Date", "Description", "Category", "Type", "Amount", "Memo")
+        SELECT "Card", "Transaction Date", "Description", "Category", "Type", "Amount", "Memo"
+        FROM staged_transactions
+        WHERE status = 'inserted'
+        ORDER BY row_number
+        """)
+        refresh_monthly_category_totals(conn, query_and_return_df(conn, """
+        SELECT DISTINCT CAST(DATE_TRUNC('month', "Transaction Date") AS DATE) AS month, "Category" AS category
+        FROM staged_transactions
+        WHERE status = 'inserted'
+        """))
+        report = query_and_return_df(conn, """
+        SELECT "Card", "Transaction Date", "Description", "Amount", status
+        FROM staged_transactions
+        ORDER BY row_number
+        """)
+        conn.execute("DROP TABLE staged_transactions")
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"An error occurred during bulk insertion. All rows have been rolled back. Error: {str(e)}")
+        raise
+    finally:
+        conn.unregister('staged_transactions_df')
+
+    if verbose:
+        status_counts = report['status'].value_counts()
+        print(f"Insertion complete. Rows inserted: {status_counts.get('inserted', 0)}, Duplicates skipped: {status_counts.get('duplicate', 0)}")
+    return report
+
+@writes_data
+def park_unresolved_transactions(conn, df, verbose=True):
+    """Store transactions still awaiting a category so a large import never blocks on input."""
+    parked = df[['Card', 'Transaction Date', 'Description', 'Type', 'Amount', 'Memo']]
+    conn.register('parked_transactions_df', parked)
+    try:
+        execute_query(conn, """
+        INSERT INTO pending_review_transactions ("Card", "Transaction Date", "Description", "Type", "Amount", "Memo")
+        SELECT "Card", "Transaction Date", "Description", "Type", "Amount", "Memo"
+        FROM parked_transactions_df
+        """)
+    finally:
+        conn.unregister('parked_transactions_df')
+    if verbose:
+        print(f"Parked {len(parked)} transactions with unknown descriptions for later review")
+
+def get_parked_transactions(conn):
+    query = """
+    SELECT "Card", "Transaction Date", "Description", NULL AS "Category", "Type", CAST("Amount" AS DOUBLE) AS "Amount", "Memo"
+    FROM pending_review_transactions
+    ORDER BY id
+    """
+    return query_and_return_df(conn, query)
+
+@writes_data
+def delete_parked_transactions(conn):
+    execute_query(conn, "DELETE FROM pending_review_transactions")
+
+def get_overlap_window_transactions(conn, overlap_days):
+    """
+    Return the keys of every transaction within overlap_days of its card's latest transaction date.
+
+    The latest "Transaction Date" per card acts as that card's high-water mark for incremental ingest.
+    Amortization installments are dated months ahead of the statement they came from, so they are
+    left out of the mark, and the mark is capped at today.
+    """
+    query = f"""
+    WITH watermarks AS (
+        SELECT "Card", LEAST(MAX("Transaction Date"), CURRENT_DATE) AS watermark
+        FROM consolidated_transactions
+        WHERE "Card" IS NOT NULL
+          AND NOT {INSTALLMENT_MEMO_PREDICATE}
+        GROUP BY "Card"
+    )
+    SELECT t."Card", t."Transaction Date", t."Description", CAST(t."Amount" AS DOUBLE) AS "Amount", w.watermark
+    FROM consolidated_transactions t
+    JOIN watermarks w USING ("Card")
+    WHERE t."Transaction Date" >= w.watermark - to_days(CAST(? AS INTEGER))
+    """
+    return query_and_return_df(conn, query, [overlap_days])
+
+def table_exists(conn, table_name):
+    query = "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?"
+    return execute_scalar_query(conn, query, [table_name]) > 0
+
+def get_ingested_file(conn, sha256):
+    query = """
+    SELECT file_name, row_count, imported_at
+    FROM ingested_files
+    WHERE sha256 = ?
+    """
+    return execute_query(conn, query, [sha256]).fetchone()
+
+@writes_data
+def record_ingested_file(conn, sha256, file_name, size_bytes, bank_type, row_count):
+    query = """
+    INSERT OR REPLACE INTO ingested_files (sha256, file_name, size_bytes, bank_type, row_count, imported_at)
+    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    """
+    execute_query(conn, query, [sha256, file_name, size_bytes, bank_type, row_count])
+
+@writes_data
 def insert_category_budget(conn, category, budget):
     try:
         insert_query = """
@@ -84,6 +357,7 @@ def insert_category_budget(conn, category, budget):
         conn.rollback()
         raise
 
+@writes_data
 def recategorize_transaction(conn, transaction_id, new_category, old_category):
     query = """
     UPDATE consolidated_transactions
@@ -97,7 +371,9 @@ def recategorize_transaction(conn, transaction_id, new_category, old_category):
     memo_addition = f". Recategorized by user from {old_category}"
     if new_category is None:
         memo_addition += ". Set to NULL by user from {old_category}"
+    affected_cells = get_monthly_cells_for_transactions(conn, [transaction_id])
     conn.execute(query, (new_category, memo_addition, memo_addition, transaction_id))
+    refresh_monthly_category_totals(conn, pd.concat([affected_cells, get_monthly_cells_for_transactions(conn, [transaction_id])]))
     conn.commit()
 
 def get_latest_month(conn):
@@ -108,27 +384,28 @@ def get_latest_month(conn):
     return execute_scalar_query(conn, query)
 
 def fetch_transactions(conn, category, year, month):
-    query = """
+    query = f"""
     SELECT id, Card, "Transaction Date", Description, Amount, Category
     FROM consolidated_transactions
     WHERE Category = ?
-      AND strftime('%Y', "Transaction Date") = ?
-      AND strftime('%m', "Transaction Date") = ?
+      AND {month_range_predicate()}
     ORDER BY "Transaction Date" DESC
     """
-    return query_and_return_df(conn, query, [category, str(year), str(month).zfill(2)])
+    return query_and_return_df(conn, query, [category, *get_month_range(year, month)], cache=True)
 
 def show_p95_expensive_nonrecurring_for_latest_month(conn, year, month):
-    query = """
-    WITH specified_month AS (
-        SELECT MAKE_DATE(?, ?, 1) AS month
-    ),
-    nonrecurring_expenses AS (
+    query = f"""
+    WITH nonrecurring_expenses AS (
         SELECT Description, Amount, "Transaction Date", Category
-        FROM consolidated_transactions, specified_month
-        WHERE Category NOT IN ('Monthly fixed cost', 'Monthly property expense', 'Monthly mortgage expense')
-          AND Amount < 0
-          AND DATE_TRUNC('month', "Transaction Date") = specified_month.month
+        FROM consolidated_transactions t
+        WHERE Amount < 0
+          AND Category IS NOT NULL
+          AND {month_range_predicate()}
+          AND NOT EXISTS (
+              SELECT 1
+              FROM recurring_series_members m
+              WHERE m.transaction_id = t.id
+          )
     ),
     percentile_calc AS (
         SELECT *, 
@@ -140,7 +417,7 @@ def show_p95_expensive_nonrecurring_for_latest_month(conn, year, month):
     WHERE percentile >= 0.95
     ORDER BY Amount ASC
     """
-    df = query_and_return_df(conn, query, [year, month])
+    df = query_and_return_df(conn, query, list(get_month_range(year, month)), cache=True)
     
     if df.empty:
         return None
@@ -149,20 +426,99 @@ def show_p95_expensive_nonrecurring_for_latest_month(conn, year, month):
         df = df.sort_values('Amount', ascending=False)  # Sort by Amount in descending order        
         return df
 
+@writes_data
 def insert_adjustment_transaction(conn, transaction_date, description, amount, category):
     query = """
     INSERT INTO consolidated_transactions ("Transaction Date", Description, Amount, Category)
     VALUES (?, ?, ?, ?)
     """
     execute_query(conn, query, (transaction_date, description, amount, category))
+    refresh_monthly_category_totals(conn, pd.DataFrame({
+        'month': [pd.Timestamp(transaction_date).replace(day=1)],
+        'category': [category],
+    }))
     conn.commit()
 
 def get_month_summary(conn, year, month):
-    with open('specific-month-summary.sql', 'r') as file:
-        query = file.read()
-    
-    return query_and_return_df(conn, query, [year, month])
+    ensure_monthly_category_totals(conn)
+    return query_and_return_df(conn, get_parsed_template('specific-month-summary'), [year, month], cache=True)
 
+@writes_data
+def create_monthly_category_totals(conn):
+    query = """
+    CREATE TABLE IF NOT EXISTS monthly_category_totals (
+        month DATE,
+        category VARCHAR,
+        total DECIMAL(38, 2),
+        transaction_count BIGINT,
+        PRIMARY KEY (month, category)
+    )
+    """
+    execute_query(conn, query)
+
+@writes_data
+def rebuild_monthly_category_totals(conn):
+    execute_query(conn, "DELETE FROM monthly_category_totals")
+    query = """
+    INSERT INTO monthly_category_totals (month, category, total, transaction_count)
+    SELECT CAST(DATE_TRUNC('month', "Transaction Date") AS DATE), "Category", SUM("Amount"), COUNT(*)
+    FROM consolidated_transactions
+    WHERE "Category" IS NOT NULL
+      AND "Transaction Date" IS NOT NULL
+    GROUP BY 1, 2
+    """
+    execute_query(conn, query)
+
+def ensure_monthly_category_totals(conn):
+    """Create and backfill the category-by-month rollup the first time it is needed."""
+    if not table_exists(conn, 'monthly_category_totals'):
+        create_monthly_category_totals(conn)
+        rebuild_monthly_category_totals(conn)
+
+def get_monthly_cells_for_transactions(conn, transaction_ids):
+    query = """
+    SELECT DISTINCT CAST(DATE_TRUNC('month', "Transaction Date") AS DATE) AS month, "Category" AS category
+    FROM consolidated_transactions
+    WHERE id IN (SELECT UNNEST(?))
+    """
+    return query_and_return_df(conn, query, [list(transaction_ids)])
+
+@writes_data
+def refresh_monthly_category_totals(conn, cells):
+    """
+    Recompute the monthly_category_totals rows for the given (month, category) cells only.
+
+    Args:
+    conn (duckdb.DuckDBPyConnection): The database connection.
+    cells (pd.DataFrame): 'month' (first day of month) and 'category' columns, captured
+    before and/or after a write so that both the old and the new cell are refreshed.
+    """
+    cells = cells[['month', 'category']].dropna().drop_duplicates()
+    if cells.empty or not table_exists(conn, 'monthly_category_totals'):
+        return
+
+    conn.register('rollup_cells_df', cells)
+    try:
+        execute_query(conn, """
+        DELETE FROM monthly_category_totals r
+        USING rollup_cells_df c
+        WHERE r.month = CAST(c.month AS DATE)
+          AND r.category = c.category
+        """)
+        execute_query(conn, """
+        INSERT INTO monthly_category_totals (month, category, total, transaction_count)
+        SELECT CAST(c.month AS DATE), c.category, SUM(t."Amount"), COUNT(*)
+        FROM rollup_cells_df c
+        JOIN consolidated_transactions t
+          ON t."Category" = c.category
+         AND t."Transaction Date" >= CAST(c.month AS DATE)
+         AND t."Transaction Date" < CAST(c.month AS DATE) + INTERVAL 1 MONTH
+        GROUP BY 1, 2
+        """)
+    finally:
+        conn.unregister('rollup_cells_df')
+
+@writes_data
 def insert_vendor_category_mapping(conn, vendor, category):
     # Remove the transaction handling from this function
     category_check_query = "SELECT COUNT(*) FROM categories WHERE category = ?"
@@ -178,45 +534,368 @@ def insert_vendor_category_mapping(conn, vendor, category):
     execute_query(conn, insert_query, [vendor, category])
     print(f"Vendor '{vendor}' successfully mapped to category '{category}'")
 
+@writes_data
+def create_description_index(conn):
+    execute_query(conn, "CREATE SEQUENCE IF NOT EXISTS description_index_id_seq START 1")
+    execute_query(conn, """
+    CREATE TABLE IF NOT EXISTS description_index (
+        id BIGINT DEFAULT nextval('description_index_id_seq') PRIMARY KEY,
+        description VARCHAR UNIQUE,
+        trigram_count INTEGER
+    )
+    """)
+    execute_query(conn, """
+    CREATE TABLE IF NOT EXISTS description_trigrams (
+        trigram VARCHAR,
+        description_id BIGINT
+    )
+    """)
+    create_description_index_state(conn)
+
+def create_description_index_state(conn):
+    # Highest consolidated_transactions id already indexed; descriptions never change after insert
+    execute_query(conn, "CREATE TABLE IF NOT EXISTS description_index_state (last_transaction_id BIGINT)")
+
+def get_description_index_mark(conn):
+    if not table_exists(conn, 'description_index_state'):
+        return 0
+    return execute_scalar_query(conn, "SELECT COALESCE(MAX(last_transaction_id), 0) FROM description_index_state")
+
+def refresh_description_index(conn):
+    """
+    Add the trigrams of every description that is not indexed yet.
+
+    Only transactions inserted since the last refresh are scanned: the highest indexed
+    transaction id is kept in description_index_state, and when no newer id exists the
+    refresh stops after one MAX(id) lookup. That keeps it cheap enough to run before
+    every indexed lookup.
+
+    Descriptions are case-folded before being split into trigrams, so a probe
+    returns a superset of the case-sensitive substring matches. Does not commit,
+    so it can run inside the caller's transaction; the trigrams are stored before
+    the description rows and the mark last, so an interrupted refresh is redone by
+    the next one. The data generation is only bumped when descriptions are added.
+
+    Returns:
+    int: The number of newly indexed descriptions.
+    """
+    mark = get_description_index_mark(conn)
+    latest_id = execute_scalar_query(conn, "SELECT COALESCE(MAX(id), 0) FROM consolidated_transactions")
+    if latest_id <= mark:
+        return 0
+
+    conn.execute("""
+    CREATE OR REPLACE TEMP TABLE new_descriptions AS
+    SELECT nextval('description_index_id_seq') AS id, Description AS description, lower(Description) AS folded
+    FROM (SELECT DISTINCT Description FROM consolidated_transactions WHERE id > ? AND Description IS NOT NULL) t
+    WHERE NOT EXISTS (SELECT 1 FROM description_index i WHERE i.description = t.Description)
+    """, [mark])
+    new_count = conn.execute("SELECT COUNT(*) FROM new_descriptions").fetchone()[0]
+    if new_count:
+        try:
+            conn.execute("""
+            CREATE OR REPLACE TEMP TABLE new_description_trigrams AS
+            SELECT DISTINCT substring(folded, i, 3) AS trigram, id AS description_id
+            FROM new_descriptions, range(1, length(folded) - 1) r(i)
+            """)
+            conn.execute("INSERT INTO description_trigrams SELECT trigram, description_id FROM new_description_trigrams")
+            conn.execute("""
+            INSERT INTO description_index (id, description, trigram_count)
+            SELECT d.id, d.description, COUNT(t.trigram)
+            FROM new_descriptions d
+            LEFT JOIN new_description_trigrams t ON t.description_id = d.id
+            GROUP BY d.id, d.description
+            """)
+            conn.execute("DROP TABLE new_description_trigrams")
+        finally:
+            bump_data_generation()
+    conn.execute("DROP TABLE new_descriptions")
+    create_description_index_state(conn)
+    conn.execute("DELETE FROM description_index_state")
+    conn.execute("INSERT INTO description_index_state VALUES (?)", [latest_id])
+    return new_count
+
+def ensure_description_index(conn):
+    """Create the trigram index on first use and bring it up to date."""
+    if not table_exists(conn, 'description_index'):
+        create_description_index(conn)
+    refresh_description_index(conn)
+
+QUERY_TRIGRAMS_CTE = """
+    query_trigrams AS (
+        SELECT DISTINCT substring(q, i, 3) AS trigram
+        FROM (SELECT lower(CAST(? AS VARCHAR)) AS q), range(1, length(q) - 1) r(i)
+    )
+"""
+
+def get_matching_descriptions(conn, vendor):
+    """
+    Return the distinct descriptions matching Description LIKE '%vendor%'.
+
+    When the trigram index exists, it is first brought up to date with descriptions
+    inserted since the last refresh, then only descriptions containing every trigram
+    of vendor are checked with LIKE; otherwise, or when vendor is shorter than a
+    trigram or contains LIKE wildcards, every distinct description is.
+    """
+    vendor_pattern = f"%{vendor}%"
+    if len(vendor) < 3 or '%' in vendor or '_' in vendor or not table_exists(conn, 'description_index'):
+        query = """
+        SELECT DISTINCT Description
+        FROM consolidated_transactions
+        WHERE Description LIKE ?
+        """
+        return [row[0] for row in execute_query(conn, query, [vendor_pattern]).fetchall()]
+
+    refresh_description_index(conn)
+    query = f"""
+    WITH {QUERY_TRIGRAMS_CTE}
+    SELECT i.description
+    FROM description_trigrams t
+    JOIN query_trigrams q ON q.trigram = t.trigram
+    JOIN description_index i ON i.id = t.description_id
+    GROUP BY i.description
+    HAVING COUNT(*) = (SELECT COUNT(*) FROM query_trigrams)
+       AND i.description LIKE ?
+    """
+    return [row[0] for row in execute_query(conn, query, [vendor, vendor_pattern]).fetchall()]
+
 def get_transactions_by_vendor(conn, vendor):
     query = """
     SELECT id, "Transaction Date", Description, Amount, Category
     FROM consolidated_transactions
-    WHERE Description LIKE ?
+    WHERE Description IN (SELECT UNNEST(CAST(? AS VARCHAR[])))
     ORDER BY "Transaction Date" DESC
     """
     
-    # Use wildcards to match partial vendor names in the description
-    vendor_pattern = f"%{vendor}%"
-    
-    return query_and_return_df(conn, query, [vendor_pattern])
+    # Partial vendor names match like Description LIKE '%vendor%', probed through the trigram index
+    return query_and_return_df(conn, query, [get_matching_descriptions(conn, vendor)])
+
+def search_descriptions(conn, text, limit=20):
+    """
+    Rank stored descriptions by trigram similarity to text.
+
+    Args:
+    conn (duckdb.DuckDBPyConnection): The database connection.
+    text (str): What the user typed; case does not matter and typos are tolerated.
+    limit (int): The maximum number of descriptions returned.
 
+    Returns:
+    pd.DataFrame: description, coverage (share of the text's trigrams found in the
+    description), similarity (trigram Jaccard index), transaction_count and
+    last_date, best match first.
+    """
+    ensure_description_index(conn)
+    query = f"""
+    WITH {QUERY_TRIGRAMS_CTE},
+    scores AS (
+        SELECT t.description_id, COUNT(*) AS matched
+        FROM description_trigrams t
+        JOIN query_trigrams q ON q.trigram = t.trigram
+        GROUP BY t.description_id
+    ),
+    top_matches AS (
+        SELECT i.description,
+               ROUND(s.matched / (SELECT COUNT(*) FROM query_trigrams), 3) AS coverage,
+               ROUND(s.matched / ((SELECT COUNT(*) FROM query_trigrams) + i.trigram_count - s.matched), 3) AS similarity
+        FROM scores s
+        JOIN description_index i ON i.id = s.description_id
+        ORDER BY coverage DESC, similarity DESC, i.description
+        LIMIT ?
+    )
+    SELECT m.description, m.coverage, m.similarity,
+           COUNT(*) AS transaction_count, MAX(ct."Transaction Date") AS last_date
+    FROM top_matches m
+    JOIN consolidated_transactions ct ON ct.Description = m.description
+    GROUP BY ALL
+    ORDER BY m.coverage DESC, m.similarity DESC, transaction_count DESC, m.description
+    """
+    return query_and_return_df(conn, query, [text, limit])
+
+RECATEGORIZE_SET_CLAUSE = """
+    SET Category = ?,
+        Memo = COALESCE(Memo, '') || '. Recategorized by user from ' || COALESCE(Category, 'None')
+            || CASE WHEN CAST(? AS VARCHAR) IS NULL THEN '. Set to NULL by user from ' || COALESCE(Category, 'None') ELSE '' END
+"""
+
+@writes_data
 def recategorize_transactions(conn, transaction_ids, new_category):
-    query = """
+    query = f"""
     UPDATE consolidated_transactions
-    SET Category = ?,
-        Memo = CASE
-            WHEN Memo IS NULL OR Memo = '' THEN ?
-            ELSE Memo || ?
-        END
-    WHERE id = ?
+    {RECATEGORIZE_SET_CLAUSE}
+    WHERE id IN (SELECT UNNEST(?))
+    RETURNING id
     """
-
+    affected_cells = get_monthly_cells_for_transactions(conn, transaction_ids)
+    updated_ids = {row[0] for row in execute_query(conn, query, [new_category, new_category, list(transaction_ids)]).fetchall()}
     for transaction_id in transaction_ids:
-        old_category_query = "SELECT Category FROM consolidated_transactions WHERE id = ?"
-        result = execute_query(conn, old_category_query, [transaction_id])
-        old_category = result.fetchone()
-        if old_category is None:
+        if transaction_id not in updated_ids:
             print(f"WARNING: No transaction found with id {transaction_id}")
-            continue
-        old_category = old_category[0]
-        memo_addition = f". Recategorized by user from {old_category}"
-        if new_category is None:
-            memo_addition += f". Set to NULL by user from {old_category}"
 
-        execute_query(conn, query, (new_category, memo_addition, memo_addition, transaction_id))
+    refresh_monthly_category_totals(conn, pd.concat([affected_cells, get_monthly_cells_for_transactions(conn, transaction_ids)]))
+    print(f"Successfully recategorized {len(updated_ids)} transactions to '{new_category}'")
+
+@writes_data
+def recategorize_vendor_transactions(conn, vendor, new_category):
+    """
+    Recategorize every transaction whose description contains vendor with one UPDATE.
+
+    Does not commit, so it runs inside the caller's transaction.
+
+    Args:
+    conn (duckdb.DuckDBPyConnection): The database connection.
+    vendor (str): Substring matched against Description, as in get_transactions_by_vendor.
+    new_category (str or None): The new category, None to exclude.
+
+    Returns:
+    pd.DataFrame: old_category, new_category and transaction_count per old category.
+    """
+    descriptions = get_matching_descriptions(conn, vendor)
+    before = query_and_return_df(conn, """
+    SELECT CAST(DATE_TRUNC('month', "Transaction Date") AS DATE) AS month, Category AS category, COUNT(*) AS transaction_count
+    FROM consolidated_transactions
+    WHERE Description IN (SELECT UNNEST(CAST(? AS VARCHAR[])))
+    GROUP BY 1, 2
+    """, [descriptions])
+
+    query = f"""
+    UPDATE consolidated_transactions
+    {RECATEGORIZE_SET_CLAUSE}
+    WHERE Description IN (SELECT UNNEST(CAST(? AS VARCHAR[])))
+    RETURNING CAST(DATE_TRUNC('month', "Transaction Date") AS DATE) AS month, Category AS category
+    """
+    after = execute_query(conn, query, [new_category, new_category, descriptions]).df()
+    if len(after) != before['transaction_count'].sum():
+        raise RuntimeError(f"Expected to recategorize {before['transaction_count'].sum()} transactions, updated {len(after)}")
+
+    refresh_monthly_category_totals(conn, pd.concat([before[['month', 'category']], after]))
+    summary = (before.groupby('category', dropna=False)['transaction_count'].sum()
+               .rename_axis('old_category').reset_index())
+    summary.insert(1, 'new_category', new_category)
+    return summary
+
+@writes_data
+def delete_vendor_category_mapping(conn, vendor):
+    query = """
+    DELETE FROM vendor_category_mapping
+    WHERE vendor = ?
+    """
+    execute_query(conn, query, [vendor])
+
+def stage_rule_replay_changes(conn):
+    """
+    Evaluate every keyword pattern and vendor mapping against consolidated_transactions.
+
+    Rules are matched once per distinct description. Vendor mappings win over keyword
+    patterns and are matched with the same category_rules matcher as ingest; keywords
+    follow ingest too: leftmost match, then longest keyword, case-insensitive. Excluded rows (NULL category) and
+    rows a user recategorized by hand are left alone. The resulting changes are kept
+    in the rule_replay_changes temp table for get_rule_replay_summary and
+    apply_rule_replay_changes.
+
+    Returns:
+    int: The number of transactions whose category would change.
+    """
+    vendor_matcher = compile_vendor_matcher(
+        get_vendor_category_mappings(conn) if table_exists(conn, 'vendor_category_mapping') else {})
+    vendor_matches = pd.DataFrame({'Description': pd.Series(dtype=object), 'rule': pd.Series(dtype=object),
+                                   'new_category': pd.Series(dtype=object)})
+    if vendor_matcher[1]:
+        descriptions = pd.Series([row[0] for row in execute_query(conn, """
+        SELECT DISTINCT Description FROM consolidated_transactions WHERE Description IS NOT NULL
+        """).fetchall()], dtype=object)
+        matched = match_vendors(descriptions, vendor_matcher).dropna()
+        vendor_matches = pd.DataFrame({
+            'Description': descriptions[matched.index],
+            'rule': matched.map(lambda vendor: vendor_matcher[1][vendor][0]),
+            'new_category': matched.map(lambda vendor: vendor_matcher[1][vendor][1]),
+        })
+    conn.register('rule_replay_vendor_matches_df', vendor_matches)
+    query = f"""
+    CREATE OR REPLACE TEMP TABLE rule_replay_changes AS
+    WITH descriptions AS (
+        SELECT DISTINCT Description
+        FROM consolidated_transactions
+        WHERE Description IS NOT NULL
+    ),
+    vendor_matches AS (
+        SELECT Description, 'vendor' AS rule_type, rule, new_category, 0 AS priority, 1 AS rn
+        FROM rule_replay_vendor_matches_df
+    ),
+    keyword_matches AS (
+        SELECT d.Description, 'keyword' AS rule_type, p.keyword AS rule, p.category AS new_category, 1 AS priority,
+               ROW_NUMBER() OVER (
+                   PARTITION BY d.Description
+                   ORDER BY instr(lower(d.Description), lower(p.keyword)), LENGTH(p.keyword) DESC, p.keyword
+               ) AS rn
+        FROM descriptions d
+        JOIN category_matching_patterns p ON contains(lower(d.Description), lower(p.keyword))
+        WHERE p.keyword <> '' AND p.category IS NOT NULL
+    ),
+    resolved AS (
+        SELECT Description, rule_type, rule, new_category,
+               ROW_NUMBER() OVER (PARTITION BY Description ORDER BY priority) AS rn
+        FROM (
+            SELECT * FROM vendor_matches WHERE rn = 1
+            UNION ALL
+            SELECT * FROM keyword_matches WHERE rn = 1
+        )
+    )
+    SELECT t.id, t."Transaction Date", t.Description, t.Category AS old_category, r.new_category, r.rule_type, r.rule
+    FROM consolidated_transactions t
+    JOIN resolved r ON t.Description = r.Description AND r.rn = 1
+    WHERE t.Category IS NOT NULL
+      AND t.Category <> r.new_category
+      AND COALESCE(t.Memo, '') NOT LIKE '%Recategorized by user%'
+    """
+    try:
+        execute_query(conn, query)
+    finally:
+        conn.unregister('rule_replay_vendor_matches_df')
+    return execute_scalar_query(conn, "SELECT COUNT(*) FROM rule_replay_changes")
+
+def get_rule_replay_summary(conn):
+    query = """
+    SELECT rule_type, rule, old_category, new_category, COUNT(*) AS transactions
+    FROM rule_replay_changes
+    GROUP BY ALL
+    ORDER BY transactions DESC, rule_type, rule, old_category
+    """
+    return query_and_return_df(conn, query)
+
+@writes_data
+def apply_rule_replay_changes(conn):
+    """
+    Apply the changes staged by stage_rule_replay_changes in one transaction.
+
+    Returns:
+    int: The number of transactions recategorized.
+    """
+    try:
+        conn.execute("BEGIN TRANSACTION")
+        updated = execute_query(conn, """
+        UPDATE consolidated_transactions t
+        SET Category = c.new_category,
+            Memo = COALESCE(t.Memo, '') || '. Recategorized by rule replay from ' || c.old_category
+        FROM rule_replay_changes c
+        WHERE t.id = c.id
+        """).fetchone()[0]
+        refresh_monthly_category_totals(conn, query_and_return_df(conn, """
+        SELECT CAST(DATE_TRUNC('month', "Transaction Date") AS DATE) AS month, old_category AS category FROM rule_replay_changes
+        UNION
+        SELECT CAST(DATE_TRUNC('month', "Transaction Date") AS DATE) AS month, new_category AS category FROM rule_replay_changes
+        """))
+        conn.commit()
+        return updated
+    except Exception:
+        conn.rollback()
+        raise
 
-    print(f"Successfully recategorized {len(transaction_ids)} transactions to '{new_category}'")
+def get_vendor_category_mappings(conn):
+    query = """
+    SELECT vendor, category
+    FROM vendor_category_mapping
+    """
+    return dict(execute_query(conn, query).fetchall())
 
 def get_vendor_category_mapping(conn, vendor):
     """
@@ -241,6 +920,7 @@ def get_vendor_category_mapping(conn, vendor):
         print(f"An error occurred while retrieving vendor-category mapping: {str(e)}")
         return None
 
+@writes_data
 def insert_surplus_deficit_breakdown(conn, description, breakdown, effective_date):
     try:
         query = """
@@ -258,42 +938,67 @@ def insert_surplus_deficit_breakdown(conn, description, breakdown, effective_dat
         raise
 
 def get_subtotal_by_category_group_for_month(conn, year, month):
-    query = """
+    query = f"""
     SELECT category_group, SUM(t.amount) as subtotal
     FROM consolidated_transactions t
     JOIN categories c using (category)
-    WHERE EXTRACT(YEAR FROM t."Transaction Date") = ?
-    AND EXTRACT(MONTH FROM t."Transaction Date") = ?
+    WHERE {month_range_predicate('t."Transaction Date"')}
     AND category is not null
     GROUP BY 1
     """
-    return query_and_return_df(conn, query, [year, month])
+    return query_and_return_df(conn, query, list(get_month_range(year, month)), cache=True)
 
-def get_net_income_for_month(conn, year, month):
-    query = """
-    SELECT SUM(amount) as net_income
-    FROM consolidated_transactions
-    WHERE EXTRACT(YEAR FROM "Transaction Date") = ?
-    AND EXTRACT(MONTH FROM "Transaction Date") = ?
-    AND category is not null
+@writes_data
+def insert_surplus_deficit_breakdown_items(conn, items):
     """
-    result = execute_query(conn, query, [year, month]).fetchone()
-    return result[0] if result[0] is not None else 0
+    Insert many breakdown items in a single transaction.
 
-def insert_surplus_deficit_breakdown_item(conn, breakdown_id, category, description, amount, date):
+    Args:
+    conn (duckdb.DuckDBPyConnection): The database connection.
+    items (list): (breakdown_id, category, description, amount, date) tuples.
+    """
+    if not items:
+        return
     try:
-        query = """
+        conn.execute("BEGIN TRANSACTION")
+        conn.executemany("""
         INSERT INTO surplus_and_deficit_breakdown_items 
         (surplus_and_deficit_breakdown_id, category, description, amount, date)
         VALUES (?, ?, ?, ?, ?)
-        """
-        conn.execute(query, [breakdown_id, category, description, amount, date])
+        """, items)
         conn.commit()
     except Exception as e:
         conn.rollback()
-        print(f"An error occurred while inserting Surplus/Deficit Breakdown Item: {str(e)}")
+        print(f"An error occurred while inserting Surplus/Deficit Breakdown Items: {str(e)}")
         raise
 
+def get_net_income_by_month(conn, start_date, end_date):
+    """
+    Net income (sum of categorized transactions) of every month in [start_date, end_date).
+
+    Returns:
+    dict: First day of month (datetime.date) -> Decimal net income. Months without
+    categorized transactions are absent.
+    """
+    query = f"""
+    SELECT CAST(DATE_TRUNC('month', "Transaction Date") AS DATE) AS month, SUM(amount) AS net_income
+    FROM consolidated_transactions
+    WHERE {month_range_predicate()}
+    AND category is not null
+    GROUP BY 1
+    """
+    return dict(execute_query(conn, query, [start_date, end_date]).fetchall())
+
+def get_breakdown_item_months(conn, breakdown_id, start_date, end_date):
+    """Return the (first day of month, description) pairs a breakdown already has items for."""
+    query = f"""
+    SELECT DISTINCT CAST(DATE_TRUNC('month', date) AS DATE), description
+    FROM surplus_and_deficit_breakdown_items
+    WHERE surplus_and_deficit_breakdown_id = ?
+      AND {month_range_predicate('date')}
+    """
+    return set(execute_query(conn, query, [breakdown_id, start_date, end_date]).fetchall())
+
 def get_latest_transaction_date(conn):
     query = """
     SELECT MAX("Transaction Date") 
@@ -301,53 +1006,128 @@ def get_latest_transaction_date(conn):
     """
     return execute_scalar_query(conn, query) or date.today()
 
-def execute_scalar_query(conn, query, params=None):
-    result = conn.execute(query, params).fetchone()
-    return result[0] if result else None
+def execute_scalar_query(conn, query, params=None, cache=False):
+    def run():
+        result = conn.execute(query, params).fetchone()
+        return result[0] if result else None
 
-def get_p85_for_category(conn, category, year, month):
-    query = """
-    SELECT PERCENTILE_CONT(0.85) WITHIN GROUP (ORDER BY ABS(Amount))
-    FROM consolidated_transactions
-    WHERE Category = ?
-      AND strftime('%Y', "Transaction Date") = ?
-      AND strftime('%m', "Transaction Date") = ?
-    """
-    return execute_scalar_query(conn, query, [category, str(year), str(month).zfill(2)])
+    return run_cached(query, params, run) if cache else run()
 
-def get_transactions_above_threshold(conn, category, year, month, threshold):
-    query = """
-    SELECT "Transaction Date", Description, Amount
-    FROM consolidated_transactions
-    WHERE Category = ?
-      AND strftime('%Y', "Transaction Date") = ?
-      AND strftime('%m', "Transaction Date") = ?
-      AND ABS(Amount) > ?
-    ORDER BY ABS(Amount) DESC
+def get_extraordinary_nonrecurring_transactions(conn, year, month, categories, excluded_categories):
     """
-    return query_and_return_df(conn, query, [category, str(year), str(month).zfill(2), threshold])
+    Find a month's extraordinary, non-recurring transactions in a single query.
 
-def get_p90_across_categories(conn, year, month, excluded_categories):
-    placeholders = ','.join(['?'] * len(excluded_categories))
+    A transaction qualifies when its absolute amount is above the P85 of its own
+    category for the month, at least the P90 of all non-excluded transactions for
+    the month, and it is not a member of a detected recurring series.
+
+    Args:
+    conn (duckdb.DuckDBPyConnection): The database connection.
+    year (int): The year.
+    month (int): The month.
+    categories (list): Categories to review.
+    excluded_categories (list): Categories left out of the P90 computation.
+
+    Returns:
+    pd.DataFrame: Category, Transaction Date, Description, Amount and p90_amount,
+    ordered by absolute amount, largest first.
+    """
     query = f"""
-    SELECT PERCENTILE_CONT(0.90) WITHIN GROUP (ORDER BY ABS(Amount))
-    FROM consolidated_transactions
-    WHERE strftime('%Y', "Transaction Date") = ?
-      AND strftime('%m', "Transaction Date") = ?
-      AND Category NOT IN ({placeholders})
+    WITH month_transactions AS (
+        SELECT id, Category, "Transaction Date", Description, Amount
+        FROM consolidated_transactions
+        WHERE {month_range_predicate()}
+    ),
+    global_p90 AS (
+        SELECT PERCENTILE_CONT(0.90) WITHIN GROUP (ORDER BY ABS(Amount)) AS p90_amount
+        FROM month_transactions
+        WHERE Category NOT IN (SELECT UNNEST(CAST(? AS VARCHAR[])))
+    ),
+    category_p85 AS (
+        SELECT *,
+               QUANTILE_CONT(ABS(Amount), 0.85) OVER (PARTITION BY Category) AS p85_amount
+        FROM month_transactions
+        WHERE Category IN (SELECT UNNEST(CAST(? AS VARCHAR[])))
+    )
+    SELECT t.Category, t."Transaction Date", t.Description, t.Amount, g.p90_amount
+    FROM category_p85 t
+    CROSS JOIN global_p90 g
+    WHERE ABS(t.Amount) > t.p85_amount
+      AND ABS(t.Amount) >= g.p90_amount
+      AND NOT EXISTS (
+          SELECT 1
+          FROM recurring_series_members m
+          WHERE m.transaction_id = t.id
+      )
+    ORDER BY ABS(t.Amount) DESC
+    """
+    params = [*get_month_range(year, month), list(excluded_categories), list(categories)]
+    return query_and_return_df(conn, query, params, cache=True)
+
+@writes_data
+def create_recurring_series_tables(conn):
+    execute_query(conn, """
+    CREATE TABLE IF NOT EXISTS recurring_series (
+        id BIGINT PRIMARY KEY,
+        merchant VARCHAR,
+        periodicity VARCHAR,
+        typical_amount DECIMAL(10, 2),
+        median_gap_days DOUBLE,
+        transaction_count INTEGER,
+        first_date DATE,
+        last_date DATE,
+        detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    execute_query(conn, """
+    CREATE TABLE IF NOT EXISTS recurring_series_members (
+        transaction_id BIGINT PRIMARY KEY,
+        series_id BIGINT
+    )
+    """)
+
+@writes_data
+def replace_recurring_series(conn, series, members):
+    """
+    Replace the stored recurring series and their transaction membership in one transaction.
+
+    Args:
+    conn (duckdb.DuckDBPyConnection): The database connection.
+    series (pd.DataFrame): Output of recurring.detect_recurring_series.
+    members (pd.DataFrame): transaction_id and series_id columns.
     """
-    params = [str(year), str(month).zfill(2)] + excluded_categories
-    return execute_scalar_query(conn, query, params)
+    conn.register('recurring_series_df', series)
+    conn.register('recurring_series_members_df', members)
+    try:
+        conn.execute("BEGIN TRANSACTION")
+        conn.execute("DELETE FROM recurring_series_members")
+        conn.execute("DELETE FROM recurring_series")
+        conn.execute("""
+        INSERT INTO recurring_series (id, merchant, periodicity, typical_amount, median_gap_days,
+                                      transaction_count, first_date, last_date)
+        SELECT id, merchant, periodicity, typical_amount, median_gap_days, transaction_count, first_date, last_date
+        FROM recurring_series_df
+        """)
+        conn.execute("""
+        INSERT INTO recurring_series_members (transaction_id, series_id)
+        SELECT transaction_id, series_id
+        FROM recurring_series_members_df
+        """)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.unregister('recurring_series_df')
+        conn.unregister('recurring_series_members_df')
 
-def check_recurring_transaction(conn, description, amount, transaction_date):
+def get_breakdown_by_id(conn, breakdown_id):
     query = """
-    SELECT COUNT(*) 
-    FROM consolidated_transactions
-    WHERE Description = ? 
-      AND ABS(Amount) = ABS(?)
-      AND "Transaction Date" != ?
+    SELECT id, description, breakdown, effective_date, terminal_date
+    FROM surplus_and_deficit_breakdowns
+    WHERE id = ?
     """
-    return execute_scalar_query(conn, query, [description, amount, transaction_date])
+    return query_and_return_df(conn, query, [breakdown_id])
 
 def get_active_breakdowns(conn, year, month):
     query = """
@@ -356,15 +1136,15 @@ def get_active_breakdowns(conn, year, month):
     WHERE effective_date <= make_date(?, ?, 1)
       AND (terminal_date IS NULL OR terminal_date >= make_date(?, ?, 1))
     """
-    return query_and_return_df(conn, query, [year, month, year, month])
+    return query_and_return_df(conn, query, [year, month, year, month], cache=True)
 
 def get_breakdown_items_by_date(conn, year, month):
-    query = """
+    query = f"""
     SELECT category, description
     FROM surplus_and_deficit_breakdown_items
-    WHERE EXTRACT(YEAR FROM date) = ? AND EXTRACT(MONTH FROM date) = ?
+    WHERE {month_range_predicate('date')}
     """
-    return pd.read_sql_query(query, conn, params=[year, month])
+    return query_and_return_df(conn, query, list(get_month_range(year, month)), cache=True)
 
 def get_breakdown_items(conn, year, month):
     query = """
@@ -391,17 +1171,16 @@ def get_breakdown_items(conn, year, month):
     )
     GROUP BY sdi.description, la.latest_amount
     """
-    return query_and_return_df(conn, query, [year, month, year, month, year, month])
+    return query_and_return_df(conn, query, [year, month, year, month, year, month], cache=True)
 
 def get_actual_spending(conn, year, month):
-    query = """
+    query = f"""
     SELECT Category, SUM(Amount) as actual_amount
     FROM consolidated_transactions
-    WHERE strftime('%Y', "Transaction Date") = ?
-      AND strftime('%m', "Transaction Date") = ?
+    WHERE {month_range_predicate()}
     GROUP BY Category
     """
-    return query_and_return_df(conn, query, [str(year), str(month).zfill(2)])
+    return query_and_return_df(conn, query, list(get_month_range(year, month)), cache=True)
 
 def get_goals_and_breakdown_items(conn, year, month):
     query = """
@@ -409,8 +1188,9 @@ def get_goals_and_breakdown_items(conn, year, month):
     FROM surplus_and_deficit_breakdown_items
     WHERE date = make_date(?, ?, 1)
     """
-    return query_and_return_df(conn, query, [year, month])
+    return query_and_return_df(conn, query, [year, month], cache=True)
 
+@writes_data
 def update_transaction_amount(conn, transaction_id, new_amount):
     query = """
     UPDATE consolidated_transactions
@@ -418,7 +1198,9 @@ def update_transaction_amount(conn, transaction_id, new_amount):
     WHERE id = ?
     """
     execute_query(conn, query, (new_amount, transaction_id))
+    refresh_monthly_category_totals(conn, get_monthly_cells_for_transactions(conn, [transaction_id]))
 
+@writes_data
 def update_transaction_memo(conn, transaction_id, new_memo):
     query = """
     UPDATE consolidated_transactions
@@ -427,19 +1209,152 @@ def update_transaction_memo(conn, transaction_id, new_memo):
     """
     execute_query(conn, query, (new_memo, transaction_id))
 
-def get_next_sequence_value(conn, sequence_name):
-    query = f"SELECT nextval('{sequence_name}')"
-    result = conn.execute(query).fetchone()
-    return result[0] if result else None
+def ensure_parent_id_column(conn):
+    """
+    Add consolidated_transactions.parent_id to databases created before it existed.
 
-def insert_amortized_transaction(conn, transaction_id, card, transaction_date, description, category, amount, memo):
+    parent_id links amortization installments to the transaction they were split from.
+    Installments created earlier only recorded the link in their memo, so it is
+    backfilled from there. Runs on read paths too, so the data generation is only
+    bumped when the column is added.
+    """
     query = """
-    INSERT INTO consolidated_transactions (id, card, "Transaction Date", Description, Category, Amount, Memo)
-    VALUES (?, ?, ?, ?, ?, ?, ?)
+    SELECT COUNT(*)
+    FROM information_schema.columns
+    WHERE table_name = 'consolidated_transactions'
+      AND column_name = 'parent_id'
+    """
+    if execute_query(conn, query).fetchone()[0]:
+        return
+    try:
+        execute_query(conn, "ALTER TABLE consolidated_transactions ADD COLUMN parent_id BIGINT")
+        execute_query(conn, """
+        UPDATE consolidated_transactions
+        SET parent_id = CAST(regexp_extract(Memo, 'Original transaction ID: (\\d+)', 1) AS BIGINT)
+        WHERE regexp_matches(Memo, 'amortized transaction\\. Original transaction ID: \\d+')
+        """)
+    finally:
+        bump_data_generation()
+
+@writes_data
+def amortize_transactions(conn, transaction_ids, months):
+    """
+    Spread transactions over monthly installments with one UPDATE and one INSERT.
+
+    Each original transaction becomes installment 1/months and the remaining
+    installments are generated for the following months, linked to it through
+    parent_id. Installments are rounded to cents and the original keeps the
+    rounding remainder, so the installments always add up to the original amount.
+    Does not commit, so it runs inside the caller's transaction.
+
+    Args:
+    conn (duckdb.DuckDBPyConnection): The database connection.
+    transaction_ids (list): Ids of the transactions to amortize.
+    months (int): The number of monthly installments, including the original.
+
+    Returns:
+    list: The ids of the inserted installments.
     """
-    execute_query(conn, query, (transaction_id, card, transaction_date, description, category, amount, memo))
-    return transaction_id
+    ensure_parent_id_column(conn)
+    transaction_ids = [int(transaction_id) for transaction_id in transaction_ids]
+    execute_query(conn, """
+    CREATE OR REPLACE TEMP TABLE amortization_plan AS
+    SELECT t.id, t."Card", t."Transaction Date", t.Description, t.Category, t.Amount, COALESCE(t.Memo, '') AS memo,
+           CAST(ROUND(t.Amount / ?, 2) AS DECIMAL(10, 2)) AS installment,
+           t.parent_id IS NOT NULL OR EXISTS (SELECT 1 FROM consolidated_transactions c WHERE c.parent_id = t.id) AS already_amortized
+    FROM consolidated_transactions t
+    WHERE t.id IN (SELECT UNNEST(CAST(? AS BIGINT[])))
+    """, [months, transaction_ids])
+    planned_ids, already_amortized = execute_query(conn, """
+    SELECT LIST(id), LIST(id) FILTER (WHERE already_amortized) FROM amortization_plan
+    """).fetchone()
+    missing_ids = sorted(set(transaction_ids) - set(planned_ids or []))
+    if missing_ids:
+        raise ValueError(f"No transactions found with ids {missing_ids}")
+    if already_amortized:
+        raise ValueError(f"Transactions {sorted(already_amortized)} are already amortized")
+
+    inserted_ids = [row[0] for row in execute_query(conn, """
+    INSERT INTO consolidated_transactions ("Card", "Transaction Date", Description, Category, Amount, Memo, parent_id)
+    SELECT p."Card", CAST(p."Transaction Date" + to_months(CAST(i AS INTEGER)) AS DATE), p.Description, p.Category,
+           p.installment, p.memo || ' ' || (i + 1) || '/' || ? || ' amortized transaction. Original transaction ID: ' || p.id,
+           p.id
+    FROM amortization_plan p, range(1, ?) r(i)
+    RETURNING id
+    """, [months, months]).fetchall()]
+    execute_query(conn, """
+    UPDATE consolidated_transactions t
+    SET Amount = p.Amount - p.installment * (? - 1),
+        Memo = p.memo || ' 1/' || ? || ' amortized transaction.'
+    FROM amortization_plan p
+    WHERE t.id = p.id
+    """, [months, months])
+    execute_query(conn, "DROP TABLE amortization_plan")
+
+    refresh_monthly_category_totals(conn, get_monthly_cells_for_transactions(conn, transaction_ids + inserted_ids))
+    return inserted_ids
 
+def get_amortization_installments(conn, transaction_id):
+    ensure_parent_id_column(conn)
+    query = """
+    SELECT id, "Transaction Date", Description, Amount, Category, Memo
+    FROM consolidated_transactions
+    WHERE id = ? OR parent_id = ?
+    ORDER BY "Transaction Date", id
+    """
+    return query_and_return_df(conn, query, [transaction_id, transaction_id])
+
+@writes_data
+def reverse_amortizations(conn, transaction_ids):
+    """
+    Fold the installments of amortized transactions back into the originals.
+
+    The original gets back the full amount and its memo from before the amortization,
+    and every installment linked to it through parent_id is deleted. Does not commit.
+
+    Args:
+    conn (duckdb.DuckDBPyConnection): The database connection.
+    transaction_ids (list): Ids of the original (parent) transactions.
+
+    Returns:
+    int: The number of installments deleted.
+    """
+    ensure_parent_id_column(conn)
+    transaction_ids = [int(transaction_id) for transaction_id in transaction_ids]
+    cells = query_and_return_df(conn, """
+    SELECT DISTINCT CAST(DATE_TRUNC('month', "Transaction Date") AS DATE) AS month, "Category" AS category
+    FROM consolidated_transactions
+    WHERE parent_id IN (SELECT UNNEST(CAST(? AS BIGINT[])))
+       OR id IN (SELECT UNNEST(CAST(? AS BIGINT[])))
+    """, [transaction_ids, transaction_ids])
+    execute_query(conn, """
+    UPDATE consolidated_transactions t
+    SET Amount = t.Amount + i.total,
+        Memo = regexp_replace(t.Memo, ' 1/\\d+ amortized transaction\\.$', '')
+    FROM (
+        SELECT parent_id, SUM(Amount) AS total
+        FROM consolidated_transactions
+        WHERE parent_id IN (SELECT UNNEST(CAST(? AS BIGINT[])))
+        GROUP BY parent_id
+    ) i
+    WHERE t.id = i.parent_id
+    """, [transaction_ids])
+    if table_exists(conn, 'flagged_transactions'):
+        execute_query(conn, """
+        DELETE FROM flagged_transactions
+        WHERE transaction_id IN (
+            SELECT id FROM consolidated_transactions WHERE parent_id IN (SELECT UNNEST(CAST(? AS BIGINT[])))
+        )
+        """, [transaction_ids])
+    deleted = execute_query(conn, """
+    DELETE FROM consolidated_transactions
+    WHERE parent_id IN (SELECT UNNEST(CAST(? AS BIGINT[])))
+    RETURNING id
+    """, [transaction_ids]).fetchall()
+    refresh_monthly_category_totals(conn, cells)
+    return len(deleted)
+
+@writes_data
 def flag_transaction(conn, transaction_id):
     query = """
     INSERT INTO flagged_transactions (transaction_id)
@@ -453,8 +1368,9 @@ def get_flagged_transactions(conn):
     FROM consolidated_transactions t
     JOIN flagged_transactions f on t.id = f.transaction_id
     """
-    return query_and_return_df(conn, query)
+    return query_and_return_df(conn, query, cache=True)
 
+@writes_data
 def unflag_transaction(conn, transaction_id):
     query = """
     DELETE FROM flagged_transactions
@@ -0,0 +1,84 @@
+import os
+import threading
+from contextlib import contextmanager
+import query_trace
+
+# Every entry point gets its DuckDB connection from here, so one process opens the
+# database file once and report code shares that handle through cursors. The settings
+# default to the environment and can be changed with configure() before the first use.
+DEFAULT_DB_PATH = 'budgeting-tool.db'
+
+settings = {
+    'db_path': os.environ.get('BUDGETING_TOOL_DB', DEFAULT_DB_PATH),
+    'threads': os.environ.get('BUDGETING_TOOL_DB_THREADS'),
+    'memory_limit': os.environ.get('BUDGETING_TOOL_DB_MEMORY_LIMIT'),
+}
+connection = None
+connection_lock = threading.Lock()
+
+def configure(db_path=None, threads=None, memory_limit=None):
+    """
+    Override the connection settings. Takes effect on the next get_connection after a
+    close_connection (or the first one).
+
+    Args:
+    db_path (str): The DuckDB database file.
+    threads (int): DuckDB worker threads; DuckDB's default (all cores) when unset.
+    memory_limit (str): DuckDB memory limit, e.g. '2GB'; DuckDB's default when unset.
+    """
+    for name, value in (('db_path', db_path), ('threads', threads), ('memory_limit', memory_limit)):
+        if value is not None:
+            settings[name] = value
+
+def get_db_path():
+    return settings['db_path']
+
+def get_connection():
+    """Return the process-wide connection, opening it on first use."""
+    global connection
+    with connection_lock:
+        if connection is None:
+            # Imported here so that entry points start without loading duckdb
+            import duckdb
+
+            config = {}
+            if settings['threads']:
+                config['threads'] = int(settings['threads'])
+            if settings['memory_limit']:
+                config['memory_limit'] = str(settings['memory_limit'])
+            connection = duckdb.connect(settings['db_path'], config=config)
+            if query_trace.tracing_enabled():
+                connection = query_trace.TracedConnection(connection)
+        return connection
+
+def get_cursor():
+    """
+    Return a new cursor on the shared connection.
+
+    A cursor has its own transaction state and can be used from another thread, and
+    closing it leaves the shared connection open.
+    """
+    return get_connection().cursor()
+
+@contextmanager
+def read_only_cursor():
+    """
+    Yield a cursor inside a read-only transaction.
+
+    Report queries see one consistent snapshot and can run alongside other work; any
+    write through the cursor fails instead of interfering with the session.
+    """
+    cursor = get_cursor()
+    cursor.execute("BEGIN TRANSACTION READ ONLY")
+    try:
+        yield cursor
+    finally:
+        cursor.execute("ROLLBACK")
+        cursor.close()
+
+def close_connection():
+    global connection
+    with connection_lock:
+        if connection is not None:
+            connection.close()
+            connection = None
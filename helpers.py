@@ -1,7 +1,13 @@
-import pandas as pd  # Add this line at the top of the file
+import hashlib
 from datetime import datetime, date
-from dateutil.relativedelta import relativedelta
-import pdb
+def get_file_hash(filename):
+    """Calculate the SHA-256 hash of a file."""
+    sha256_hash = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for byte_block in iter(lambda: f.read(4096), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
 def print_numbered_list(items, start=1):
     for i, item in enumerate(items, start):
         print(f"{i}. {item}")
@@ -27,6 +33,9 @@ def get_user_input(prompt, input_type=str, validation_func=None):
             print(f"Please enter a valid {input_type.__name__}.")
 
 def print_dataframe(df):
+    # pandas and dateutil are imported on first use so that interaction.py starts without them
+    import pandas as pd
+
     pd.set_option('display.max_rows', None)
     pd.set_option('display.max_columns', None)
     pd.set_option('display.width', None)
@@ -59,6 +68,8 @@ def print_ascii_title():
     print(ascii_art)
 
 def get_user_specified_date():
+    from dateutil.relativedelta import relativedelta
+
     today = date.today()
     last_month = today - relativedelta(months=1)
     
@@ -1,18 +1,37 @@
 import pandas as pd
 import sys
 import os
-from collections import defaultdict
+import argparse
+import importlib.util
+import time
+from collections import Counter, defaultdict
 import concurrent.futures
 import threading
 from datetime import datetime
 from db_operations import (
     get_category_mapping_from_db,
+    get_vendor_category_mappings,
     get_global_categories_from_db,
-    persist_data_in_db,
-    get_db_connection
+    persist_data_in_db_bulk,
+    park_unresolved_transactions,
+    get_parked_transactions,
+    delete_parked_transactions,
+    table_exists,
+    get_ingested_file,
+    record_ingested_file,
+    get_overlap_window_transactions,
+    refresh_description_index
 )
+from category_rules import compile_trie_regex, compile_vendor_matcher, match_vendor, match_vendors
+from db_session import get_connection, close_connection
+from helpers import get_file_hash
+from recurring import refresh_recurring_series
 
 input_lock = threading.Lock()
+review_queue_lock = threading.Lock()
+resolver_hits_lock = threading.Lock()
+resolver_hits = Counter()
+PENDING_REVIEW = "PENDING REVIEW"
 debugLevel = None
 
 def get_user_choice(prompt, options):
@@ -41,20 +60,144 @@ def get_input_files(bank_type):
             print("File not found. Please try again.")
     return files
 
+def filter_already_ingested(conn, input_files, force=False):
+    """
+    Hash every input file and drop the ones whose exact content was imported before.
+
+    Returns:
+    dict: input file path -> SHA-256 for the files that still need to be imported.
+    """
+    new_files = {}
+    for input_file in input_files:
+        file_hash = get_file_hash(input_file)
+        if file_hash in new_files.values():
+            print(f"Skipping {input_file}: same content as another file in this run")
+            continue
+        previous_import = None if force else get_ingested_file(conn, file_hash)
+        if previous_import:
+            file_name, row_count, imported_at = previous_import
+            print(f"Skipping {input_file}: already imported as {file_name} on {imported_at:%Y-%m-%d %H:%M} ({row_count} rows)")
+            continue
+        new_files[input_file] = file_hash
+    return new_files
+
+def record_ingested_files(conn, file_hashes, bank_type, row_counts):
+    for input_file, file_hash in file_hashes.items():
+        if input_file in row_counts:
+            record_ingested_file(conn, file_hash, os.path.basename(input_file), os.path.getsize(input_file),
+                                 bank_type, row_counts[input_file])
+
+def load_ingest_watermarks(conn, overlap_days):
+    """
+    Load the per-card high-water marks used to skip rows that were imported by an earlier run.
+
+    Returns:
+    dict: 'cutoffs' maps each card to its latest transaction date minus overlap_days,
+    'seen_keys' holds the (Card, Transaction Date, Description, Amount) keys inside that window.
+    """
+    window = get_overlap_window_transactions(conn, overlap_days)
+    cutoffs = window.groupby('Card')['watermark'].max() - pd.Timedelta(days=overlap_days)
+    seen_keys = set(zip(window['Card'], pd.to_datetime(window['Transaction Date']), window['Description'], window['Amount'].round(2)))
+    return {'cutoffs': pd.to_datetime(cutoffs).to_dict(), 'seen_keys': seen_keys}
+
+def drop_previously_ingested_rows(df, watermarks):
+    """
+    Drop rows older than their card's cutoff, and rows inside the overlap window that are already in the database.
+
+    Runs before categorization so re-downloaded statements never trigger prompts.
+    """
+    if watermarks is None or df.empty:
+        return df
+    dates = pd.to_datetime(df['Transaction Date'], format='%m/%d/%Y')
+    cutoffs = pd.to_datetime(df['Card'].map(watermarks['cutoffs']))
+    in_window = cutoffs.notna() & (dates >= cutoffs)
+    window_keys = zip(df.loc[in_window, 'Card'], dates[in_window], df.loc[in_window, 'Description'], df.loc[in_window, 'Amount'].round(2))
+
+    is_seen = cutoffs.notna() & (dates < cutoffs)
+    is_seen[in_window] = pd.Series([key in watermarks['seen_keys'] for key in window_keys], index=df.index[in_window], dtype=bool)
+    if is_seen.any():
+        print(f"Skipped {int(is_seen.sum())} previously imported rows for {', '.join(df.loc[is_seen, 'Card'].unique())}")
+    return df[~is_seen]
+
 def currency_to_float(x):
     if pd.isna(x):
         return 0.0
     return float(str(x).replace('$', '').replace(',', ''))
 
+def currency_column_to_float(column):
+    # Column-wise equivalent of currency_to_float
+    cleaned = column.astype(str).str.replace(r'[$,]', '', regex=True)
+    return pd.to_numeric(cleaned, errors='coerce').fillna(0.0)
+
+def get_csv_engine(use_pyarrow):
+    if not use_pyarrow:
+        return None
+    if importlib.util.find_spec('pyarrow') is None:
+        print("pyarrow is not installed, falling back to the default CSV engine.")
+        return None
+    return 'pyarrow'
+
+def compile_category_map(category_map, vendor_mapping=None):
+    """
+    Compile the keyword -> category map into a single matcher.
+
+    Lookups run in two tiers: the vendor_mapping (vendor_category_mapping rows)
+    first, then the keywords. Both tiers are substring matches through the shared
+    category_rules matchers, so they agree with replay-rules.py.
+
+    Keywords are case-folded and merged into a trie-shaped regex so that every
+    description is scanned once, regardless of how many keywords exist.
+    When several keywords occur in one description the leftmost occurrence
+    wins, and among keywords starting at the same position the longest wins
+    (e.g. "AMAZON" and "AMZN", or the "CIAO GLORIA" spacing variants), so the
+    result no longer depends on dict order. Keywords that only differ by case
+    map to the category of the alphabetically first spelling. Vendors follow the
+    same rules, ignoring case and whitespace.
+
+    Returns:
+    tuple: (compiled keyword regex, dict of lowercased keyword -> category,
+    vendor matcher from category_rules.compile_vendor_matcher)
+    """
+    keyword_categories = {}
+    for keyword in sorted(category_map):
+        keyword_categories.setdefault(keyword.lower(), category_map[keyword])
+
+    return compile_trie_regex(list(keyword_categories)), keyword_categories, compile_vendor_matcher(vendor_mapping)
+
+def apply_category_mapping(description, category_map):
+    if not isinstance(description, str):
+        return None
+    pattern, keyword_categories, vendor_matcher = category_map
+    vendor_match = match_vendor(description, vendor_matcher)
+    if vendor_match:
+        return vendor_match[1]
+    match = pattern.search(description.lower())
+    return keyword_categories[match.group(0)] if match else None
+
+def count_resolver_hits(counts):
+    with resolver_hits_lock:
+        resolver_hits.update(counts)
+
+def print_resolver_hits():
+    total = resolver_hits['lookups']
+    if not total:
+        return
+    exact = resolver_hits['vendor'] + resolver_hits['session']
+    print(f"Category lookups: {total} rows")
+    for label, hits in [("vendor mappings and this run's choices", exact),
+                        ("keyword patterns", resolver_hits['pattern']),
+                        ("no match", total - exact - resolver_hits['pattern'])]:
+        print(f"  {label}: {hits} ({hits / total:.1%})")
+
 # this function prompts user for choice of category
 def get_category(description, category_map, unique_categories, user_choices):
-    for key, value in category_map.items():
-        if key.lower() in description.lower():
-            return value, False  # False indicates no user intervention
-    
     if description in user_choices:
         return user_choices[description], False  # False because this was a previous choice
 
+    mapped_category = apply_category_mapping(description, category_map)
+    if mapped_category:
+        return mapped_category, False  # False indicates no user intervention
+
     with input_lock:
         print(f"\nTransaction: {description}")
         print("Choose a category or enter a new one:")
@@ -85,105 +228,271 @@ def get_category(description, category_map, unique_categories, user_choices):
             except ValueError:
                 print("Invalid input. Please enter a number.")
 
-def apply_category_mapping(description, category_map):
-    for key, value in category_map.items():
-        if key.lower() in description.lower():
-            return value
-    return None
+def map_categories(descriptions, category_map):
+    """
+    Return the mapped category for every description, NaN where neither tier matches.
+
+    Only the rows the vendor tier misses are scanned by the keyword matcher.
+    """
+    pattern, keyword_categories, vendor_matcher = category_map
+    vendors = vendor_matcher[1]
+    categories = match_vendors(descriptions, vendor_matcher).map(lambda vendor: vendors[vendor][1], na_action='ignore').astype(object)
+    is_vendor = categories.notna()
+    matched_keywords = descriptions[~is_vendor].str.lower().str.extract(f'({pattern.pattern})', expand=False)
+    categories[~is_vendor] = matched_keywords.map(keyword_categories)
+    count_resolver_hits({'lookups': len(descriptions), 'vendor': int(is_vendor.sum()),
+                         'pattern': int(categories.notna().sum() - is_vendor.sum())})
+    return categories
+
+def queue_for_review(review_queue, description, row_count):
+    with review_queue_lock:
+        review_queue[description] = review_queue.get(description, 0) + row_count
+
+def resolve_unmapped_categories(descriptions, category_map, global_categories, user_choices, review_queue=None):
+    """
+    Prompt once per distinct unmapped description and spread the answer to every row.
+
+    When a review_queue is given, descriptions without a previous user choice are
+    not prompted for. They are added to the shared queue instead and their rows get
+    the PENDING_REVIEW category until resolve_review_queue runs.
+
+    Returns:
+    pd.DataFrame: 'Category' and 'user_intervened' columns aligned with descriptions.
+    Only the first row of a description the user was prompted for counts as user intervention.
+    """
+    row_counts = descriptions.value_counts()
+    choices = {}
+    session_hits = sum(int(row_counts[description]) for description in row_counts.index if description in user_choices)
+    count_resolver_hits({'session': session_hits})
+    for description in descriptions.drop_duplicates():
+        if review_queue is not None and description not in user_choices:
+            queue_for_review(review_queue, description, int(row_counts[description]))
+            choices[description] = (PENDING_REVIEW, False)
+        else:
+            choices[description] = get_category(description, category_map, global_categories, user_choices)
+
+    categories = {description: choice[0] for description, choice in choices.items()}
+    prompted = {description: choice[1] for description, choice in choices.items()}
+    return pd.DataFrame({
+        'Category': descriptions.map(categories),
+        'user_intervened': descriptions.map(prompted).astype(bool) & ~descriptions.duplicated(),
+    }, index=descriptions.index)
+
+def categorize_chase_frame(df, card, global_categories, user_choices, category_map, review_queue=None, watermarks=None):
+    df = df[df['Description'] != "AUTOMATIC PAYMENT - THANK"].copy()
+    df['Card'] = card
+    df = drop_previously_ingested_rows(df, watermarks).copy()
+    df['Memo'] = df.get('Memo', '').fillna('').astype(object)
+    df['Category'] = df['Category'].astype(object)
+
+    mapped_categories = map_categories(df['Description'], category_map)
+    is_mapped = mapped_categories.notna()
+    df.loc[is_mapped, 'Memo'] += ' Category updated via script from ' + df.loc[is_mapped, 'Category'].map(str)
+    df.loc[is_mapped, 'Category'] = mapped_categories[is_mapped]
+
+    needs_category = ~is_mapped & (df['Category'].isna() | df['Category'].isin(["Bills & Utilities", "Professional Services", "Personal", ""]))
+    resolved = resolve_unmapped_categories(df.loc[needs_category, 'Description'], category_map, global_categories, user_choices, review_queue)
+
+    #instead of dropping EXCLUDE rows, we'll just set the category to None
+    excluded = resolved[resolved['Category'] == "EXCLUDE"]
+    df.loc[excluded.index, 'Category'] = None
+
+    pending = resolved[resolved['Category'] == PENDING_REVIEW]
+    df.loc[pending.index, 'Category'] = PENDING_REVIEW
+
+    kept = resolved[~resolved['Category'].isin(["EXCLUDE", PENDING_REVIEW])]
+    replaced_memo = ' Category replaced by user via script from ' + df.loc[kept.index, 'Category'].map(str)
+    df.loc[kept.index, 'Memo'] += replaced_memo.where(kept['user_intervened'], ' Category assigned automatically via script')
+    df.loc[kept.index, 'Category'] = kept['Category']
+
+    return df[['Card', 'Transaction Date', 'Description', 'Category', 'Type', 'Amount', 'Memo']]
 
-def process_chase_csv(input_file, global_categories, user_choices, category_map):
+def get_chase_card(input_file):
+    return os.path.basename(input_file).split('_')[0]
+
+def process_chase_csv(input_file, global_categories, user_choices, category_map, review_queue=None, csv_engine=None, watermarks=None):
     try:
-        df = pd.read_csv(input_file)
+        df = pd.read_csv(input_file, engine=csv_engine)
     except Exception as e:
         print(f"Error reading file '{input_file}': {e}")
         return None
 
-    df = df[df['Description'] != "AUTOMATIC PAYMENT - THANK"]
-    df['Card'] = os.path.basename(input_file).split('_')[0]
-    df['Memo'] = df.get('Memo', '').fillna('')
-
-    rows_to_drop = []
+    return categorize_chase_frame(df, get_chase_card(input_file), global_categories, user_choices, category_map, review_queue, watermarks)
 
-    for index, row in df.iterrows():
-        mapped_category = apply_category_mapping(row['Description'], category_map)
-        
-        if mapped_category:
-            old_category = df.at[index, 'Category']
-            df.at[index, 'Category'] = mapped_category
-            df.at[index, 'Memo'] += f' Category updated via script from {old_category}'
-        elif pd.isna(row['Category']) or row['Category'] in ["Bills & Utilities", "Professional Services", "Personal", ""]:
-            category, user_intervened = get_category(row['Description'], category_map, global_categories, user_choices)
-            if category == "EXCLUDE":
-                #rows_to_drop.append(index)
-                #instead of dropping the row, we'll just set the category to None
-                df.at[index, 'Category'] = None
-            else:
-                old_category = df.at[index, 'Category']
-                df.at[index, 'Category'] = category
-                if user_intervened:
-                    df.at[index, 'Memo'] += ' Category replaced by user via script from {old_category}'
-                else:
-                    df.at[index, 'Memo'] += ' Category assigned automatically via script'
+def iter_chase_csv(input_file, global_categories, user_choices, category_map, review_queue=None, chunk_size=None, watermarks=None):
+    card = get_chase_card(input_file)
+    for chunk in pd.read_csv(input_file, chunksize=chunk_size):
+        yield categorize_chase_frame(chunk, card, global_categories, user_choices, category_map, review_queue, watermarks)
 
-    df = df.drop(rows_to_drop)
-    return df[['Card', 'Transaction Date', 'Description', 'Category', 'Type', 'Amount', 'Memo']]
+SCHWAB_COLUMNS = ['Date', 'Description', 'Type', 'Withdrawal', 'Deposit']
 
-def process_schwab_csv(input_file, global_categories, user_choices, category_map):
-    usecols = ['Date', 'Description', 'Type', 'Withdrawal', 'Deposit']
-    df = pd.read_csv(input_file, usecols=usecols)
+def categorize_schwab_frame(df, global_categories, user_choices, category_map, review_queue=None, watermarks=None):
     # filtering out Chase Credit card payments
     df = df[~df['Description'].str.contains('CHASE CREDIT', case=False, na=False)]
-    df = df[df['Type'] != 'TRANSFER']
+    df = df[df['Type'] != 'TRANSFER'].copy()
 
-    df['Withdrawal'] = df['Withdrawal'].apply(currency_to_float)
-    df['Deposit'] = df['Deposit'].apply(currency_to_float)
+    df['Withdrawal'] = currency_column_to_float(df['Withdrawal'])
+    df['Deposit'] = currency_column_to_float(df['Deposit'])
 
-    df['Category'] = ''
     df['Amount'] = df['Deposit'] - df['Withdrawal']
-    df['Memo'] = ''
     df['Transaction Date'] = df['Date']
+    df['Card'] = 'Schwab'
+    df = drop_previously_ingested_rows(df, watermarks).copy()
 
-    rows_to_drop = []
+    df['Category'] = map_categories(df['Description'], category_map).astype(object)
+    df['Memo'] = ' Category assigned automatically via script'
 
-    for index, row in df.iterrows():
-        mapped_category = apply_category_mapping(row['Description'], category_map)
-        
-        if mapped_category:
-            df.at[index, 'Category'] = mapped_category
-            df.at[index, 'Memo'] += ' Category assigned automatically via script'
-        else:
-            category, user_intervened = get_category(row['Description'], category_map, global_categories, user_choices)
-            if category == "EXCLUDE":
-                #rows_to_drop.append(index)
-                #instead of dropping the row, we'll just set the category to None
-                df.at[index, 'Category'] = None
-            else:
-                df.at[index, 'Category'] = category
-                if user_intervened:
-                    df.at[index, 'Memo'] += ' Category assigned by user via script'
-                else:
-                    df.at[index, 'Memo'] += ' Category assigned automatically via script'
+    is_unmapped = df['Category'].isna()
+    resolved = resolve_unmapped_categories(df.loc[is_unmapped, 'Description'], category_map, global_categories, user_choices, review_queue)
 
-    df = df.drop(rows_to_drop)
-    df['Card'] = 'Schwab'
+    #instead of dropping EXCLUDE rows, we'll just set the category to None
+    is_excluded = resolved['Category'] == "EXCLUDE"
+    df.loc[resolved.index, 'Category'] = resolved['Category'].where(~is_excluded, None)
+    df.loc[resolved.index[is_excluded | (resolved['Category'] == PENDING_REVIEW)], 'Memo'] = ''
+    df.loc[resolved.index[resolved['user_intervened'] & ~is_excluded], 'Memo'] = ' Category assigned by user via script'
 
     return df[['Card', 'Transaction Date', 'Description', 'Category', 'Type', 'Amount', 'Memo']]
 
-def process_files_parallel(input_files, process_func, global_categories, user_choices, category_map):
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        processed_dfs = list(executor.map(lambda f: process_func(f, global_categories, user_choices, category_map), input_files))
-    
-    processed_dfs = [df for df in processed_dfs if df is not None and not df.empty]
+def process_schwab_csv(input_file, global_categories, user_choices, category_map, review_queue=None, csv_engine=None, watermarks=None):
+    df = pd.read_csv(input_file, usecols=SCHWAB_COLUMNS, engine=csv_engine)
+    return categorize_schwab_frame(df, global_categories, user_choices, category_map, review_queue, watermarks)
+
+def iter_schwab_csv(input_file, global_categories, user_choices, category_map, review_queue=None, chunk_size=None, watermarks=None):
+    for chunk in pd.read_csv(input_file, usecols=SCHWAB_COLUMNS, chunksize=chunk_size):
+        yield categorize_schwab_frame(chunk, global_categories, user_choices, category_map, review_queue, watermarks)
+
+def process_file_timed(process_func, input_file, global_categories, user_choices, category_map, review_queue, csv_engine, watermarks=None):
+    start = time.perf_counter()
+    df = process_func(input_file, global_categories, user_choices, category_map, review_queue, csv_engine=csv_engine, watermarks=watermarks)
+    return df, time.perf_counter() - start
+
+def process_file_in_worker(process_func, input_file, category_map, csv_engine, watermarks=None):
+    """
+    Parse and auto-categorize one file inside a worker process.
+
+    Workers cannot prompt or share user_choices with the parent, so every unmapped
+    description goes into a worker-local review queue that is returned to the parent
+    together with the processed frame and the elapsed time.
+    """
+    review_queue = {}
+    resolver_hits.clear()
+    df, elapsed = process_file_timed(process_func, input_file, [], {}, category_map, review_queue, csv_engine, watermarks)
+    return df, review_queue, elapsed, dict(resolver_hits)
+
+def process_files_parallel(input_files, process_func, global_categories, user_choices, category_map, review_queue=None,
+                           workers=None, use_processes=False, csv_engine=None, row_counts=None, watermarks=None):
+    if use_processes:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(process_file_in_worker, [process_func] * len(input_files), input_files,
+                                        [category_map] * len(input_files), [csv_engine] * len(input_files),
+                                        [watermarks] * len(input_files)))
+        for _, worker_queue, _, worker_hits in results:
+            for description, row_count in worker_queue.items():
+                queue_for_review(review_queue, description, row_count)
+            count_resolver_hits(worker_hits)
+        results = [(df, elapsed) for df, _, elapsed, _ in results]
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda f: process_file_timed(process_func, f, global_categories, user_choices, category_map,
+                                                                     review_queue, csv_engine, watermarks), input_files))
+
+    for input_file, (df, elapsed) in zip(input_files, results):
+        row_count = 0 if df is None else len(df)
+        print(f"Processed {os.path.basename(input_file)}: {row_count} rows in {elapsed:.2f}s")
+        if row_counts is not None and df is not None:
+            row_counts[input_file] = row_count
+
+    processed_dfs = [df for df, _ in results if df is not None and not df.empty]
     return pd.concat(processed_dfs, ignore_index=True) if processed_dfs else None
 
+def stream_files_into_db(conn, input_files, iter_func, table_name, global_categories, user_choices, category_map,
+                         chunk_size, park_unresolved=False, row_counts=None, watermarks=None):
+    """
+    Read, categorize and persist each file chunk by chunk so peak memory stays bounded by chunk_size.
+
+    Unknown descriptions are prompted for as chunks arrive, or parked in
+    pending_review_transactions when park_unresolved is set.
+    """
+    review_queue = {} if park_unresolved else None
+    for input_file in input_files:
+        start = time.perf_counter()
+        processed_count = inserted_count = duplicate_count = parked_count = 0
+        for chunk_df in iter_func(input_file, global_categories, user_choices, category_map, review_queue, chunk_size=chunk_size,
+                                  watermarks=watermarks):
+            processed_count += len(chunk_df)
+            if park_unresolved:
+                is_pending = chunk_df['Category'] == PENDING_REVIEW
+                if is_pending.any():
+                    park_unresolved_transactions(conn, chunk_df[is_pending], verbose=False)
+                    parked_count += int(is_pending.sum())
+                chunk_df = chunk_df[~is_pending]
+            if not chunk_df.empty:
+                status_counts = persist_data_in_db_bulk(conn, chunk_df, table_name, verbose=False)['status'].value_counts()
+                inserted_count += int(status_counts.get('inserted', 0))
+                duplicate_count += int(status_counts.get('duplicate', 0))
+            print(f"{os.path.basename(input_file)}: {processed_count} rows processed, {inserted_count} inserted, "
+                  f"{duplicate_count} duplicates, {parked_count} parked ({time.perf_counter() - start:.1f}s)")
+        if row_counts is not None:
+            row_counts[input_file] = processed_count
+
+def resolve_review_queue(review_queue, category_map, global_categories, user_choices):
+    """Prompt for every queued description once, most frequent first."""
+    if not review_queue:
+        return
+    print(f"\n{len(review_queue)} unknown descriptions across {sum(review_queue.values())} transactions need a category.")
+    for description, row_count in sorted(review_queue.items(), key=lambda item: (-item[1], item[0])):
+        print(f"\n({row_count} transactions)")
+        get_category(description, category_map, global_categories, user_choices)
+    review_queue.clear()
+
+def apply_review_choices(df, user_choices):
+    """Replace PENDING_REVIEW categories with the choices made in the batch review pass."""
+    is_pending = df['Category'] == PENDING_REVIEW
+    chosen = df.loc[is_pending, 'Description'].map(user_choices)
+    is_excluded = chosen == "EXCLUDE"
+    df.loc[chosen.index, 'Category'] = chosen.where(~is_excluded, None)
+    df.loc[chosen.index[~is_excluded], 'Memo'] += ' Category assigned by user via review queue'
+    return df
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import Chase and Charles Schwab CSV exports into the budgeting database.")
+    parser.add_argument('--defer-review', action='store_true',
+                        help="Process all files without prompting, then review unknown descriptions once in a single batch.")
+    parked_rows = parser.add_mutually_exclusive_group()
+    parked_rows.add_argument('--park-unresolved', action='store_true',
+                             help="Never prompt: persist categorized rows and park unknown ones in pending_review_transactions.")
+    parked_rows.add_argument('--review-parked', action='store_true',
+                             help="Load previously parked rows into this run's review queue.")
+    parser.add_argument('--process-pool', action='store_true',
+                        help="Parse files in worker processes with the pyarrow CSV engine. Unknown descriptions are reviewed in one batch afterwards.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Number of worker threads or processes (defaults to the executor's own choice).")
+    parser.add_argument('--stream', action='store_true',
+                        help="Read, categorize and insert each file in fixed-size chunks to keep memory bounded.")
+    parser.add_argument('--chunk-size', type=int, default=50000,
+                        help="Rows per chunk in --stream mode (default: 50000).")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-import files even if the ingested_files manifest says they were imported before.")
+    parser.add_argument('--overlap-days', type=int, default=30,
+                        help="Re-check rows this many days before each card's latest imported transaction (default: 30).")
+    parser.add_argument('--no-watermark', action='store_true',
+                        help="Process every row regardless of each card's latest imported date, e.g. to backfill older statements.")
+    args = parser.parse_args()
+    if args.stream and (args.defer_review or args.review_parked or args.process_pool):
+        parser.error("--stream can only be combined with --park-unresolved and --chunk-size")
+    return args
+
 def main():
-    db_path = "budgeting-tool.db"
-    conn = get_db_connection(db_path)
-    category_map = get_category_mapping_from_db(conn)
+    args = parse_args()
+    conn = get_connection()
+    vendor_mapping = get_vendor_category_mappings(conn) if table_exists(conn, 'vendor_category_mapping') else {}
+    category_map = compile_category_map(get_category_mapping_from_db(conn), vendor_mapping)
     global_categories = get_global_categories_from_db(conn)
     table_name = 'consolidated_transactions'
 
     user_choices = {}
+    review_queue = {} if args.defer_review or args.park_unresolved or args.review_parked or args.process_pool else None
+    csv_engine = get_csv_engine(args.process_pool)
     chase_files = []
     schwab_files = []
 
@@ -196,24 +505,88 @@ def main():
         elif bank_choice == "Charles Schwab":
             schwab_files.extend(get_input_files("Charles Schwab"))
 
-    combined_df = pd.DataFrame()
+    use_manifest = table_exists(conn, 'ingested_files')
+    if use_manifest:
+        chase_hashes = filter_already_ingested(conn, chase_files, args.force)
+        schwab_hashes = filter_already_ingested(conn, schwab_files, args.force)
+        chase_files, schwab_files = list(chase_hashes), list(schwab_hashes)
+    else:
+        print("Note: ingested_files table not found (create-schema option 8), every file will be parsed.")
+    chase_row_counts = {}
+    schwab_row_counts = {}
+    watermarks = None if args.no_watermark else load_ingest_watermarks(conn, args.overlap_days)
+
+    if args.stream:
+        stream_files_into_db(conn, chase_files, iter_chase_csv, table_name, global_categories, user_choices, category_map,
+                             args.chunk_size, args.park_unresolved, chase_row_counts, watermarks)
+        stream_files_into_db(conn, schwab_files, iter_schwab_csv, table_name, global_categories, user_choices, category_map,
+                             args.chunk_size, args.park_unresolved, schwab_row_counts, watermarks)
+        if use_manifest:
+            record_ingested_files(conn, chase_hashes, 'Chase', chase_row_counts)
+            record_ingested_files(conn, schwab_hashes, 'Charles Schwab', schwab_row_counts)
+        if table_exists(conn, 'recurring_series'):
+            refresh_recurring_series(conn)
+        if table_exists(conn, 'description_index'):
+            refresh_description_index(conn)
+        print_resolver_hits()
+        close_connection()
+        return
+
+    processed_dfs = []
 
     if chase_files:
-        chase_df = process_files_parallel(chase_files, process_chase_csv, global_categories, user_choices, category_map)
-        if chase_df is not None:
-            combined_df = pd.concat([combined_df, chase_df], ignore_index=True)
+        processed_dfs.append(process_files_parallel(chase_files, process_chase_csv, global_categories, user_choices, category_map,
+                                                    review_queue, args.workers, args.process_pool, csv_engine, chase_row_counts,
+                                                    watermarks))
 
     if schwab_files:
-        schwab_df = process_files_parallel(schwab_files, process_schwab_csv, global_categories, user_choices, category_map)
-        if schwab_df is not None:
-            combined_df = pd.concat([combined_df, schwab_df], ignore_index=True)
+        processed_dfs.append(process_files_parallel(schwab_files, process_schwab_csv, global_categories, user_choices, category_map,
+                                                    review_queue, args.workers, args.process_pool, csv_engine, schwab_row_counts,
+                                                    watermarks))
+
+    if args.review_parked:
+        parked_df = get_parked_transactions(conn)
+        parked_df['Category'] = PENDING_REVIEW
+        for description, row_count in parked_df['Description'].value_counts().items():
+            queue_for_review(review_queue, description, int(row_count))
+        processed_dfs.append(parked_df)
+
+    processed_dfs = [df for df in processed_dfs if df is not None and not df.empty]
+    combined_df = pd.concat(processed_dfs, ignore_index=True) if processed_dfs else pd.DataFrame()
+
+    if review_queue and args.park_unresolved:
+        is_pending = combined_df['Category'] == PENDING_REVIEW
+        park_unresolved_transactions(conn, combined_df[is_pending])
+        combined_df = combined_df[~is_pending]
+    elif review_queue:
+        resolve_review_queue(review_queue, category_map, global_categories, user_choices)
+        combined_df = apply_review_choices(combined_df, user_choices)
 
     if not combined_df.empty:
-        persist_data_in_db(conn, combined_df, table_name)
-    else:
+        report = persist_data_in_db_bulk(conn, combined_df, table_name)
+        duplicates = report[report['status'] == 'duplicate']
+        if not duplicates.empty:
+            print("Duplicate entries rejected per card:")
+            print(duplicates.groupby('Card').size().to_string())
+    elif chase_files or schwab_files or not use_manifest:
         print("Error: No data to save. Please check your input files and try again.")
+    else:
+        print("Nothing to import: every file was already imported.")
+
+    if use_manifest:
+        record_ingested_files(conn, chase_hashes, 'Chase', chase_row_counts)
+        record_ingested_files(conn, schwab_hashes, 'Charles Schwab', schwab_row_counts)
+
+    if args.review_parked:
+        delete_parked_transactions(conn)
+
+    if not combined_df.empty and table_exists(conn, 'recurring_series'):
+        refresh_recurring_series(conn)
+    if not combined_df.empty and table_exists(conn, 'description_index'):
+        refresh_description_index(conn)
 
-    conn.close()
+    print_resolver_hits()
+    close_connection()
 
 if __name__ == "__main__":
     main()
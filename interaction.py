@@ -1,19 +1,41 @@
-import duckdb
+import argparse
 import os
+import functools
 import importlib.util
+import threading
 from datetime import datetime
 from helpers import print_ascii_title, get_user_specified_date, print_divider, print_numbered_list, get_user_choice
-from transactions import (dig_into_category, show_p95_expensive_nonrecurring,
-                          review_extraordinary_spendings, set_budget,
-                          add_adjustment_transaction, set_goals,
-                          show_flagged_transactions)  # Add this import
+from db_session import get_connection, close_connection
+from sql_templates import validate_templates
+import query_trace
 
-def run_visualize_script(year, month):
+# duckdb, pandas, matplotlib and transactions are imported on first use so the title and
+# date prompt appear immediately; preload_modules warms them up while the user types.
+PRELOADED_MODULES = ['duckdb', 'transactions']
+
+def preload_modules():
+    for module_name in PRELOADED_MODULES:
+        importlib.import_module(module_name)
+
+@functools.lru_cache(maxsize=None)
+def load_visualize_module():
     script_path = os.path.join(os.path.dirname(__file__), 'visualize-results.py')
     spec = importlib.util.spec_from_file_location("visualize_module", script_path)
     visualize_module = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(visualize_module)
-    visualize_module.main(year, month)
+    return visualize_module
+
+def run_visualize_script(year, month):
+    load_visualize_module().main(year, month)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Interactive budgeting tool.")
+    parser.add_argument('--trace-queries', action='store_true',
+                        help="Time every database query per menu action and report the slowest on exit "
+                             "(also enabled by BUDGETING_TOOL_TRACE_QUERIES=1).")
+    parser.add_argument('--trace-top', type=int, default=query_trace.TOP_QUERIES,
+                        help=f"Number of slowest queries to report (default: {query_trace.TOP_QUERIES}).")
+    return parser.parse_args()
 
 def main_menu(conn, year, month):
     menu_options = [
@@ -25,6 +47,7 @@ def main_menu(conn, year, month):
         "Set budget",
         "Add an adjustment transaction",
         "Set goals (Surplus/Deficit Breakdown)",
+        "Search transactions by vendor",
         "Change analysis period",
         "Exit"
     ]
@@ -36,40 +59,60 @@ def main_menu(conn, year, month):
         print("=" * 50)  # Add a bottom border
         
         choice = get_user_choice("Enter your choice: ", range(1, len(menu_options) + 1))
+        from transactions import (dig_into_category, show_p95_expensive_nonrecurring,
+                                  review_extraordinary_spendings, set_budget,
+                                  add_adjustment_transaction, set_goals,
+                                  show_flagged_transactions, search_vendor_transactions)
         
-        if choice == 1:
-            run_visualize_script(year, month)
-        elif choice == 2:
-            show_flagged_transactions(conn)  # New function call
-        elif choice == 3:
-            dig_into_category(conn, year, month)
-        elif choice == 4:
-            show_p95_expensive_nonrecurring(conn, year, month)
-        elif choice == 5:
-            review_extraordinary_spendings(conn, year, month)
-        elif choice == 6:
-            set_budget(conn)
-        elif choice == 7:
-            add_adjustment_transaction(conn, year, month)
-        elif choice == 8:
-            set_goals(conn)
-        elif choice == 9:
-            return True  # Signal to change the analysis period
-        elif choice == 10:
-            return False  # Signal to exit the program
+        with query_trace.trace_action(menu_options[choice - 1]):
+            if choice == 1:
+                run_visualize_script(year, month)
+            elif choice == 2:
+                show_flagged_transactions(conn)  # New function call
+            elif choice == 3:
+                dig_into_category(conn, year, month)
+            elif choice == 4:
+                show_p95_expensive_nonrecurring(conn, year, month)
+            elif choice == 5:
+                review_extraordinary_spendings(conn, year, month)
+            elif choice == 6:
+                set_budget(conn)
+            elif choice == 7:
+                add_adjustment_transaction(conn, year, month)
+            elif choice == 8:
+                set_goals(conn)
+            elif choice == 9:
+                search_vendor_transactions(conn)
+            elif choice == 10:
+                return True  # Signal to change the analysis period
+            elif choice == 11:
+                return False  # Signal to exit the program
 
 def main():
+    args = parse_args()
+    if args.trace_queries or query_trace.tracing_enabled():
+        query_trace.enable_tracing(args.trace_top)
     print_ascii_title()
-    db_name = 'budgeting-tool.db'
-    conn = duckdb.connect(db_name)
+    threading.Thread(target=preload_modules, daemon=True).start()
 
+    year, month = get_user_specified_date()
+    # Once per session, after the first prompt so db_operations keeps loading in the background.
+    # The session is the only writer while it runs, so repeated report queries can be cached
+    from db_operations import enable_query_cache, get_query_cache_stats
+    enable_query_cache()
+    validate_templates()
     while True:
-        year, month = get_user_specified_date()
+        conn = get_connection()
         change_period = main_menu(conn, year, month)
         if not change_period:
             break
+        year, month = get_user_specified_date()
 
-    conn.close()
+    close_connection()
+    stats = get_query_cache_stats()
+    print(f"Query cache: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions")
+    if query_trace.tracing_enabled():
+        query_trace.report_trace()
     print("Thank you for using the budgeting tool. Goodbye!")
 
 if __name__ == "__main__":
@@ -0,0 +1,68 @@
+import hashlib
+import os
+import shutil
+
+PLOT_CACHE_DIR = '.plot_cache'
+PLOT_CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+def get_plot_cache_key(df, style_version):
+    """
+    Hash the data a plot is drawn from together with the version of its drawing code.
+
+    Args:
+    df (pd.DataFrame): The plotted data; column order, row order and values all count.
+    style_version (int): Bumped whenever the plotting code changes its output.
+
+    Returns:
+    str: A SHA-256 hex digest used as the cache file name.
+    """
+    sha256_hash = hashlib.sha256(f"style={style_version}\n".encode())
+    sha256_hash.update(df.to_csv(index=False).encode())
+    return sha256_hash.hexdigest()
+
+def get_cached_plot(key, cache_dir=PLOT_CACHE_DIR):
+    """Return the path of the cached plot for key, marking it as recently used, or None."""
+    path = os.path.join(cache_dir, f"{key}.png")
+    if not os.path.exists(path):
+        return None
+    os.utime(path)
+    return path
+
+def store_plot(key, plot_file, cache_dir=PLOT_CACHE_DIR, max_bytes=PLOT_CACHE_MAX_BYTES):
+    """
+    Move a rendered plot into the cache and evict the least recently used plots over max_bytes.
+
+    Returns:
+    str: The path of the cached plot.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{key}.png")
+    os.replace(plot_file, path)
+    evict_plots(cache_dir, max_bytes, keep=path)
+    return path
+
+def evict_plots(cache_dir=PLOT_CACHE_DIR, max_bytes=PLOT_CACHE_MAX_BYTES, keep=None):
+    """Delete cached plots, least recently used first, until the cache fits in max_bytes."""
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name.endswith('.png'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total_bytes = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+        if path == keep:
+            continue
+        os.remove(path)
+        total_bytes -= size
+
+def publish_plot(cached_plot, output_file):
+    """Copy a cached plot to output_file unless output_file already holds the same image."""
+    if os.path.exists(output_file) and os.path.getsize(output_file) == os.path.getsize(cached_plot):
+        with open(output_file, 'rb') as existing, open(cached_plot, 'rb') as cached:
+            if existing.read() == cached.read():
+                return False
+    shutil.copyfile(cached_plot, output_file)
+    return True
@@ -3,6 +3,7 @@ import pandas as pd
 from datetime import datetime
 import db_operations
 import create_schema
+from db_session import get_connection, close_connection
 
 def check_primary_key(conn, table_name):
     quoted_table_name = f"'{table_name}'"
@@ -46,8 +47,8 @@ def verify_data(conn, table_name):
     for row in sample_data:
         print(row)
 
-def populate_table(db_name, table_name, data, columns):
-    conn = duckdb.connect(db_name)
+def populate_table(table_name, data, columns):
+    conn = get_connection()
     try:
         create_schema.create_table(conn, table_name, columns)
         check_primary_key(conn, table_name)
@@ -59,11 +60,8 @@ def populate_table(db_name, table_name, data, columns):
     except Exception as e:
         print(f"\nAn error occurred during the process: {str(e)}")
         conn.rollback()
-    finally:
-        conn.close()
 
 # Usage
-db_name = 'budgeting-tool.db'
 table_name = 'category_matching_patterns'
 category_map = {
     "AMZN": "Amazon",
@@ -111,7 +109,7 @@ category_map = {
     "Google Storage": "Vince spending",
     "Patreon": "Vince spending"
 }
-populate_table(db_name, table_name, category_map.items(), ['keyword VARCHAR PRIMARY KEY', 'category VARCHAR'])
+populate_table(table_name, category_map.items(), ['keyword VARCHAR PRIMARY KEY', 'category VARCHAR'])
 
 global_category_list = {
     'Amazon':"Discretionary",
@@ -142,4 +140,5 @@ global_category_list = {
 }
 
 table_name = 'categories'
-populate_table(db_name, table_name, global_category_list, ['category VARCHAR PRIMARY KEY','category_group VARCHAR'])
+populate_table(table_name, global_category_list, ['category VARCHAR PRIMARY KEY','category_group VARCHAR'])
+close_connection()
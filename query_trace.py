@@ -0,0 +1,198 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+# Opt-in query instrumentation. When enabled (BUDGETING_TOOL_TRACE_QUERIES=1 or
+# interaction.py --trace-queries), db_session hands out a traced connection that records
+# every execute with its wall time, rows fetched, the calling function and the menu action
+# it ran under. On exit the session trace is written to TRACE_DIR and a per-action summary
+# and the slowest queries are printed.
+TRACE_DIR = 'query-traces'
+TOP_QUERIES = 10
+SQL_PREVIEW_LENGTH = 70
+# Frames skipped when finding the caller, so queries are attributed to the db_operations
+# function that issued them rather than the shared helpers
+HELPER_FUNCTIONS = {'execute_query', 'query_and_return_df', 'execute_scalar_query', 'run', 'run_cached'}
+
+settings = {
+    'enabled': os.environ.get('BUDGETING_TOOL_TRACE_QUERIES', '') not in ('', '0'),
+    'top': TOP_QUERIES,
+}
+trace = []
+trace_lock = threading.Lock()
+current_action = {'name': None}
+
+def enable_tracing(top=TOP_QUERIES):
+    """Trace queries on connections opened from now on."""
+    settings.update(enabled=True, top=top)
+
+def tracing_enabled():
+    return settings['enabled']
+
+def clear_trace():
+    with trace_lock:
+        trace.clear()
+
+@contextmanager
+def trace_action(name):
+    """Attribute the queries run inside the block to the named menu action."""
+    previous = current_action['name']
+    current_action['name'] = name
+    try:
+        yield
+    finally:
+        current_action['name'] = previous
+
+def get_caller():
+    frame = sys._getframe(1)
+    this_file = frame.f_code.co_filename
+    while frame is not None:
+        code = frame.f_code
+        module_name = os.path.splitext(os.path.basename(code.co_filename))[0]
+        is_helper = module_name == 'db_operations' and code.co_name in HELPER_FUNCTIONS
+        if code.co_filename != this_file and not is_helper:
+            return f"{module_name}.{code.co_name}"
+        frame = frame.f_back
+    return None
+
+def sql_text(query):
+    # Parsed template statements carry their SQL in .query
+    return ' '.join(str(getattr(query, 'query', query)).split())
+
+def record_query(query, seconds, rows=None, params=None, cached=False):
+    """
+    Append one query to the session trace.
+
+    Returns:
+    dict: The trace entry, so rows and fetch time can be added once the result is read.
+    """
+    entry = {
+        'action': current_action['name'],
+        'caller': get_caller(),
+        'sql': sql_text(query),
+        'params': None if params is None else repr(params)[:200],
+        'seconds': seconds,
+        'rows': rows,
+        'cached': cached,
+        'started_at': time.time() - seconds,
+    }
+    with trace_lock:
+        trace.append(entry)
+    return entry
+
+class TracedConnection:
+    """
+    Wrap a DuckDB connection or cursor so that execute calls are recorded.
+
+    DuckDB's execute returns the connection itself, so fetches on the wrapper add the
+    row count and fetch time to the last recorded query. Everything else is delegated.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._last_entry = None
+
+    def execute(self, query, params=None):
+        start = time.perf_counter()
+        try:
+            if params is None:
+                self._conn.execute(query)
+            else:
+                self._conn.execute(query, params)
+        finally:
+            self._last_entry = record_query(query, time.perf_counter() - start, params=params)
+        return self
+
+    def executemany(self, query, params):
+        start = time.perf_counter()
+        try:
+            self._conn.executemany(query, params)
+        finally:
+            self._last_entry = record_query(query, time.perf_counter() - start, rows=len(params))
+        return self
+
+    def _fetch(self, fetch, count_rows, *args):
+        start = time.perf_counter()
+        result = fetch(*args)
+        if self._last_entry is not None:
+            with trace_lock:
+                self._last_entry['seconds'] += time.perf_counter() - start
+                self._last_entry['rows'] = (self._last_entry['rows'] or 0) + count_rows(result)
+        return result
+
+    def fetchone(self):
+        return self._fetch(self._conn.fetchone, lambda row: int(row is not None))
+
+    def fetchall(self):
+        return self._fetch(self._conn.fetchall, len)
+
+    def fetchmany(self, size=1):
+        return self._fetch(self._conn.fetchmany, len, size)
+
+    def df(self):
+        return self._fetch(self._conn.df, len)
+
+    fetchdf = df
+
+    def cursor(self):
+        return TracedConnection(self._conn.cursor())
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+def summarize_actions(entries):
+    """
+    Aggregate trace entries per menu action.
+
+    Returns:
+    list: (action, queries, cache hits, seconds, rows) tuples, slowest action first.
+    """
+    totals = defaultdict(lambda: [0, 0, 0.0, 0])
+    for entry in entries:
+        total = totals[entry['action'] or '(outside menu)']
+        if entry['cached']:
+            total[1] += 1
+        else:
+            total[0] += 1
+        total[2] += entry['seconds']
+        total[3] += entry['rows'] or 0
+    return sorted(((action, *total) for action, total in totals.items()), key=lambda row: row[3], reverse=True)
+
+def get_slowest_queries(entries, top=TOP_QUERIES):
+    return sorted((entry for entry in entries if not entry['cached']), key=lambda entry: entry['seconds'], reverse=True)[:top]
+
+def write_trace(entries, trace_dir=TRACE_DIR):
+    """Write the session trace as JSON and return its path."""
+    os.makedirs(trace_dir, exist_ok=True)
+    path = os.path.join(trace_dir, f"query-trace-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(path, 'w') as f:
+        json.dump({'queries': entries, 'actions': [
+            {'action': action, 'queries': queries, 'cache_hits': hits, 'seconds': seconds, 'rows': rows}
+            for action, queries, hits, seconds, rows in summarize_actions(entries)]}, f, indent=2)
+    return path
+
+def report_trace(trace_dir=TRACE_DIR):
+    """Print the per-action summary and slowest queries, and write the session trace."""
+    with trace_lock:
+        entries = list(trace)
+    if not entries:
+        return None
+
+    print(f"\n{'Action':<40} {'Queries':>8} {'Cached':>7} {'Seconds':>9} {'Rows':>10}")
+    for action, queries, hits, seconds, rows in summarize_actions(entries):
+        print(f"{action[:40]:<40} {queries:>8} {hits:>7} {seconds:>9.3f} {rows:>10,}")
+
+    print(f"\nSlowest {settings['top']} queries:")
+    print(f"{'Seconds':>9} {'Rows':>9}  {'Caller':<45} SQL")
+    for entry in get_slowest_queries(entries, settings['top']):
+        rows = '' if entry['rows'] is None else f"{entry['rows']:,}"
+        print(f"{entry['seconds']:>9.4f} {rows:>9}  {str(entry['caller'])[:45]:<45} {entry['sql'][:SQL_PREVIEW_LENGTH]}")
+
+    path = write_trace(entries, trace_dir)
+    print(f"\nQuery trace written to {path}")
+    return path
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+from db_operations import (query_and_return_df, table_exists, create_recurring_series_tables, replace_recurring_series,
+                           INSTALLMENT_MEMO_PREDICATE)
+
+# (min gap days, max gap days, min occurrences) for each periodicity we recognise
+PERIODICITIES = {
+    'weekly': (5, 9, 3),
+    'monthly': (26, 35, 3),
+    'annual': (350, 380, 2),
+}
+AMOUNT_TOLERANCE = 0.10
+MIN_REGULAR_GAP_SHARE = 0.6
+
+def normalize_merchant(descriptions):
+    """
+    Reduce raw bank descriptions to a merchant key shared by every charge of a series.
+
+    Punctuation becomes whitespace and tokens containing digits (store numbers, order
+    and reference ids) are dropped, so 'NETFLIX.COM 866-579-7172' and
+    'NETFLIX.COM 866-579-7173' both become 'NETFLIX COM'.
+
+    Args:
+    descriptions (pd.Series): Raw transaction descriptions.
+
+    Returns:
+    pd.Series: Normalized merchant keys, '' when nothing is left.
+    """
+    return (descriptions.fillna('').astype(str).str.upper()
+            .str.replace(r"[^A-Z0-9&' ]+", ' ', regex=True)
+            .str.replace(r'\S*\d\S*', ' ', regex=True)
+            .str.replace(r'\s+', ' ', regex=True)
+            .str.strip())
+
+def detect_recurring_series(transactions, amount_tolerance=AMOUNT_TOLERANCE):
+    """
+    Group transactions into recurring series in a single vectorized pass.
+
+    Transactions are grouped by normalized merchant and sign, then split into amount
+    clusters wherever the absolute amount jumps by more than amount_tolerance. A cluster
+    is a series when its amounts stay within amount_tolerance of each other, its median
+    gap between dates falls in one of the PERIODICITIES bands and at least
+    MIN_REGULAR_GAP_SHARE of its gaps fall in that band too.
+
+    Args:
+    transactions (pd.DataFrame): id, Transaction Date, Description and Amount columns.
+    amount_tolerance (float): Relative amount difference allowed within a series.
+
+    Returns:
+    tuple: (series, members) DataFrames. series has id, merchant, periodicity,
+    typical_amount, median_gap_days, transaction_count, first_date and last_date;
+    members maps transaction_id to series_id.
+    """
+    df = transactions[['id', 'Transaction Date', 'Description', 'Amount']].copy()
+    df['Transaction Date'] = pd.to_datetime(df['Transaction Date'])
+    df['Amount'] = df['Amount'].astype(float)
+    df['merchant'] = normalize_merchant(df['Description'])
+    df['sign'] = np.sign(df['Amount'])
+    df['abs_amount'] = df['Amount'].abs()
+    df = df[(df['merchant'] != '') & (df['abs_amount'] > 0) & df['Transaction Date'].notna()]
+
+    # Amount clusters: a new cluster starts on a new merchant/sign or an amount jump
+    df = df.sort_values(['merchant', 'sign', 'abs_amount'])
+    previous_amount = df.groupby(['merchant', 'sign'])['abs_amount'].shift()
+    df['cluster'] = (previous_amount.isna() | (df['abs_amount'] > previous_amount * (1 + amount_tolerance) + 0.01)).cumsum()
+
+    df = df.sort_values(['cluster', 'Transaction Date'])
+    df['gap'] = df.groupby('cluster')['Transaction Date'].diff().dt.days
+    clusters = df.groupby('cluster').agg(
+        merchant=('merchant', 'first'),
+        typical_amount=('Amount', 'median'),
+        median_gap_days=('gap', 'median'),
+        transaction_count=('id', 'size'),
+        min_amount=('abs_amount', 'min'),
+        max_amount=('abs_amount', 'max'),
+        first_date=('Transaction Date', 'min'),
+        last_date=('Transaction Date', 'max'),
+    )
+
+    clusters['periodicity'] = None
+    for periodicity, (min_gap, max_gap, min_occurrences) in PERIODICITIES.items():
+        in_band = (clusters['median_gap_days'].between(min_gap, max_gap)
+                   & (clusters['transaction_count'] >= min_occurrences))
+        clusters.loc[in_band, 'periodicity'] = periodicity
+
+    # Require the gaps to be regular, not just their median
+    bands = pd.DataFrame.from_dict(PERIODICITIES, orient='index', columns=['min_gap', 'max_gap', 'min_occurrences'])
+    cluster_bands = clusters[['periodicity']].join(bands, on='periodicity')
+    gap_bounds = cluster_bands.reindex(df['cluster'])
+    regular_gap = df['gap'].between(gap_bounds['min_gap'].to_numpy(), gap_bounds['max_gap'].to_numpy())
+    regular_share = regular_gap[df['gap'].notna()].groupby(df['cluster']).mean()
+    clusters['regular_share'] = regular_share.reindex(clusters.index).fillna(0)
+
+    # Chained small steps can build a wide cluster (e.g. groceries); those are not a fixed charge
+    stable_amount = clusters['max_amount'] <= clusters['min_amount'] * (1 + amount_tolerance) + 0.01
+    series = clusters[clusters['periodicity'].notna() & stable_amount & (clusters['regular_share'] >= MIN_REGULAR_GAP_SHARE)]
+    series = series.sort_values(['merchant', 'typical_amount', 'periodicity'])
+    series = series.assign(id=range(1, len(series) + 1))
+
+    members = df[df['cluster'].isin(series.index)]
+    members = pd.DataFrame({
+        'transaction_id': members['id'].to_numpy(),
+        'series_id': members['cluster'].map(series['id']).to_numpy(),
+    })
+    series = series.reset_index(drop=True)[['id', 'merchant', 'periodicity', 'typical_amount', 'median_gap_days',
+                                            'transaction_count', 'first_date', 'last_date']]
+    series['first_date'] = series['first_date'].dt.date
+    series['last_date'] = series['last_date'].dt.date
+    return series, members
+
+def refresh_recurring_series(conn, verbose=True):
+    """
+    Re-detect every recurring series from consolidated_transactions and replace the stored ones.
+
+    Amortization installments repeat monthly with the same description and amount, but they
+    are one purchase, so they are left out and the purchase stays visible in the
+    extraordinary spendings reports.
+    """
+    transactions = query_and_return_df(conn, f"""
+    SELECT id, "Transaction Date", Description, Amount
+    FROM consolidated_transactions
+    WHERE NOT {INSTALLMENT_MEMO_PREDICATE}
+    """)
+    series, members = detect_recurring_series(transactions)
+    replace_recurring_series(conn, series, members)
+    if verbose:
+        print(f"Recurring series detected: {len(series)} covering {len(members)} transactions")
+    return series
+
+def ensure_recurring_series(conn):
+    """Create and populate the recurring series tables the first time a report needs them."""
+    if not table_exists(conn, 'recurring_series'):
+        create_recurring_series_tables(conn)
+        refresh_recurring_series(conn)
@@ -0,0 +1,46 @@
+import argparse
+import time
+from db_operations import stage_rule_replay_changes, get_rule_replay_summary, apply_rule_replay_changes
+from helpers import print_divider, print_dataframe, get_user_input
+from db_session import get_connection, close_connection
+
+# Re-applies the current category_matching_patterns and vendor_category_mapping rules to
+# every stored transaction, so rules added after an import also fix historical rows.
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay categorization rules against all stored transactions.")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Only show the category changes each rule would make.")
+    parser.add_argument('--yes', action='store_true',
+                        help="Apply the changes without asking for confirmation.")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    conn = get_connection()
+
+    start_time = time.perf_counter()
+    change_count = stage_rule_replay_changes(conn)
+    print(f"Evaluated rules in {time.perf_counter() - start_time:.2f}s")
+
+    if change_count == 0:
+        print("Every transaction already matches the current rules.")
+        close_connection()
+        return
+
+    print_divider("Category changes by rule")
+    print_dataframe(get_rule_replay_summary(conn))
+    print(f"\n{change_count} transactions would be recategorized.")
+
+    if args.dry_run:
+        print("Dry run: no changes applied.")
+    elif args.yes or get_user_input("Apply these changes? (y/n): ", str, lambda x: x.lower() in ['y', 'n']).lower() == 'y':
+        updated = apply_rule_replay_changes(conn)
+        print(f"Recategorized {updated} transactions.")
+    else:
+        print("No changes applied.")
+
+    close_connection()
+
+if __name__ == "__main__":
+    main()
@@ -8,13 +8,12 @@ category_list AS (
 ),
 monthly_sums AS (
     SELECT 
-        DATE_TRUNC('month', ct."Transaction Date") AS month,
+        r.month,
         c.category,
         c.category_group,
-        COALESCE(SUM(ct.amount), 0) AS monthly_total
+        COALESCE(r.total, 0) AS monthly_total
     FROM category_list c
-    LEFT JOIN consolidated_transactions ct ON c.category = ct.category
-    GROUP BY DATE_TRUNC('month', ct."Transaction Date"), c.category, c.category_group
+    LEFT JOIN monthly_category_totals r ON c.category = r.category
 ),
 category_stats AS (
     SELECT 
@@ -32,12 +31,11 @@ specified_month_sums AS (
     SELECT 
         c.category,
         c.category_group,
-        COALESCE(ABS(SUM(ct.amount)), 0) AS specified_month_sum
+        COALESCE(ABS(r.total), 0) AS specified_month_sum
     FROM category_list c
-    LEFT JOIN consolidated_transactions ct 
-        ON c.category = ct.category
-        AND DATE_TRUNC('month', ct."Transaction Date") = (SELECT month FROM specified_month)
-    GROUP BY c.category, c.category_group
+    LEFT JOIN monthly_category_totals r 
+        ON c.category = r.category
+        AND r.month = (SELECT month FROM specified_month)
 )
 SELECT 
     strftime('%B', sm.month) AS Month,
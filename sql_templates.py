@@ -0,0 +1,67 @@
+import functools
+import os
+
+# Validated registry of the .sql files shipped next to this module. Each file is read once,
+# from the package directory rather than the working directory, and parsed once into a
+# DuckDB statement that can be executed with parameters on any connection. Nothing is
+# prepared per connection: DuckDB still plans the statement on every execute.
+SQL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+@functools.lru_cache(maxsize=None)
+def load_templates():
+    """
+    Read every .sql file in SQL_DIR.
+
+    Returns:
+    dict: Template name (the file name without .sql) to SQL text.
+    """
+    templates = {}
+    for file_name in sorted(os.listdir(SQL_DIR)):
+        if file_name.endswith('.sql'):
+            with open(os.path.join(SQL_DIR, file_name), 'r') as file:
+                templates[file_name[:-len('.sql')]] = file.read()
+    return templates
+
+def get_template(name):
+    templates = load_templates()
+    if name not in templates:
+        raise KeyError(f"No SQL template named '{name}' in {SQL_DIR}")
+    return templates[name]
+
+@functools.lru_cache(maxsize=None)
+def get_parsed_template(name):
+    """
+    Parse a template into a single DuckDB statement, skipping the parser on later calls.
+
+    The statement is not bound to a connection and is not a prepared statement; any
+    connection can execute it with parameters.
+
+    Raises:
+    ValueError: If the template does not contain exactly one statement.
+    """
+    # Imported here so that importing the registry does not load duckdb
+    import duckdb
+
+    statements = duckdb.extract_statements(get_template(name))
+    if len(statements) != 1:
+        raise ValueError(f"SQL template '{name}' must contain exactly one statement, found {len(statements)}")
+    return statements[0]
+
+def validate_templates():
+    """
+    Parse every template so a broken .sql file fails at startup rather than mid-session.
+
+    Returns:
+    list: The names of the validated templates.
+
+    Raises:
+    ValueError: Naming the first template that does not parse.
+    """
+    import duckdb
+
+    for name in load_templates():
+        try:
+            get_parsed_template(name)
+        except duckdb.ParserException as e:
+            raise ValueError(f"SQL template '{name}' does not parse: {e}") from e
+    return list(load_templates())
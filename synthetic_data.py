@@ -0,0 +1,293 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+
+# Generates realistic-looking transaction histories for benchmarks: a categories table
+# with every category group the reports expect, vendors with keyword patterns, monthly
+# salaries and subscriptions, skewed everyday spending, and Chase/Schwab CSV exports.
+
+CHASE_CARDS = ['Chase1234', 'Chase5678']
+SCHWAB_CARD = 'Schwab'
+END_DATE = date(2024, 12, 31)
+# Categories the reports and goal screens refer to by name
+RESERVED_CATEGORIES = [
+    ('Salary', 'Revenue'),
+    ('Rental income', 'Revenue'),
+    ('Taxes', 'Cost of revenue'),
+    ('Monthly fixed cost', 'Non-discretionary'),
+    ('Monthly property expense', 'Non-discretionary'),
+    ('Misc', 'Misc'),
+]
+SPENDING_GROUPS = ['Discretionary', 'Non-discretionary']
+VENDORS_PER_CATEGORY = 8
+STORES_PER_VENDOR = 20
+UNMAPPED_VENDOR_SHARE = 0.1
+SUBSCRIPTION_VENDOR_SHARE = 0.05
+CHUNK_DAYS = 366
+
+def parse_size(size):
+    """Parse sizes such as '10k', '1m' or '10000' into a row count."""
+    size = str(size).strip().lower().replace('_', '')
+    multipliers = {'k': 1_000, 'm': 1_000_000}
+    if size[-1:] in multipliers:
+        return int(float(size[:-1]) * multipliers[size[-1]])
+    return int(size)
+
+def generate_categories(category_count):
+    """
+    Return the categories table: the reserved categories plus numbered spending categories.
+
+    Returns:
+    pd.DataFrame: category and category_group columns.
+    """
+    spending_count = max(category_count - len(RESERVED_CATEGORIES), 1)
+    spending = [(f"Category {i:03d}", SPENDING_GROUPS[i % len(SPENDING_GROUPS)]) for i in range(1, spending_count + 1)]
+    return pd.DataFrame(RESERVED_CATEGORIES + spending, columns=['category', 'category_group'])
+
+def random_words(rng, count, word_count):
+    letters = np.array(list('ABCDEFGHIJKLMNOPRSTUVWZ'))
+    words = [''.join(rng.choice(letters, size=rng.integers(4, 9))) for _ in range(count * word_count)]
+    return [' '.join(words[i * word_count:(i + 1) * word_count]) for i in range(count)]
+
+def generate_vendors(categories, rng):
+    """
+    Return the vendors transactions are drawn from.
+
+    Every spending category gets VENDORS_PER_CATEGORY vendors with a log-normal amount
+    profile and a Zipf-like popularity. A share of vendors charge a fixed monthly
+    amount (subscriptions), and every month brings a salary and a tax payment.
+
+    Returns:
+    pd.DataFrame: vendor, category, keyword (None when no pattern maps the vendor),
+    log_mean, log_sigma, weight and monthly (fixed monthly charge, 0 for none).
+    """
+    # Misc gets everyday vendors too; reports expect spending in every group but Revenue
+    reserved = [c for c, group in RESERVED_CATEGORIES if group != 'Misc']
+    spending = categories[~categories['category'].isin(reserved)]
+    vendor_categories = np.repeat(spending['category'].to_numpy(), VENDORS_PER_CATEGORY)
+    vendor_count = len(vendor_categories)
+    names = random_words(rng, vendor_count, 2)
+    vendors = pd.DataFrame({
+        'vendor': names,
+        'category': vendor_categories,
+        'log_mean': rng.normal(3.3, 0.9, vendor_count),
+        'log_sigma': rng.uniform(0.3, 0.9, vendor_count),
+        'weight': 1.0 / rng.permutation(np.arange(1, vendor_count + 1)) ** 0.8,
+        'monthly': 0.0,
+    })
+    vendors['keyword'] = np.where(rng.random(vendor_count) < UNMAPPED_VENDOR_SHARE, None, vendors['vendor'])
+
+    subscriptions = rng.random(vendor_count) < SUBSCRIPTION_VENDOR_SHARE
+    vendors.loc[subscriptions, 'monthly'] = np.round(rng.uniform(5, 120, subscriptions.sum()), 2)
+
+    fixed = pd.DataFrame([
+        {'vendor': 'ACME CORP PAYROLL', 'category': 'Salary', 'monthly': -8500.00},
+        {'vendor': 'IRS USATAXPYMT', 'category': 'Taxes', 'monthly': 1200.00},
+        {'vendor': 'PROPERTY MGMT RENT', 'category': 'Monthly fixed cost', 'monthly': 2400.00},
+    ]).assign(keyword=lambda df: df['vendor'], log_mean=0.0, log_sigma=0.0, weight=0.0)
+    return pd.concat([vendors, fixed], ignore_index=True)
+
+def generate_monthly_charges(vendors, start_date, end_date, rng):
+    monthly = vendors[vendors['monthly'] != 0]
+    months = pd.date_range(pd.Timestamp(start_date).replace(day=1), end_date, freq='MS')
+    charges = monthly.loc[monthly.index.repeat(len(months))].reset_index(drop=True)
+    day = np.minimum(rng.integers(1, 29, len(monthly)).repeat(len(months)), 28)
+    charges['Transaction Date'] = np.tile(months.to_numpy(), len(monthly)) + pd.to_timedelta(day - 1, unit='D')
+    charges['Amount'] = -charges['monthly']
+    charges['Description'] = charges['vendor']
+    dates = charges['Transaction Date'].dt.date
+    return charges[(dates >= start_date) & (dates <= end_date)]
+
+def generate_transactions(vendors, transaction_count, start_date, end_date, rng):
+    """
+    Draw transaction_count transactions between start_date and end_date, in date order.
+
+    Returns:
+    pd.DataFrame: Card, Transaction Date, Description, Category, Type, Amount and Memo,
+    unique on (Card, Transaction Date, Description, Amount) like consolidated_transactions.
+    """
+    charges = generate_monthly_charges(vendors, start_date, end_date, rng)
+    everyday = vendors[vendors['weight'] > 0]
+    draw_count = max(transaction_count - len(charges), 0)
+    picks = everyday.iloc[rng.choice(len(everyday), size=draw_count, p=everyday['weight'] / everyday['weight'].sum())]
+    days = (end_date - start_date).days + 1
+    drawn = pd.DataFrame({
+        'vendor': picks['vendor'].to_numpy(),
+        'category': picks['category'].to_numpy(),
+        'Transaction Date': pd.Timestamp(start_date) + pd.to_timedelta(rng.integers(0, days, draw_count), unit='D'),
+        'Amount': -np.round(np.exp(rng.normal(picks['log_mean'], picks['log_sigma'])), 2),
+        'Description': picks['vendor'].to_numpy().astype(object) + ' #'
+                       + rng.integers(1, STORES_PER_VENDOR + 1, draw_count).astype(str).astype(object),
+    })
+
+    df = pd.concat([drawn, charges[drawn.columns]], ignore_index=True).head(transaction_count)
+    df['Card'] = np.where(df['category'] == 'Salary', SCHWAB_CARD,
+                          np.array(CHASE_CARDS + [SCHWAB_CARD])[rng.integers(0, 3, len(df))])
+    df['Type'] = np.where(df['Amount'] > 0, 'Return', 'Sale')
+    df['Memo'] = ''
+    df = df.rename(columns={'category': 'Category'})
+    df['Transaction Date'] = df['Transaction Date'].dt.date
+    df = df.drop_duplicates(['Card', 'Transaction Date', 'Description', 'Amount'])
+    return df.sort_values('Transaction Date', kind='stable')[
+        ['Card', 'Transaction Date', 'Description', 'Category', 'Type', 'Amount', 'Memo']].reset_index(drop=True)
+
+def load_create_schema():
+    script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'create-schema.py')
+    spec = importlib.util.spec_from_file_location("create_schema_module", script_path)
+    create_schema = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(create_schema)
+    return create_schema
+
+def create_schema(conn):
+    """Create the base tables the way populate-seeddata and create-schema options 1-8 do."""
+    schema_script = load_create_schema()
+    with contextlib.redirect_stdout(io.StringIO()):
+        schema_script.create_table(conn, 'categories', ['category VARCHAR PRIMARY KEY', 'category_group VARCHAR'])
+        schema_script.create_table(conn, 'category_matching_patterns', ['keyword VARCHAR PRIMARY KEY', 'category VARCHAR'])
+        schema_script.create_table_consolidated_transactions(conn)
+        schema_script.create_table_category_budgets(conn)
+        schema_script.create_current_budgets_view(conn)
+        schema_script.create_table_vendor_category_mapping(conn)
+        schema_script.create_table_surplus_and_deficit_breakdowns_and_items(conn)
+        schema_script.create_table_flagged_transactions(conn)
+        schema_script.create_table_pending_review_transactions(conn)
+        schema_script.create_table_ingested_files(conn)
+
+def populate_database(conn, transaction_count, category_count=200, years=10, seed=42, end_date=END_DATE):
+    """
+    Create the schema and fill it with a synthetic history ending on end_date.
+
+    Transactions are generated and inserted one year at a time to bound memory, so
+    10M-row histories can be built on a laptop.
+
+    Returns:
+    tuple: (categories, vendors) DataFrames, for generating matching CSV exports.
+    """
+    rng = np.random.default_rng(seed)
+    categories = generate_categories(category_count)
+    vendors = generate_vendors(categories, rng)
+    create_schema(conn)
+
+    conn.register('synthetic_categories_df', categories)
+    conn.execute("INSERT INTO categories SELECT category, category_group FROM synthetic_categories_df")
+    patterns = vendors.dropna(subset=['keyword']).drop_duplicates('keyword')
+    conn.register('synthetic_patterns_df', patterns[['keyword', 'category']])
+    conn.execute("INSERT INTO category_matching_patterns SELECT keyword, category FROM synthetic_patterns_df")
+    conn.execute("""
+    INSERT INTO category_budgets (category, budget)
+    SELECT category, 500 FROM synthetic_categories_df WHERE category_group <> 'Revenue'
+    """)
+
+    start_date = date(end_date.year - years + 1, 1, 1)
+    total_days = (end_date - start_date).days + 1
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=CHUNK_DAYS - 1), end_date)
+        chunk_count = round(transaction_count * ((chunk_end - chunk_start).days + 1) / total_days)
+        chunk = generate_transactions(vendors, chunk_count, chunk_start, chunk_end, rng)
+        conn.register('synthetic_transactions_df', chunk)
+        conn.execute("""
+        INSERT INTO consolidated_transactions ("Card", "Transaction Date", "Description", "Category", "Type", "Amount", "Memo")
+        SELECT "Card", "Transaction Date", "Description", "Category", "Type", "Amount", "Memo"
+        FROM synthetic_transactions_df
+        """)
+        chunk_start = chunk_end + timedelta(days=1)
+    conn.unregister('synthetic_transactions_df')
+    conn.execute("CHECKPOINT")
+    return categories, vendors
+
+def insert_goal(conn, categories, effective_date):
+    """Insert a surplus/deficit breakdown over a few categories; returns its id."""
+    spending = categories[categories['category_group'].isin(SPENDING_GROUPS)]['category'].head(3).tolist()
+    breakdown = {'Savings': 0.4, 'Investment': 0.3, **{category: 0.1 for category in spending}}
+    return conn.execute("""
+    INSERT INTO surplus_and_deficit_breakdowns (description, breakdown, effective_date)
+    VALUES ('Synthetic goal', ?, ?)
+    RETURNING id
+    """, [json.dumps(breakdown), effective_date]).fetchone()[0]
+
+def write_chase_csv(transactions, path):
+    """Write transactions in the Chase activity export format."""
+    df = pd.DataFrame({
+        'Transaction Date': pd.to_datetime(transactions['Transaction Date']).dt.strftime('%m/%d/%Y'),
+        'Post Date': (pd.to_datetime(transactions['Transaction Date']) + pd.Timedelta(days=1)).dt.strftime('%m/%d/%Y'),
+        'Description': transactions['Description'],
+        'Category': 'Shopping',
+        'Type': transactions['Type'],
+        'Amount': transactions['Amount'].map(lambda amount: f"{amount:.2f}"),
+        'Memo': '',
+    })
+    df.to_csv(path, index=False)
+
+def write_schwab_csv(transactions, path):
+    """Write transactions in the Charles Schwab checking export format."""
+    amounts = transactions['Amount'].astype(float)
+    df = pd.DataFrame({
+        'Date': pd.to_datetime(transactions['Transaction Date']).dt.strftime('%m/%d/%Y'),
+        'Status': 'Posted',
+        'Type': np.where(amounts > 0, 'DEPOSIT', 'DEBIT'),
+        'CheckNumber': '',
+        'Description': transactions['Description'],
+        'Withdrawal': np.where(amounts < 0, (-amounts).map(lambda amount: f"${amount:,.2f}"), ''),
+        'Deposit': np.where(amounts > 0, amounts.map(lambda amount: f"${amount:,.2f}"), ''),
+        'RunningBalance': '',
+    })
+    df.to_csv(path, index=False)
+
+def write_statement_csvs(vendors, row_count, csv_dir, start_date, days=30, seed=7):
+    """
+    Write one Chase file per card and one Schwab file covering the days after start_date.
+
+    The rows fall after the populated history, like a new statement, so they insert
+    without duplicates.
+
+    Returns:
+    dict: {'Chase': [paths], 'Charles Schwab': [paths]}.
+    """
+    rng = np.random.default_rng(seed)
+    transactions = generate_transactions(vendors, row_count, start_date, start_date + timedelta(days=days - 1), rng)
+    os.makedirs(csv_dir, exist_ok=True)
+    files = {'Chase': [], 'Charles Schwab': []}
+    for card in CHASE_CARDS:
+        path = os.path.join(csv_dir, f"{card}_Activity_synthetic.csv")
+        write_chase_csv(transactions[transactions['Card'] == card], path)
+        files['Chase'].append(path)
+    path = os.path.join(csv_dir, 'Schwab_Checking_synthetic.csv')
+    write_schwab_csv(transactions[transactions['Card'] == SCHWAB_CARD], path)
+    files['Charles Schwab'].append(path)
+    return files
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a synthetic budgeting-tool database and bank CSV exports.")
+    parser.add_argument('--transactions', default='10k', help="History size, e.g. 10k, 1m, 10m (default: 10k).")
+    parser.add_argument('--categories', type=int, default=200, help="Number of categories (default: 200).")
+    parser.add_argument('--years', type=int, default=10, help="Years of history (default: 10).")
+    parser.add_argument('--db', default='synthetic-budgeting-tool.db', help="Database file to create.")
+    parser.add_argument('--csv-dir', default='synthetic-csv', help="Directory for the Chase/Schwab CSV exports.")
+    parser.add_argument('--csv-rows', default='10k', help="Rows across the CSV exports (default: 10k).")
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+def main():
+    import duckdb
+
+    args = parse_args()
+    if os.path.exists(args.db):
+        raise SystemExit(f"{args.db} already exists; remove it or choose another --db")
+    conn = duckdb.connect(args.db)
+    categories, vendors = populate_database(conn, parse_size(args.transactions), args.categories, args.years, args.seed)
+    row_count = conn.execute("SELECT COUNT(*) FROM consolidated_transactions").fetchone()[0]
+    conn.close()
+    files = write_statement_csvs(vendors, parse_size(args.csv_rows), args.csv_dir, END_DATE + timedelta(days=1))
+    print(f"Created {args.db} with {row_count:,} transactions in {len(categories)} categories")
+    for bank_type, paths in files.items():
+        print(f"{bank_type} CSVs: {', '.join(paths)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+import unittest
+from datetime import date
+from decimal import Decimal
+import duckdb
+import pandas as pd
+import db_operations
+
+def create_consolidated_transactions(conn):
+    conn.execute("CREATE SEQUENCE consolidated_transactions_id_seq START 1")
+    conn.execute("""
+    CREATE TABLE consolidated_transactions (
+        id BIGINT DEFAULT nextval('consolidated_transactions_id_seq') PRIMARY KEY,
+        "Card" VARCHAR,
+        "Transaction Date" DATE,
+        "Description" VARCHAR,
+        "Category" VARCHAR,
+        "Type" VARCHAR,
+        "Amount" DECIMAL(10, 2),
+        "Memo" VARCHAR
+    )
+    """)
+    conn.execute("""
+    CREATE UNIQUE INDEX unique_consolidated_transactions
+    ON consolidated_transactions ("Card", "Transaction Date", "Description", "Amount")
+    """)
+
+def make_transactions_df(rows):
+    return pd.DataFrame(rows, columns=['Card', 'Transaction Date', 'Description', 'Category', 'Type', 'Amount', 'Memo'])
+
+class TestQueryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = duckdb.connect(':memory:')
+        create_consolidated_transactions(self.conn)
+        self.conn.execute("CREATE TABLE flagged_transactions (transaction_id BIGINT PRIMARY KEY)")
+        self.conn.execute("""
+        INSERT INTO consolidated_transactions ("Card", "Transaction Date", "Description", "Category", "Amount", "Memo")
+        VALUES ('Chase1234', DATE '2024-03-01', 'CORNER DELI', 'Food', -8.00, ''),
+               ('Chase1234', DATE '2024-03-02', 'BOOKSTORE', 'Shopping', -15.00, '')
+        """)
+        db_operations.enable_query_cache(max_entries=2)
+
+    def tearDown(self):
+        db_operations.disable_query_cache()
+        self.conn.close()
+
+    def test_write_helpers_invalidate_cached_results(self):
+        self.assertTrue(db_operations.get_flagged_transactions(self.conn).empty)
+        cached = db_operations.get_flagged_transactions(self.conn)
+        cached['id'] = 1  # callers get their own copy
+        self.assertTrue(db_operations.get_flagged_transactions(self.conn).empty)
+
+        db_operations.flag_transaction(self.conn, 1)
+
+        self.assertEqual(db_operations.get_flagged_transactions(self.conn)['id'].tolist(), [1])
+        stats = db_operations.get_query_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+
+    def test_read_paths_keep_cached_results(self):
+        db_operations.ensure_parent_id_column(self.conn)
+        db_operations.ensure_description_index(self.conn)
+        generation = db_operations.get_query_cache_stats()['generation']
+
+        db_operations.get_amortization_installments(self.conn, 1)
+        db_operations.get_transactions_by_vendor(self.conn, 'DELI')
+        db_operations.search_descriptions(self.conn, 'deli')
+        self.assertEqual(db_operations.get_query_cache_stats()['generation'], generation)
+
+        # A new description is indexed on the next lookup, which does invalidate
+        self.conn.execute("""
+        INSERT INTO consolidated_transactions ("Card", "Transaction Date", "Description", "Amount")
+        VALUES ('Chase1234', DATE '2024-03-03', 'NEW DELI', -4.00)
+        """)
+        db_operations.get_transactions_by_vendor(self.conn, 'DELI')
+        self.assertEqual(db_operations.get_query_cache_stats()['generation'], generation + 1)
+
+    def test_evicts_least_recently_used_results(self):
+        db_operations.fetch_transactions(self.conn, 'Food', 2024, 3)
+        db_operations.fetch_transactions(self.conn, 'Shopping', 2024, 3)
+        db_operations.fetch_transactions(self.conn, 'Food', 2024, 3)
+        db_operations.fetch_transactions(self.conn, 'Home', 2024, 3)
+
+        # Shopping was the least recently used entry
+        db_operations.fetch_transactions(self.conn, 'Food', 2024, 3)
+        db_operations.fetch_transactions(self.conn, 'Shopping', 2024, 3)
+        stats = db_operations.get_query_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions'], stats['entries']), (2, 4, 2, 2))
+
+    def test_disabled_cache_always_queries(self):
+        db_operations.disable_query_cache()
+        db_operations.get_flagged_transactions(self.conn)
+        self.conn.execute("INSERT INTO flagged_transactions VALUES (2)")
+
+        self.assertEqual(db_operations.get_flagged_transactions(self.conn)['id'].tolist(), [2])
+        self.assertEqual(db_operations.get_query_cache_stats()['hits'], 0)
+
+class TestGetMonthRange(unittest.TestCase):
+
+    def test_returns_half_open_bounds(self):
+        self.assertEqual(db_operations.get_month_range(2024, 2), (date(2024, 2, 1), date(2024, 3, 1)))
+        self.assertEqual(db_operations.get_month_range('2024', '12'), (date(2024, 12, 1), date(2025, 1, 1)))
+
+    def test_predicate_selects_whole_month_only(self):
+        conn = duckdb.connect(':memory:')
+        create_consolidated_transactions(conn)
+        conn.execute("""
+        INSERT INTO consolidated_transactions ("Card", "Transaction Date", "Description", "Category", "Amount")
+        VALUES ('Chase1234', DATE '2024-11-30', 'A', 'Food', -1.00),
+               ('Chase1234', DATE '2024-12-01', 'B', 'Food', -2.00),
+               ('Chase1234', DATE '2024-12-31', 'C', 'Food', -3.00),
+               ('Chase1234', DATE '2025-01-01', 'D', 'Food', -4.00)
+        """)
+
+        df = db_operations.fetch_transactions(conn, 'Food', 2024, 12)
+
+        self.assertEqual(sorted(df['Description'].tolist()), ['B', 'C'])
+        conn.close()
+
+class TestGetExtraordinaryNonrecurringTransactions(unittest.TestCase):
+
+    def test_filters_by_percentiles_and_recurrence(self):
+        conn = duckdb.connect(':memory:')
+        create_consolidated_transactions(conn)
+        conn.execute("""
+        INSERT INTO consolidated_transactions ("Card", "Transaction Date", "Description", "Category", "Amount")
+        VALUES ('Chase1234', DATE '2024-03-01', 'GROCER', 'Food', -10.00),
+               ('Chase1234', DATE '2024-03-02', 'GROCER', 'Food', -12.00),
+               ('Chase1234', DATE '2024-03-03', 'BANQUET', 'Food', -400.00),
+               ('Chase1234', DATE '2024-03-04', 'BAR', 'Drink', -8.00),
+               ('Chase1234', DATE '2024-03-05', 'GYM', 'Fun', -400.00),
+               ('Chase1234', DATE '2024-02-05', 'GYM', 'Fun', -400.00),
+               ('Chase1234', DATE '2024-03-06', 'CONCERT', 'Fun', -20.00),
+               ('Schwab', DATE '2024-03-15', 'EMPLOYER', 'Salary', 5000.00)
+        """)
+        db_operations.create_recurring_series_tables(conn)
+        conn.execute("INSERT INTO recurring_series_members VALUES (5, 1), (6, 1)")
+
+        df = db_operations.get_extraordinary_nonrecurring_transactions(
+            conn, 2024, 3, ['Food', 'Drink', 'Fun'], ['Salary'])
+
+        # GYM is above both percentiles but belongs to a recurring series
+        self.assertEqual(df['Description'].tolist(), ['BANQUET'])
+        self.assertEqual(df['Amount'].tolist(), [-400.0])
+        conn.close()
+
+class TestRecategorizeVendorTransactions(unittest.TestCase):
+
+    def test_updates_every_matching_row_and_reports_old_categories(self):
+        conn = duckdb.connect(':memory:')
+        create_consolidated_transactions(conn)
+        conn.execute("""
+        INSERT INTO consolidated_transactions ("Card", "Transaction Date", "Description", "Category", "Amount", "Memo")
+        VALUES ('Chase1234', DATE '2024-03-01', 'AMAZON MKTP', 'Shopping', -10.00, NULL),
+               ('Chase1234', DATE '2024-03-02', 'AMAZON PRIME', 'Shopping', -12.00, 'gift'),
+               ('Chase1234', DATE '2024-03-03', 'AMAZON FRESH', NULL, -40.00, ''),
+               ('Chase1234', DATE '2024-03-04', 'CORNER DELI', 'Food', -8.00, '')
+        """)
+
+        conn.execute("BEGIN TRANSACTION")
+        summary = db_operations.recategorize_vendor_transactions(conn, 'AMAZON', 'Amazon')
+        conn.rollback()
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM consolidated_transactions WHERE Category = 'Amazon'").fetchone()[0], 0)
+
+        summary = db_operations.recategorize_vendor_transactions(conn, 'AMAZON', 'Amazon')
+
+        self.assertEqual(dict(zip(summary['old_category'].fillna('NULL'), summary['transaction_count'])), {'Shopping': 2, 'NULL': 1})
+        self.assertEqual(summary['new_category'].unique().tolist(), ['Amazon'])
+        rows = conn.execute('SELECT "Category", "Memo" FROM consolidated_transactions ORDER BY id').fetchall()
+        self.assertEqual(rows, [
+            ('Amazon', '. Recategorized by user from Shopping'),
+            ('Amazon', 'gift. Recategorized by user from Shopping'),
+            ('Amazon', '. Recategorized by user from None'),
+            ('Food', ''),
+        ])
+        conn.close()
+
+class TestDescriptionIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = duckdb.connect(':memory:')
+        create_consolidated_transactions(self.conn)
+        self.conn.execute("""
+        INSERT INTO consolidated_transactions ("Card", "Transaction Date", "Description", "Category", "Amount")
+        VALUES ('Chase1234', DATE '2024-03-01', 'AMAZON MKTP', 'Shopping', -10.00),
+               ('Chase1234', DATE '2024-03-02', 'AMAZON MKTP', 'Shopping', -11.00),
+               ('Chase1234', DATE '2024-03-03', 'Amazon Prime', 'Shopping', -12.00),
+               ('Chase1234', DATE '2024-03-04', 'AMAZ ONLINE', 'Shopping', -13.00),
+               ('Chase1234', DATE '2024-03-05', 'CORNER DELI', 'Food', -8.00)
+        """)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_index_probe_keeps_like_semantics(self):
+        without_index = {vendor: sorted(db_operations.get_matching_descriptions(self.conn, vendor))
+                         for vendor in ['AMAZON', 'MKTP', 'mazo', 'DE', 'AMAZ_N', 'NOPE']}
+        db_operations.ensure_description_index(self.conn)
+        with_index = {vendor: sorted(db_operations.get_matching_descriptions(self.conn, vendor))
+                      for vendor in without_index}
+
+        self.assertEqual(with_index, without_index)
+        self.assertEqual(with_index['AMAZON'], ['AMAZON MKTP'])
+        self.assertEqual(with_index['AMAZ_N'], ['AMAZON MKTP'])
+        self.assertEqual(db_operations.get_transactions_by_vendor(self.conn, 'MKTP')['Amount'].tolist(), [-11.00, -10.00])
+
+    def test_refresh_only_indexes_new_descriptions(self):
+        db_operations.ensure_description_index(self.conn)
+        self.assertEqual(db_operations.refresh_description_index(self.conn), 0)
+
+        self.conn.execute("""
+        INSERT INTO consolidated_transactions ("Card", "Transaction Date", "Description", "Amount")
+        VALUES ('Chase1234', DATE '2024-03-06', 'AMAZON MKTP', -9.00), ('Chase1234', DATE '2024-03-06', 'AMAZON FRESH', -40.00)
+        """)
+        self.assertEqual(db_operations.refresh_description_index(self.conn), 1)
+        self.assertEqual(sorted(db_operations.get_matching_descriptions(self.conn, 'AMAZON')), ['AMAZON FRESH', 'AMAZON MKTP'])
+
+        # Only transactions after the high-water mark are scanned
+        self.assertEqual(db_operations.get_description_index_mark(self.conn), 7)
+        self.conn.execute("DELETE FROM description_index WHERE description = 'CORNER DELI'")
+        self.assertEqual(db_operations.refresh_description_index(self.conn), 0)
+
+    def test_lookup_finds_descriptions_inserted_after_the_index_was_built(self):
+        db_operations.ensure_description_index(self.conn)
+        db_operations.insert_adjustment_transaction(self.conn, '2024-03-07', 'AMAZON RETURN ADJ', -5.00, 'Shopping')
+
+        self.assertIn('AMAZON RETURN ADJ', db_operations.get_transactions_by_vendor(self.conn, 'AMAZON')['Description'].tolist())
+
+        self.conn.execute("BEGIN TRANSACTION")
+        db_operations.recategorize_vendor_transactions(self.conn, 'RETURN ADJ', 'Refunds')
+        self.conn.commit()
+        self.assertEqual(self.conn.execute("""
+        SELECT Category FROM consolidated_transactions WHERE Description = 'AMAZON RETURN ADJ'
+        """).fetchone()[0], 'Refunds')
+
+    def test_search_ranks_by_trigram_similarity(self):
+        results = db_operations.search_descriptions(self.conn, 'amazon mktp')
+
+        self.assertEqual(results['description'].tolist()[:3], ['AMAZON MKTP', 'Amazon Prime', 'AMAZ ONLINE'])
+        self.assertEqual(results['coverage'].iloc[0], 1.0)
+        self.assertEqual(results['transaction_count'].iloc[0], 2)
+        self.assertNotIn('CORNER DELI', results['description'].tolist())
+        # Typos still find the vendor
+        self.assertEqual(db_operations.search_descriptions(self.conn, 'amazn mktp')['description'].iloc[0], 'AMAZON MKTP')
+
+class TestAmortizeTransactions(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = duckdb.connect(':memory:')
+        create_consolidated_transactions(self.conn)
+        self.conn.execute("""
+        INSERT INTO consolidated_transactions ("Card", "Transaction Date", "Description", "Category", "Amount", "Memo")
+        VALUES ('Chase1234', DATE '2024-01-31', 'LAPTOP', 'Shopping', -1000.00, NULL),
+               ('Chase1234', DATE '2024-02-10', 'SOFA', 'Home', -600.00, 'living room'),
+               ('Chase1234', DATE '2024-02-11', 'CORNER DELI', 'Food', -8.00, '')
+        """)
+        db_operations.create_monthly_category_totals(self.conn)
+        db_operations.rebuild_monthly_category_totals(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def assert_rollup_matches_transactions(self):
+        expected = self.conn.execute("""
+        SELECT CAST(DATE_TRUNC('month', "Transaction Date") AS DATE), "Category", SUM("Amount"), COUNT(*)
+        FROM consolidated_transactions GROUP BY 1, 2 ORDER BY 1, 2
+        """).fetchall()
+        actual = self.conn.execute("SELECT * FROM monthly_category_totals ORDER BY 1, 2").fetchall()
+        self.assertEqual(actual, expected)
+
+    def test_amortizes_many_transactions_in_one_call(self):
+        inserted_ids = db_operations.amortize_transactions(self.conn, [1, 2], 3)
+
+        self.assertEqual(len(inserted_ids), 4)
+        laptop = db_operations.get_amortization_installments(self.conn, 1)
+        self.assertEqual(laptop['Transaction Date'].dt.date.tolist(), [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31)])
+        self.assertEqual(laptop['Amount'].tolist(), [-333.34, -333.33, -333.33])
+        self.assertEqual(laptop['Memo'].tolist(), [' 1/3 amortized transaction.',
+                                                   ' 2/3 amortized transaction. Original transaction ID: 1',
+                                                   ' 3/3 amortized transaction. Original transaction ID: 1'])
+        parents = self.conn.execute("SELECT parent_id, COUNT(*) FROM consolidated_transactions GROUP BY 1 ORDER BY 1").fetchall()
+        self.assertEqual(parents, [(1, 2), (2, 2), (None, 3)])
+        self.assert_rollup_matches_transactions()
+
+        with self.assertRaises(ValueError):
+            db_operations.amortize_transactions(self.conn, [1], 2)
+        with self.assertRaises(ValueError):
+            db_operations.amortize_transactions(self.conn, [99], 2)
+
+    def test_reverse_restores_the_original(self):
+        db_operations.amortize_transactions(self.conn, [1, 2], 12)
+        self.conn.execute("CREATE TABLE flagged_transactions (transaction_id BIGINT PRIMARY KEY)")
+        self.conn.execute("INSERT INTO flagged_transactions SELECT MAX(id) FROM consolidated_transactions")
+
+        self.assertEqual(db_operations.reverse_amortizations(self.conn, [1, 2]), 22)
+
+        rows = self.conn.execute('SELECT id, "Amount", "Memo", parent_id FROM consolidated_transactions ORDER BY id').fetchall()
+        self.assertEqual(rows, [(1, Decimal('-1000.00'), '', None), (2, Decimal('-600.00'), 'living room', None),
+                                (3, Decimal('-8.00'), '', None)])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM flagged_transactions").fetchone()[0], 0)
+        self.assert_rollup_matches_transactions()
+
+    def test_links_legacy_installments_from_memo(self):
+        self.conn.execute("""
+        INSERT INTO consolidated_transactions ("Card", "Transaction Date", "Description", "Category", "Amount", "Memo")
+        VALUES ('Chase1234', DATE '2024-03-10', 'SOFA', 'Home', -300.00, 'living room 2/2 amortized transaction. Original transaction ID: 2')
+        """)
+
+        self.assertEqual(db_operations.get_amortization_installments(self.conn, 2)['id'].tolist(), [2, 4])
+
+class TestRuleReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = duckdb.connect(':memory:')
+        create_consolidated_transactions(self.conn)
+        self.conn.execute("CREATE TABLE category_matching_patterns (keyword VARCHAR PRIMARY KEY, category VARCHAR)")
+        self.conn.execute("INSERT INTO category_matching_patterns VALUES ('amzn', 'Amazon'), ('UBER', 'Transportation'), ('UBER EATS', 'Food')")
+        self.conn.execute("CREATE TABLE vendor_category_mapping (id BIGINT, vendor VARCHAR, category VARCHAR)")
+        self.conn.execute("INSERT INTO vendor_category_mapping VALUES (1, 'UBER EATS GROCERY', 'Groceries')")
+        self.conn.execute("""
+        INSERT INTO consolidated_transactions ("Card", "Transaction Date", "Description", "Category", "Amount", "Memo")
+        VALUES ('Chase1234', DATE '2024-03-01', 'AMZN MKTP US', 'Shopping', -10.00, ''),
+               ('Chase1234', DATE '2024-03-02', 'UBER EATS 123', 'Transportation', -12.00, ''),
+               ('Chase1234', DATE '2024-03-03', 'UBER EATS GROCERY', 'Food', -40.00, ''),
+               ('Chase1234', DATE '2024-03-04', 'UBER TRIP', 'Transportation', -8.00, ''),
+               ('Chase1234', DATE '2024-03-05', 'AMZN RETURN', NULL, 15.00, ''),
+               ('Chase1234', DATE '2024-03-06', 'AMZN GIFT', 'Gifts', -25.00, '. Recategorized by user from Amazon')
+        """)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_dry_run_groups_changes_by_rule(self):
+        self.assertEqual(db_operations.stage_rule_replay_changes(self.conn), 3)
+
+        summary = db_operations.get_rule_replay_summary(self.conn)
+        self.assertEqual(sorted(zip(summary['rule_type'], summary['rule'], summary['old_category'], summary['new_category'])), [
+            ('keyword', 'UBER EATS', 'Transportation', 'Food'),
+            ('keyword', 'amzn', 'Shopping', 'Amazon'),
+            ('vendor', 'UBER EATS GROCERY', 'Food', 'Groceries'),
+        ])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM consolidated_transactions WHERE Category = 'Amazon'").fetchone()[0], 0)
+
+    def test_apply_recategorizes_and_is_idempotent(self):
+        db_operations.stage_rule_replay_changes(self.conn)
+        self.assertEqual(db_operations.apply_rule_replay_changes(self.conn), 3)
+
+        rows = self.conn.execute('SELECT "Category", "Memo" FROM consolidated_transactions ORDER BY id').fetchall()
+        self.assertEqual(rows[:3], [
+            ('Amazon', '. Recategorized by rule replay from Shopping'),
+            ('Food', '. Recategorized by rule replay from Transportation'),
+            ('Groceries', '. Recategorized by rule replay from Food'),
+        ])
+        self.assertEqual(rows[4][0], None)
+        self.assertEqual(rows[5][0], 'Gifts')
+        self.assertEqual(db_operations.stage_rule_replay_changes(self.conn), 0)
+
+    def test_vendor_matches_inside_longer_descriptions_like_ingest(self):
+        self.conn.execute("""
+        INSERT INTO consolidated_transactions ("Card", "Transaction Date", "Description", "Category", "Amount", "Memo")
+        VALUES ('Chase1234', DATE '2024-03-07', 'SQ *Uber Eats  Grocery 42', 'Food', -30.00, '')
+        """)
+        db_operations.stage_rule_replay_changes(self.conn)
+
+        changes = self.conn.execute("""
+        SELECT rule_type, rule, new_category FROM rule_replay_changes WHERE id = 7
+        """).fetchall()
+        self.assertEqual(changes, [('vendor', 'UBER EATS GROCERY', 'Groceries')])
+
+class TestPersistDataInDbBulk(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = duckdb.connect(':memory:')
+        create_consolidated_transactions(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_inserts_new_rows_and_reports_duplicates(self):
+        self.conn.execute("""
+        INSERT INTO consolidated_transactions ("Card", "Transaction Date", "Description", "Category", "Type", "Amount", "Memo")
+        VALUES ('Chase1234', DATE '2024-03-01', 'COFFEE SHOP', 'Drink', 'Sale', -4.50, '')
+        """)
+        df = make_transactions_df([
+            ['Chase1234', '03/01/2024', 'COFFEE SHOP', 'Drink', 'Sale', -4.5, ''],
+            ['Chase1234', '03/02/2024', 'UBER TRIP', 'Transportation', 'Sale', -12.25, ''],
+            ['Chase1234', '03/02/2024', 'UBER TRIP', 'Transportation', 'Sale', -12.25, ''],
+            ['Schwab', '03/03/2024', 'GRUBHUB HOLDING', 'Salary', 'ACH', 5000.0, ''],
+        ])
+
+        report = db_operations.persist_data_in_db_bulk(self.conn, df, 'consolidated_transactions')
+
+        self.assertEqual(report['status'].tolist(), ['duplicate', 'inserted', 'duplicate', 'inserted'])
+        self.assertEqual(report['Transaction Date'].iloc[1].date(), date(2024, 3, 2))
+        rows = self.conn.execute("""
+        SELECT "Card", "Transaction Date", "Description", "Amount"
+        FROM consolidated_transactions
+        ORDER BY id
+        """).fetchall()
+        self.assertEqual(rows, [
+            ('Chase1234', date(2024, 3, 1), 'COFFEE SHOP', Decimal('-4.50')),
+            ('Chase1234', date(2024, 3, 2), 'UBER TRIP', Decimal('-12.25')),
+            ('Schwab', date(2024, 3, 3), 'GRUBHUB HOLDING', Decimal('5000.00')),
+        ])
+
+    def test_reimporting_same_frame_inserts_nothing(self):
+        df = make_transactions_df([
+            ['Chase1234', '03/02/2024', 'UBER TRIP', 'Transportation', 'Sale', -12.25, ''],
+        ])
+        db_operations.persist_data_in_db_bulk(self.conn, df, 'consolidated_transactions')
+        report = db_operations.persist_data_in_db_bulk(self.conn, df, 'consolidated_transactions')
+
+        self.assertEqual(report['status'].tolist(), ['duplicate'])
+        count = self.conn.execute("SELECT COUNT(*) FROM consolidated_transactions").fetchone()[0]
+        self.assertEqual(count, 1)
+
+class TestMonthlyCategoryTotals(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = duckdb.connect(':memory:')
+        create_consolidated_transactions(self.conn)
+        db_operations.persist_data_in_db_bulk(self.conn, make_transactions_df([
+            ['Chase1234', '03/01/2024', 'COFFEE SHOP', 'Drink', 'Sale', -4.5, ''],
+            ['Chase1234', '03/20/2024', 'BAR', 'Drink', 'Sale', -20.0, ''],
+            ['Chase1234', '04/02/2024', 'UBER TRIP', 'Transportation', 'Sale', -12.25, ''],
+        ]), 'consolidated_transactions', verbose=False)
+        db_operations.ensure_monthly_category_totals(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def get_totals(self):
+        return self.conn.execute("""
+        SELECT month, category, total, transaction_count
+        FROM monthly_category_totals
+        ORDER BY month, category
+        """).fetchall()
+
+    def test_backfill_and_incremental_insert(self):
+        self.assertEqual(self.get_totals(), [
+            (date(2024, 3, 1), 'Drink', Decimal('-24.50'), 2),
+            (date(2024, 4, 1), 'Transportation', Decimal('-12.25'), 1),
+        ])
+        db_operations.persist_data_in_db_bulk(self.conn, make_transactions_df([
+            ['Chase1234', '03/01/2024', 'COFFEE SHOP', 'Drink', 'Sale', -4.5, ''],
+            ['Chase1234', '03/31/2024', 'WINE BAR', 'Drink', 'Sale', -30.0, ''],
+        ]), 'consolidated_transactions', verbose=False)
+
+        self.assertEqual(self.get_totals()[0], (date(2024, 3, 1), 'Drink', Decimal('-54.50'), 3))
+
+    def test_recategorize_moves_amount_between_cells(self):
+        db_operations.recategorize_transaction(self.conn, 2, 'Entertainment', 'Drink')
+        db_operations.update_transaction_amount(self.conn, 3, -10.00)
+
+        self.assertEqual(self.get_totals(), [
+            (date(2024, 3, 1), 'Drink', Decimal('-4.50'), 1),
+            (date(2024, 3, 1), 'Entertainment', Decimal('-20.00'), 1),
+            (date(2024, 4, 1), 'Transportation', Decimal('-10.00'), 1),
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
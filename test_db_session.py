@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+import duckdb
+import db_session
+
+class TestDbSession(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.original_settings = dict(db_session.settings)
+        db_session.close_connection()
+        db_session.configure(db_path=os.path.join(self.temp_dir.name, 'session.db'), threads=2, memory_limit='512MB')
+
+    def tearDown(self):
+        db_session.close_connection()
+        db_session.settings.update(self.original_settings)
+        self.temp_dir.cleanup()
+
+    def test_connection_is_shared_and_configured(self):
+        conn = db_session.get_connection()
+
+        self.assertIs(db_session.get_connection(), conn)
+        self.assertEqual(conn.execute("SELECT current_setting('threads')").fetchone()[0], 2)
+        conn.execute("CREATE TABLE t (a INTEGER)")
+        cursor = db_session.get_cursor()
+        cursor.execute("INSERT INTO t VALUES (1)")
+        cursor.close()
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM t").fetchone()[0], 1)
+
+    def test_read_only_cursor_rejects_writes(self):
+        db_session.get_connection().execute("CREATE TABLE t (a INTEGER)")
+
+        with db_session.read_only_cursor() as cursor:
+            self.assertEqual(cursor.execute("SELECT COUNT(*) FROM t").fetchone()[0], 0)
+            with self.assertRaises(duckdb.Error):
+                cursor.execute("INSERT INTO t VALUES (1)")
+
+        db_session.get_connection().execute("INSERT INTO t VALUES (1)")
+
+    def test_close_reopens_with_new_settings(self):
+        first = db_session.get_connection()
+        db_session.close_connection()
+        db_session.configure(db_path=os.path.join(self.temp_dir.name, 'other.db'))
+
+        self.assertIsNot(db_session.get_connection(), first)
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir.name, 'other.db')))
+
+if __name__ == '__main__':
+    unittest.main()
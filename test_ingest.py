@@ -0,0 +1,234 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import duckdb
+import pandas as pd
+import ingest
+from test_db_operations import create_consolidated_transactions
+
+class TestCompileCategoryMap(unittest.TestCase):
+
+    def setUp(self):
+        self.category_map = ingest.compile_category_map({
+            "AMZN": "Amazon",
+            "AMAZON": "Amazon",
+            "Prime Video": "Entertainment",
+            "AMAZON PRIME VIDEO": "Streaming",
+            "CIAO GLORIA": "Drink",
+            "CIAO  GLORIA": "Drink",
+            "UBER": "Transportation",
+        })
+
+    def test_matches_case_insensitively(self):
+        self.assertEqual(ingest.apply_category_mapping("amzn mktp us*2k3", self.category_map), "Amazon")
+        self.assertEqual(ingest.apply_category_mapping("PRIME VIDEO CHANNELS", self.category_map), "Entertainment")
+
+    def test_longest_keyword_wins_at_same_position(self):
+        self.assertEqual(ingest.apply_category_mapping("AMAZON PRIME VIDEO*123", self.category_map), "Streaming")
+        self.assertEqual(ingest.apply_category_mapping("AMAZON PRIME*123", self.category_map), "Amazon")
+
+    def test_leftmost_keyword_wins(self):
+        self.assertEqual(ingest.apply_category_mapping("UBER EATS AMZN", self.category_map), "Transportation")
+        self.assertEqual(ingest.apply_category_mapping("SQ *CIAO  GLORIA", self.category_map), "Drink")
+
+    def test_vendor_mapping_is_a_substring_first_tier(self):
+        category_map = ingest.compile_category_map({"AMZN": "Amazon", "STAR": "Misc"},
+                                                   {"AMZN  Prime Video": "Entertainment", "Starbucks": "Coffee",
+                                                    "STARBUCKS RESERVE": "Drink"})
+        self.assertEqual(ingest.apply_category_mapping("amzn prime video", category_map), "Entertainment")
+        self.assertEqual(ingest.apply_category_mapping("SQ *AMZN PRIME VIDEO*123", category_map), "Entertainment")
+        self.assertEqual(ingest.apply_category_mapping("STARBUCKS STORE 1234 SEATTLE WA", category_map), "Coffee")
+        self.assertEqual(ingest.apply_category_mapping("STARBUCKS  RESERVE 99", category_map), "Drink")
+        self.assertEqual(ingest.apply_category_mapping("AMZN MKTP US", category_map), "Amazon")
+
+    def test_no_match(self):
+        self.assertIsNone(ingest.apply_category_mapping("CORNER DELI", self.category_map))
+        self.assertIsNone(ingest.apply_category_mapping(None, self.category_map))
+        self.assertIsNone(ingest.apply_category_mapping("AMZN", ingest.compile_category_map({})))
+
+class TestCurrencyColumnToFloat(unittest.TestCase):
+
+    def test_matches_currency_to_float(self):
+        column = pd.Series(['$5,000.00', None, '$20.50', '-3'])
+        self.assertEqual(ingest.currency_column_to_float(column).tolist(),
+                         [ingest.currency_to_float(x) for x in column])
+
+class TestProcessChaseCsv(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_file = os.path.join(self.temp_dir.name, 'Chase1234_Activity.csv')
+        with open(self.input_file, 'w') as f:
+            f.write("Transaction Date,Post Date,Description,Category,Type,Amount,Memo\n"
+                    "03/01/2024,03/02/2024,AMZN MKTP US,Shopping,Sale,-20.00,\n"
+                    "03/01/2024,03/02/2024,CORNER DELI,Personal,Sale,-5.00,\n"
+                    "03/02/2024,03/02/2024,CORNER DELI,Personal,Sale,-6.00,\n"
+                    "03/03/2024,03/03/2024,AUTOMATIC PAYMENT - THANK,,Payment,500.00,\n"
+                    "03/04/2024,03/04/2024,BOOKSTORE,Shopping,Sale,-15.00,\n"
+                    "03/05/2024,03/05/2024,ATM FEE,,Fee,-3.00,\n")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    @patch('ingest.get_category')
+    def test_categorizes_columns_and_prompts_once_per_description(self, mock_get_category):
+        mock_get_category.side_effect = lambda description, *args: {
+            'CORNER DELI': ('Food', True),
+            'ATM FEE': ('EXCLUDE', True),
+        }[description]
+        category_map = ingest.compile_category_map({'AMZN': 'Amazon'})
+
+        df = ingest.process_chase_csv(self.input_file, ['Food'], {}, category_map)
+
+        self.assertEqual(df.columns.tolist(), ['Card', 'Transaction Date', 'Description', 'Category', 'Type', 'Amount', 'Memo'])
+        self.assertEqual(mock_get_category.call_count, 2)
+        self.assertEqual(df['Card'].unique().tolist(), ['Chase1234'])
+        self.assertEqual(df['Category'].tolist()[:4], ['Amazon', 'Food', 'Food', 'Shopping'])
+        self.assertIsNone(df['Category'].iloc[4])
+        self.assertEqual(df['Memo'].tolist(), [
+            ' Category updated via script from Shopping',
+            ' Category replaced by user via script from Personal',
+            ' Category assigned automatically via script',
+            '',
+            '',
+        ])
+
+    @patch('ingest.get_category', return_value=('Food', True))
+    def test_replaced_memo_records_the_previous_category(self, mock_get_category):
+        # Before vectorizing, this memo stored the literal text "{old_category}"
+        df = ingest.process_chase_csv(self.input_file, ['Food'], {}, ingest.compile_category_map({}))
+
+        memos = df.loc[df['Description'] == 'CORNER DELI', 'Memo'].tolist()
+        self.assertEqual(memos[0], ' Category replaced by user via script from Personal')
+        self.assertNotIn('{old_category}', ''.join(df['Memo']))
+
+    @patch('ingest.get_category')
+    def test_deferred_review_queues_descriptions_without_prompting(self, mock_get_category):
+        category_map = ingest.compile_category_map({'AMZN': 'Amazon'})
+        review_queue = {}
+
+        first = ingest.process_chase_csv(self.input_file, ['Food'], {}, category_map, review_queue)
+        second = ingest.process_chase_csv(self.input_file, ['Food'], {}, category_map, review_queue)
+
+        mock_get_category.assert_not_called()
+        self.assertEqual(review_queue, {'CORNER DELI': 4, 'ATM FEE': 2})
+        self.assertEqual(first['Category'].tolist()[1:3], [ingest.PENDING_REVIEW, ingest.PENDING_REVIEW])
+
+        df = ingest.apply_review_choices(first, {'CORNER DELI': 'Food', 'ATM FEE': 'EXCLUDE'})
+        self.assertEqual(df['Category'].tolist()[:4], ['Amazon', 'Food', 'Food', 'Shopping'])
+        self.assertTrue(pd.isna(df['Category'].iloc[4]))
+        self.assertEqual(df['Memo'].iloc[1], ' Category assigned by user via review queue')
+        self.assertEqual(df['Memo'].iloc[4], '')
+
+    def test_process_pool_merges_worker_review_queues(self):
+        category_map = ingest.compile_category_map({'AMZN': 'Amazon'})
+        review_queue = {}
+        ingest.resolver_hits.clear()
+
+        df = ingest.process_files_parallel([self.input_file, self.input_file], ingest.process_chase_csv, ['Food'], {},
+                                           category_map, review_queue, workers=2, use_processes=True,
+                                           csv_engine=ingest.get_csv_engine(True))
+
+        self.assertEqual(len(df), 10)
+        self.assertEqual(review_queue, {'CORNER DELI': 4, 'ATM FEE': 2})
+        self.assertEqual((df['Category'] == ingest.PENDING_REVIEW).sum(), 6)
+        self.assertEqual(ingest.resolver_hits['lookups'], 10)
+        self.assertEqual(ingest.resolver_hits['pattern'], 2)
+
+    @patch('builtins.input', side_effect=AssertionError("unexpected prompt"))
+    def test_vendor_mappings_and_session_choices_skip_prompts(self, mock_input):
+        category_map = ingest.compile_category_map({'AMZN': 'Amazon'}, {'Corner Deli': 'Food'})
+        ingest.resolver_hits.clear()
+
+        df = ingest.process_chase_csv(self.input_file, ['Food'], {'ATM FEE': 'Fees'}, category_map)
+
+        mock_input.assert_not_called()
+        self.assertEqual(df['Category'].tolist(), ['Amazon', 'Food', 'Food', 'Shopping', 'Fees'])
+        self.assertEqual(dict(ingest.resolver_hits), {'lookups': 5, 'vendor': 2, 'pattern': 1, 'session': 1})
+
+    @patch('ingest.get_category')
+    def test_stream_inserts_chunk_by_chunk(self, mock_get_category):
+        mock_get_category.side_effect = lambda description, *args: {
+            'CORNER DELI': ('Food', True),
+            'ATM FEE': ('EXCLUDE', True),
+        }[description]
+        conn = duckdb.connect(':memory:')
+        create_consolidated_transactions(conn)
+        category_map = ingest.compile_category_map({'AMZN': 'Amazon'})
+
+        ingest.stream_files_into_db(conn, [self.input_file, self.input_file], ingest.iter_chase_csv, 'consolidated_transactions',
+                                    ['Food'], {}, category_map, chunk_size=2)
+
+        rows = conn.execute('SELECT "Description", "Category" FROM consolidated_transactions ORDER BY id').fetchall()
+        self.assertEqual(rows, [('AMZN MKTP US', 'Amazon'), ('CORNER DELI', 'Food'), ('CORNER DELI', 'Food'),
+                                ('BOOKSTORE', 'Shopping'), ('ATM FEE', None)])
+        conn.close()
+
+    def test_manifest_skips_already_ingested_files(self):
+        conn = duckdb.connect(':memory:')
+        conn.execute("""
+        CREATE TABLE ingested_files (sha256 VARCHAR PRIMARY KEY, file_name VARCHAR, size_bytes BIGINT,
+                                     bank_type VARCHAR, row_count INTEGER, imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)
+        """)
+        copy_file = os.path.join(self.temp_dir.name, 'Chase1234_Copy.csv')
+        with open(self.input_file) as src, open(copy_file, 'w') as dst:
+            dst.write(src.read())
+
+        file_hashes = ingest.filter_already_ingested(conn, [self.input_file, copy_file])
+        self.assertEqual(list(file_hashes), [self.input_file])
+
+        ingest.record_ingested_files(conn, file_hashes, 'Chase', {self.input_file: 5})
+        self.assertEqual(ingest.filter_already_ingested(conn, [copy_file]), {})
+        self.assertEqual(list(ingest.filter_already_ingested(conn, [copy_file], force=True)), [copy_file])
+        conn.close()
+
+    @patch('ingest.get_category')
+    def test_watermark_skips_rows_before_categorization(self, mock_get_category):
+        mock_get_category.return_value = ('Food', True)
+        conn = duckdb.connect(':memory:')
+        create_consolidated_transactions(conn)
+        conn.execute("""
+        INSERT INTO consolidated_transactions ("Card", "Transaction Date", "Description", "Amount")
+        VALUES ('Chase1234', DATE '2024-02-20', 'CORNER DELI', -7.00),
+               ('Chase1234', DATE '2024-03-01', 'CORNER DELI', -5.00),
+               ('Chase1234', DATE '2024-03-04', 'BOOKSTORE', -15.00)
+        """)
+        watermarks = ingest.load_ingest_watermarks(conn, 2)
+        conn.close()
+
+        df = ingest.process_chase_csv(self.input_file, ['Food'], {}, ingest.compile_category_map({}), watermarks=watermarks)
+
+        # Rows before 03/02 (03/04 watermark minus 2 days) are dropped, 03/04 is already stored,
+        # and only the two new rows inside the window are categorized
+        self.assertEqual(df['Description'].tolist(), ['CORNER DELI', 'ATM FEE'])
+        self.assertEqual(df['Amount'].tolist(), [-6.0, -3.0])
+        self.assertEqual(mock_get_category.call_count, 2)
+
+    @patch('ingest.get_category')
+    def test_watermark_ignores_amortization_installments_and_future_dates(self, mock_get_category):
+        mock_get_category.return_value = ('Food', True)
+        conn = duckdb.connect(':memory:')
+        create_consolidated_transactions(conn)
+        conn.execute("""
+        INSERT INTO consolidated_transactions ("Card", "Transaction Date", "Description", "Amount", "Memo")
+        VALUES ('Chase1234', DATE '2024-03-04', 'BOOKSTORE', -15.00, ''),
+               ('Chase1234', DATE '2024-03-02', 'LAPTOP', -100.00, ' 1/12 amortized transaction.'),
+               ('Chase1234', DATE '2025-02-02', 'LAPTOP', -100.00, ' 12/12 amortized transaction. Original transaction ID: 2'),
+               ('Chase5678', DATE '2999-01-01', 'TYPO', -1.00, ''),
+               ('Chase5678', CURRENT_DATE - 1, 'GROCER', -9.00, '')
+        """)
+        watermarks = ingest.load_ingest_watermarks(conn, 2)
+        conn.close()
+
+        df = ingest.process_chase_csv(self.input_file, ['Food'], {}, ingest.compile_category_map({}), watermarks=watermarks)
+
+        # The Chase1234 watermark stays at 03/04 instead of moving to the last installment,
+        # so the new rows from 03/02 on are still imported
+        self.assertEqual(df['Description'].tolist(), ['CORNER DELI', 'ATM FEE'])
+        # A mistyped future date does not push the Chase5678 window past today
+        yesterday = pd.Timestamp.today().normalize() - pd.Timedelta(days=1)
+        self.assertIn(('Chase5678', yesterday, 'GROCER', -9.0), watermarks['seen_keys'])
+
+if __name__ == '__main__':
+    unittest.main()
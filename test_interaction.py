@@ -0,0 +1,19 @@
+import subprocess
+import sys
+import unittest
+import interaction
+
+class TestStartupImports(unittest.TestCase):
+
+    def test_heavy_dependencies_load_lazily(self):
+        script = ("import sys, interaction; "
+                  "print(','.join(m for m in ['pandas', 'numpy', 'matplotlib', 'dateutil', 'duckdb', 'transactions'] "
+                  "if m in sys.modules))")
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), '')
+
+    def test_visualize_module_is_loaded_once(self):
+        self.assertIs(interaction.load_visualize_module(), interaction.load_visualize_module())
+
+if __name__ == '__main__':
+    unittest.main()
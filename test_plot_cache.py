@@ -0,0 +1,69 @@
+import os
+import tempfile
+import time
+import unittest
+import pandas as pd
+import plot_cache
+
+def write_plot(path, size):
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+
+class TestPlotCacheKey(unittest.TestCase):
+
+    def test_key_changes_with_data_and_style(self):
+        df = pd.DataFrame({'category': ['Food', 'Home'], 'specified_month_sum': [100.0, 50.0]})
+        key = plot_cache.get_plot_cache_key(df, 1)
+
+        self.assertEqual(plot_cache.get_plot_cache_key(df.copy(), 1), key)
+        self.assertNotEqual(plot_cache.get_plot_cache_key(df, 2), key)
+        self.assertNotEqual(plot_cache.get_plot_cache_key(df.assign(specified_month_sum=[100.0, 50.01]), 1), key)
+        self.assertNotEqual(plot_cache.get_plot_cache_key(df.iloc[::-1], 1), key)
+
+class TestPlotCacheStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, 'cache')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def store(self, key, size, max_bytes):
+        plot_file = os.path.join(self.temp_dir.name, 'temp_plot.png')
+        write_plot(plot_file, size)
+        return plot_cache.store_plot(key, plot_file, self.cache_dir, max_bytes)
+
+    def test_evicts_least_recently_used_plots(self):
+        self.store('a', 40, 100)
+        self.store('b', 40, 100)
+        old = time.time() - 60
+        os.utime(os.path.join(self.cache_dir, 'a.png'), (old - 10, old - 10))
+        os.utime(os.path.join(self.cache_dir, 'b.png'), (old, old))
+
+        # Reading 'a' makes 'b' the least recently used plot
+        self.assertIsNotNone(plot_cache.get_cached_plot('a', self.cache_dir))
+        self.store('c', 40, 100)
+
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), ['a.png', 'c.png'])
+        self.assertIsNone(plot_cache.get_cached_plot('b', self.cache_dir))
+
+    def test_keeps_the_new_plot_even_when_it_exceeds_the_limit(self):
+        self.store('a', 40, 100)
+        self.store('b', 150, 100)
+
+        self.assertEqual(os.listdir(self.cache_dir), ['b.png'])
+
+    def test_publish_only_copies_changed_plots(self):
+        cached_plot = self.store('a', 40, 100)
+        output_file = os.path.join(self.temp_dir.name, 'spending_comparison_March_2024.png')
+
+        self.assertTrue(plot_cache.publish_plot(cached_plot, output_file))
+        self.assertFalse(plot_cache.publish_plot(cached_plot, output_file))
+        write_plot(output_file, 40)
+        with open(output_file, 'r+b') as f:
+            f.write(b'y')
+        self.assertTrue(plot_cache.publish_plot(cached_plot, output_file))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import unittest
+import duckdb
+import db_operations
+import query_trace
+
+def fetch_amounts(conn):
+    return conn.execute("SELECT amount FROM t WHERE amount > ?", [1]).fetchall()
+
+class TestQueryTrace(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = dict(query_trace.settings)
+        query_trace.enable_tracing()
+        query_trace.clear_trace()
+        self.conn = query_trace.TracedConnection(duckdb.connect())
+        self.conn.execute("CREATE TABLE t (amount INTEGER)")
+        self.conn.execute("INSERT INTO t VALUES (1), (2), (3)")
+        query_trace.clear_trace()
+
+    def tearDown(self):
+        self.conn.close()
+        query_trace.clear_trace()
+        query_trace.settings.update(self.settings)
+        db_operations.disable_query_cache()
+
+    def test_records_time_rows_and_caller(self):
+        self.assertEqual(fetch_amounts(self.conn), [(2,), (3,)])
+
+        [entry] = query_trace.trace
+        self.assertEqual(entry['sql'], "SELECT amount FROM t WHERE amount > ?")
+        self.assertEqual(entry['rows'], 2)
+        self.assertEqual(entry['caller'], 'test_query_trace.fetch_amounts')
+        self.assertGreater(entry['seconds'], 0)
+
+    def test_helpers_attribute_queries_to_their_caller(self):
+        db_operations.query_and_return_df(self.conn, "SELECT * FROM t")
+        self.assertEqual(db_operations.execute_scalar_query(self.conn, "SELECT MAX(amount) FROM t"), 3)
+
+        callers = [entry['caller'] for entry in query_trace.trace]
+        self.assertEqual(callers, ['test_query_trace.test_helpers_attribute_queries_to_their_caller'] * 2)
+        self.assertEqual([entry['rows'] for entry in query_trace.trace], [3, 1])
+
+    def test_cursors_and_cache_hits_are_traced(self):
+        db_operations.enable_query_cache()
+        cursor = self.conn.cursor()
+        self.assertIsInstance(cursor, query_trace.TracedConnection)
+        for _ in range(2):
+            db_operations.query_and_return_df(cursor, "SELECT * FROM t", cache=True)
+
+        self.assertEqual([entry['cached'] for entry in query_trace.trace], [False, True])
+
+    def test_aggregates_per_action_and_reports(self):
+        with query_trace.trace_action("See spending profile"):
+            fetch_amounts(self.conn)
+            fetch_amounts(self.conn)
+        fetch_amounts(self.conn)
+
+        summary = {row[0]: row[1:] for row in query_trace.summarize_actions(query_trace.trace)}
+        self.assertEqual(summary["See spending profile"][0], 2)
+        self.assertEqual(summary["See spending profile"][3], 4)
+        self.assertEqual(summary["(outside menu)"][0], 1)
+        self.assertEqual(len(query_trace.get_slowest_queries(query_trace.trace, top=2)), 2)
+
+        with tempfile.TemporaryDirectory() as trace_dir:
+            path = query_trace.write_trace(list(query_trace.trace), trace_dir)
+            with open(path) as f:
+                written = json.load(f)
+            self.assertTrue(os.path.basename(path).startswith('query-trace-'))
+        self.assertEqual(len(written['queries']), 3)
+        self.assertEqual({action['action'] for action in written['actions']}, {"See spending profile", "(outside menu)"})
+
+if __name__ == '__main__':
+    unittest.main()
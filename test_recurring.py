@@ -0,0 +1,103 @@
+import unittest
+import duckdb
+import pandas as pd
+import db_operations
+import recurring
+from test_db_operations import create_consolidated_transactions
+
+def make_history():
+    rows = []
+    start = pd.Timestamp('2023-01-05')
+    for i in range(12):
+        rows.append([start + pd.DateOffset(months=i) + pd.Timedelta(days=i % 3), f'NETFLIX.COM 866-579-{7100 + i}', -15.49])
+    for i in range(10):
+        rows.append([start + pd.Timedelta(weeks=i), 'SQ *YOGA STUDIO', -20.00 - (i % 2)])
+    for i in range(3):
+        rows.append([start + pd.DateOffset(years=i), 'AMAZON PRIME*AB12C', -139.00])
+    for i, amount in enumerate([-45.10, -88.25, -132.70, -61.00, -150.40, -97.30, -72.15, -118.90]):
+        rows.append([start + pd.Timedelta(weeks=i), 'WHOLEFDS MKT 10234', amount])
+    for i, day in enumerate([3, 40, 41, 90, 200]):
+        rows.append([start + pd.Timedelta(days=day), 'CORNER DELI', -12.00])
+    df = pd.DataFrame(rows, columns=['Transaction Date', 'Description', 'Amount'])
+    df.insert(0, 'id', range(1, len(df) + 1))
+    return df
+
+class TestNormalizeMerchant(unittest.TestCase):
+
+    def test_drops_punctuation_and_reference_tokens(self):
+        descriptions = pd.Series(['NETFLIX.COM 866-579-7172', 'AMZN MKTP US*2K3AB', 'sq *ciao  gloria', None])
+        self.assertEqual(recurring.normalize_merchant(descriptions).tolist(),
+                         ['NETFLIX COM', 'AMZN MKTP US', 'SQ CIAO GLORIA', ''])
+
+class TestDetectRecurringSeries(unittest.TestCase):
+
+    def test_detects_periodicity_per_merchant(self):
+        series, members = recurring.detect_recurring_series(make_history())
+
+        self.assertEqual(sorted(zip(series['merchant'], series['periodicity'])), [
+            ('AMAZON PRIME', 'annual'),
+            ('NETFLIX COM', 'monthly'),
+            ('SQ YOGA STUDIO', 'weekly'),
+        ])
+        self.assertEqual(len(members), 25)
+        self.assertEqual(members['transaction_id'].is_unique, True)
+
+    def test_irregular_or_variable_charges_are_not_series(self):
+        history = make_history()
+        series, members = recurring.detect_recurring_series(history)
+
+        non_recurring = history[history['Description'].isin(['WHOLEFDS MKT 10234', 'CORNER DELI'])]
+        self.assertFalse(non_recurring['id'].isin(members['transaction_id']).any())
+
+    def test_refresh_stores_series_and_membership(self):
+        conn = duckdb.connect(':memory:')
+        create_consolidated_transactions(conn)
+        history = make_history()
+        conn.register('history_df', history)
+        conn.execute("""
+        INSERT INTO consolidated_transactions (id, "Card", "Transaction Date", "Description", "Amount")
+        SELECT id, 'Chase1234', CAST("Transaction Date" AS DATE), "Description", "Amount" FROM history_df
+        """)
+
+        recurring.ensure_recurring_series(conn)
+        recurring.refresh_recurring_series(conn, verbose=False)
+
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM recurring_series").fetchone()[0], 3)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM recurring_series_members").fetchone()[0], 25)
+        conn.close()
+
+    def test_amortization_installments_are_not_a_series(self):
+        conn = duckdb.connect(':memory:')
+        create_consolidated_transactions(conn)
+        laptop_id = conn.execute("""
+        INSERT INTO consolidated_transactions ("Card", "Transaction Date", "Description", "Category", "Amount", "Memo")
+        VALUES ('Chase1234', DATE '2024-01-15', 'APPLE STORE R123', 'Shopping', -2400.00, '')
+        RETURNING id
+        """).fetchone()[0]
+        installment_ids = db_operations.amortize_transactions(conn, [laptop_id], 12)
+
+        recurring.ensure_recurring_series(conn)
+
+        members = conn.execute("SELECT transaction_id FROM recurring_series_members").fetchall()
+        self.assertEqual(len(installment_ids), 11)
+        self.assertEqual(members, [])
+        conn.close()
+
+    def test_p95_report_leaves_out_excluded_transactions(self):
+        conn = duckdb.connect(':memory:')
+        create_consolidated_transactions(conn)
+        conn.execute("""
+        INSERT INTO consolidated_transactions ("Card", "Transaction Date", "Description", "Category", "Amount")
+        VALUES ('Chase1234', DATE '2024-03-01', 'CHASE CREDIT CRD AUTOPAY', NULL, -5000.00),
+               ('Chase1234', DATE '2024-03-02', 'FURNITURE STORE', 'Home', -900.00),
+               ('Chase1234', DATE '2024-03-03', 'CORNER DELI', 'Food', -8.00)
+        """)
+        recurring.ensure_recurring_series(conn)
+
+        report = db_operations.show_p95_expensive_nonrecurring_for_latest_month(conn, 2024, 3)
+
+        self.assertEqual(report['Description'].tolist(), ['FURNITURE STORE'])
+        conn.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import duckdb
+import sql_templates
+
+class TestSqlTemplates(unittest.TestCase):
+
+    def tearDown(self):
+        sql_templates.load_templates.cache_clear()
+        sql_templates.get_parsed_template.cache_clear()
+
+    def test_shipped_templates_parse(self):
+        self.assertEqual(sql_templates.validate_templates(), ['current-budgets', 'specific-month-summary'])
+
+    def test_loads_relative_to_the_package(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            current_dir = os.getcwd()
+            os.chdir(temp_dir)
+            try:
+                sql_templates.load_templates.cache_clear()
+                self.assertIn('SELECT', sql_templates.get_template('current-budgets'))
+            finally:
+                os.chdir(current_dir)
+
+    def test_statement_is_parsed_once_and_runs_on_any_connection(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, 'add.sql'), 'w') as f:
+                f.write("-- Adds its two parameters\nSELECT ? + ?;\n")
+            with patch('sql_templates.SQL_DIR', temp_dir):
+                sql_templates.load_templates.cache_clear()
+                statement = sql_templates.get_parsed_template('add')
+
+        self.assertIs(sql_templates.get_parsed_template('add'), statement)
+        for conn in (duckdb.connect(':memory:'), duckdb.connect(':memory:')):
+            self.assertEqual(conn.execute(statement, [1, 2]).fetchone()[0], 3)
+            conn.close()
+
+    def test_invalid_template_fails_validation(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, 'broken.sql'), 'w') as f:
+                f.write("SELEC category FROM categories")
+            with patch('sql_templates.SQL_DIR', temp_dir):
+                sql_templates.load_templates.cache_clear()
+                with self.assertRaisesRegex(ValueError, "'broken' does not parse"):
+                    sql_templates.validate_templates()
+
+if __name__ == '__main__':
+    unittest.main()
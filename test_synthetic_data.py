@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+import duckdb
+import ingest
+import synthetic_data
+from db_operations import get_category_mapping_from_db, get_global_categories_from_db
+
+class TestParseSize(unittest.TestCase):
+
+    def test_suffixes(self):
+        self.assertEqual(synthetic_data.parse_size('10k'), 10_000)
+        self.assertEqual(synthetic_data.parse_size('1.5M'), 1_500_000)
+        self.assertEqual(synthetic_data.parse_size('2500'), 2500)
+
+class TestPopulateDatabase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = duckdb.connect()
+        cls.categories, cls.vendors = synthetic_data.populate_database(cls.conn, 3000, category_count=30, years=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def test_history_size_and_range(self):
+        count, first, last, distinct = self.conn.execute("""
+        SELECT COUNT(*), MIN("Transaction Date"), MAX("Transaction Date"),
+            COUNT(DISTINCT ("Card", "Transaction Date", "Description", "Amount", "Memo"))
+        FROM consolidated_transactions
+        """).fetchone()
+
+        self.assertAlmostEqual(count, 3000, delta=100)
+        self.assertEqual(distinct, count)
+        self.assertEqual(first.year, synthetic_data.END_DATE.year - 1)
+        self.assertLessEqual(last, synthetic_data.END_DATE)
+
+    def test_categories_cover_every_group(self):
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM categories").fetchone()[0], 30)
+        groups = {row[0] for row in self.conn.execute("""
+        SELECT DISTINCT c.category_group
+        FROM consolidated_transactions t JOIN categories c ON t."Category" = c.category
+        """).fetchall()}
+        self.assertEqual(groups, {'Revenue', 'Cost of revenue', 'Non-discretionary', 'Discretionary', 'Misc'})
+
+    def test_statement_csvs_parse_with_ingest(self):
+        category_map = ingest.compile_category_map(get_category_mapping_from_db(self.conn))
+        global_categories = get_global_categories_from_db(self.conn)
+        with tempfile.TemporaryDirectory() as csv_dir:
+            files = synthetic_data.write_statement_csvs(self.vendors, 500, csv_dir,
+                                                        synthetic_data.END_DATE + timedelta(days=1))
+            self.assertEqual(len(files['Chase']), len(synthetic_data.CHASE_CARDS))
+            self.assertTrue(all(os.path.exists(path) for path in files['Chase'] + files['Charles Schwab']))
+
+            review_queue = {}
+            chase = ingest.process_chase_csv(files['Chase'][0], global_categories, {}, category_map, review_queue)
+            schwab = ingest.process_schwab_csv(files['Charles Schwab'][0], global_categories, {}, category_map, review_queue)
+
+        self.assertGreater(len(chase), 0)
+        self.assertGreater(len(schwab), 0)
+        self.assertTrue((chase['Card'] == synthetic_data.CHASE_CARDS[0]).all())
+        self.assertTrue(chase['Category'].isin(self.categories['category']).any())
+        self.assertTrue(review_queue)
+
+if __name__ == '__main__':
+    unittest.main()
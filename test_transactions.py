@@ -1,7 +1,9 @@
 import unittest
 from unittest.mock import Mock, patch
 from datetime import date, datetime
+from decimal import Decimal
 from dateutil.relativedelta import relativedelta
+import pandas as pd
 import transactions
 
 class TestCalculateAndConditionallyInsertMonthlyBreakdowns(unittest.TestCase):
@@ -17,11 +19,14 @@ class TestCalculateAndConditionallyInsertMonthlyBreakdowns(unittest.TestCase):
         mock_conn = Mock()
         mock_db_operations.get_global_categories_from_db.return_value = ['Category1', 'Category2']
         mock_db_operations.get_latest_transaction_date.return_value = date(2023, 6, 30)
-        mock_db_operations.get_active_breakdowns.return_value = {
-            'breakdown': {'Category1': 0.6, 'Category2': 0.4}
+        mock_db_operations.get_breakdown_by_id.return_value = pd.DataFrame([
+            {'id': 1, 'description': 'Goal', 'breakdown': "{'Category1': 0.6, 'Category2': 0.4}"}
+        ])
+        mock_db_operations.get_net_income_by_month.return_value = {
+            date(2023, month, 1): Decimal('1000.00') for month in range(1, 7)
         }
-        mock_db_operations.get_net_income_for_month.return_value = 1000
-        mock_db_operations.get_breakdown_items_by_date.return_value = Mock(empty=True)
+        # May already has its Category2 item
+        mock_db_operations.get_breakdown_item_months.return_value = {(date(2023, 5, 1), 'Category2')}
 
         # Test data
         breakdown_id = 1
@@ -35,20 +40,19 @@ class TestCalculateAndConditionallyInsertMonthlyBreakdowns(unittest.TestCase):
         # Assert that the function made the correct calls
         self.assertEqual(mock_db_operations.get_global_categories_from_db.call_count, 1)
         self.assertEqual(mock_db_operations.get_latest_transaction_date.call_count, 1)
-        self.assertEqual(mock_db_operations.get_active_breakdowns.call_count, 1)
+        mock_db_operations.get_breakdown_by_id.assert_called_once_with(mock_conn, 1)
         
-        # We expect 6 calls to get_net_income_for_month (Jan to Jun 2023)
-        self.assertEqual(mock_db_operations.get_net_income_for_month.call_count, 6)
-        
-        # We expect 12 calls to get_breakdown_items_by_date and insert_surplus_deficit_breakdown_item
-        # (2 categories per month for 6 months)
-        self.assertEqual(mock_db_operations.get_breakdown_items_by_date.call_count, 12)
-        self.assertEqual(mock_db_operations.insert_surplus_deficit_breakdown_item.call_count, 12)
+        # One grouped net income query and one existing items query for Jan to Jun 2023
+        mock_db_operations.get_net_income_by_month.assert_called_once_with(mock_conn, date(2023, 1, 1), date(2023, 7, 1))
+        mock_db_operations.get_breakdown_item_months.assert_called_once_with(mock_conn, 1, date(2023, 1, 1), date(2023, 7, 1))
+
+        # All items go in one batch: 2 categories per month for 6 months, minus the existing one
+        self.assertEqual(mock_db_operations.insert_surplus_deficit_breakdown_items.call_count, 1)
+        items = mock_db_operations.insert_surplus_deficit_breakdown_items.call_args[0][1]
+        self.assertEqual(len(items), 11)
 
         # Specific tests for 1000 * 0.6 = 600 and 1000 * 0.4 = 400
-        calls = mock_db_operations.insert_surplus_deficit_breakdown_item.call_args_list
-        for call in calls:
-            _, _, category, _, amount, _ = call[0]
+        for _, category, _, amount, _ in items:
             if category == 'Category1':
                 self.assertAlmostEqual(amount, 600, places=2,
                                        msg="Breakdown amount for Category1 should be 600")
@@ -56,19 +60,13 @@ class TestCalculateAndConditionallyInsertMonthlyBreakdowns(unittest.TestCase):
                 self.assertAlmostEqual(amount, 400, places=2,
                                        msg="Breakdown amount for Category2 should be 400")
 
-        # Check some specific calls (keeping these for additional verification)
-        mock_db_operations.insert_surplus_deficit_breakdown_item.assert_any_call(
-            mock_conn, 1, 'Category1', 'Category1', 600, date(2023, 1, 1)
-        )
-        mock_db_operations.insert_surplus_deficit_breakdown_item.assert_any_call(
-            mock_conn, 1, 'Category2', 'Category2', 400, date(2023, 1, 1)
-        )
-        mock_db_operations.insert_surplus_deficit_breakdown_item.assert_any_call(
-            mock_conn, 1, 'Category1', 'Category1', 600, date(2023, 5, 1)
-        )
-        mock_db_operations.insert_surplus_deficit_breakdown_item.assert_any_call(
-            mock_conn, 1, 'Category2', 'Category2', 400, date(2023, 5, 1)
-        )
+        # Check some specific items (keeping these for additional verification)
+        items = [(item_breakdown_id, category, description, round(amount, 2), item_date)
+                 for item_breakdown_id, category, description, amount, item_date in items]
+        self.assertIn((1, 'Category1', 'Category1', 600, date(2023, 1, 1)), items)
+        self.assertIn((1, 'Category2', 'Category2', 400, date(2023, 1, 1)), items)
+        self.assertIn((1, 'Category1', 'Category1', 600, date(2023, 5, 1)), items)
+        self.assertNotIn((1, 'Category2', 'Category2', 400, date(2023, 5, 1)), items)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
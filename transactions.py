@@ -1,7 +1,7 @@
 from datetime import date, datetime
 import db_operations
+from recurring import ensure_recurring_series
 from helpers import print_divider, print_dataframe, get_user_input, get_user_choice
-from collections import defaultdict
 from dateutil.relativedelta import relativedelta
 import ast
 from decimal import Decimal
@@ -52,32 +52,9 @@ def amortize_transaction(conn, df, year, month):
     transaction_id = get_user_input("Enter the ID of the transaction to amortize: ", int, lambda x: x in df['id'].values)
     months = get_user_input("How many months would you like to amortize it over? ", int, lambda x: x > 0)
     
-    transaction = df[df['id'] == transaction_id].iloc[0]
-    card = transaction.get('Card', None)  # Use None if 'Card' is not present
-    amount = transaction['Amount']
-    description = transaction['Description']
-    category = transaction['Category']
-    original_date = transaction['Transaction Date']
-    memo = transaction.get('Memo', '')
-    monthly_amount = amount / months
-    
     try:
         conn.execute("BEGIN TRANSACTION")
-        
-        # Update the original transaction
-        db_operations.update_transaction_amount(conn, transaction_id, monthly_amount)
-        new_memo = f"{memo} 1/{months} amortized transaction."
-        db_operations.update_transaction_memo(conn, transaction_id, new_memo)
-        
-        # Create new transactions for the remaining months
-        inserted_ids = []
-        for i in range(1, months):
-            new_date = original_date + relativedelta(months=i)
-            new_memo = f"{memo} {i+1}/{months} amortized transaction. Original transaction ID: {transaction_id}"
-            new_id = db_operations.get_next_sequence_value(conn, 'consolidated_transactions_id_seq')
-            db_operations.insert_amortized_transaction(conn, new_id, card, new_date, description, category, monthly_amount, new_memo)
-            inserted_ids.append(new_id)
-        
+        db_operations.amortize_transactions(conn, [transaction_id], months)
         conn.commit()
         print(f"Transaction {transaction_id} has been amortized over {months} months.")
     except Exception as e:
@@ -87,6 +64,7 @@ def amortize_transaction(conn, df, year, month):
 
 def show_p95_expensive_nonrecurring(conn, year, month):
     print_divider("95th Percentile Most Expensive Non-recurring Spendings")
+    ensure_recurring_series(conn)
     df = db_operations.show_p95_expensive_nonrecurring_for_latest_month(conn, year, month)
     if df is None or df.empty:
         print("No non-recurring expenses found.")
@@ -101,6 +79,7 @@ def show_p95_expensive_nonrecurring(conn, year, month):
 
 def review_extraordinary_spendings(conn, year, month):
     print_divider("Reviewing Extraordinary Spendings")
+    ensure_recurring_series(conn)
     
     # Step 1: Get month summary
     df = db_operations.get_month_summary(conn, year, month)
@@ -113,59 +92,22 @@ def review_extraordinary_spendings(conn, year, month):
     excluded_categories = ['Rental income', 'Salary', 'Monthly fixed cost', 'Monthly property expense']
     df_sorted = df_sorted[~df_sorted['category'].isin(excluded_categories)]
     
-    # Step 3-5: Fetch transactions and store in memory
-    extraordinary_transactions = defaultdict(list)
-    
-    for _, row in df_sorted.iterrows():
-        category = row['category']
-        
-        # Calculate P85 for this category and month
-        p85 = db_operations.get_p85_for_category(conn, category, year, month)
-        
-        if p85 is None:
-            continue  # Skip if no transactions for this category
-        
-        # Fetch transactions above P85
-        transactions = db_operations.get_transactions_above_threshold(conn, category, year, month, p85)
-        
-        if not transactions.empty:
-            extraordinary_transactions[category] = transactions.to_dict('records')
-    
-    # Step 6: Calculate P90 across all categories and filter transactions
-    p90_amount = db_operations.get_p90_across_categories(conn, year, month, excluded_categories)
-    
-    # Filter out transactions less expensive than P90
-    filtered_transactions = {}
-    for category, transactions in extraordinary_transactions.items():
-        filtered_transactions[category] = [t for t in transactions if abs(t['Amount']) >= p90_amount]
-    
-    # Step 7: Check for non-recurring transactions and filter
-    non_recurring_transactions = {}
-    for category, transactions in filtered_transactions.items():
-        non_recurring_transactions[category] = []
-        for transaction in transactions:
-            # Check if this transaction is recurring
-            count = db_operations.check_recurring_transaction(
-                conn, 
-                transaction['Description'],
-                transaction['Amount'],
-                transaction['Transaction Date']
-            )
-            
-            if count == 0:  # This is a non-recurring transaction
-                non_recurring_transactions[category].append(transaction)
-
-    # Display results
-    if any(non_recurring_transactions.values()):
-        print(f"P90 amount across all categories: ${p90_amount:.2f}")
+    # Steps 3-7: Per-category P85, global P90 and recurring series membership run as one query
+    categories = list(dict.fromkeys(df_sorted['category']))
+    transactions = db_operations.get_extraordinary_nonrecurring_transactions(conn, year, month, categories, excluded_categories)
+
+    # Display results, grouped by category in the order of step 2
+    if not transactions.empty:
+        category_order = {category: i for i, category in enumerate(categories)}
+        transactions = transactions.sort_values('Category', key=lambda column: column.map(category_order), kind='stable')
+        print(f"P90 amount across all categories: ${transactions['p90_amount'].iloc[0]:.2f}")
         print("\nExtraordinary non-recurring transactions:")
         total = 0
-        for category, transactions in non_recurring_transactions.items():
-            for transaction in transactions:
-                date = transaction['Transaction Date'].strftime('%Y-%m-%d')
-                amount = abs(transaction['Amount'])
-                print(f"[{category:<20}] {date}\t{transaction['Description']:<40}\t${amount:>10.2f}")
-                total += amount
+        for _, transaction in transactions.iterrows():
+            date = transaction['Transaction Date'].strftime('%Y-%m-%d')
+            amount = abs(transaction['Amount'])
+            print(f"[{transaction['Category']:<20}] {date}\t{transaction['Description']:<40}\t${amount:>10.2f}")
+            total += amount
         print(f"\nTotal extraordinary non-recurring spending: ${total:>10.2f}")
     else:
         print("No extraordinary non-recurring transactions found for this month.")
@@ -230,7 +172,7 @@ def set_goals(conn):
     
     try:
         breakdown_id = db_operations.insert_surplus_deficit_breakdown(conn, description, breakdown, effective_date)
-        calculate_and_conditionally_insert_monthly_breakdowns(conn, breakdown_id, breakdown, effective_date)
+        calculate_and_conditionally_insert_monthly_breakdowns(conn, breakdown_id, effective_date)
         print("Goal added successfully and monthly breakdowns calculated.")
     except Exception as e:
         print(f"Error adding goal or calculating monthly breakdowns: {str(e)}")
@@ -286,32 +228,44 @@ def get_goal_breakdown_from_user(conn):
 def calculate_and_conditionally_insert_monthly_breakdowns(conn, breakdown_id, effective_date):
     valid_categories = set(db_operations.get_global_categories_from_db(conn))
     latest_transaction_date = db_operations.get_latest_transaction_date(conn)
-    effective_date_year = int(effective_date.split('-')[0])
-    effective_date_month = int(effective_date.split('-')[1])
-    active_breakdown = db_operations.get_active_breakdowns(conn, effective_date_year, effective_date_month).iloc[0]
+    breakdown = db_operations.get_breakdown_by_id(conn, breakdown_id).iloc[0]['breakdown']
+    if isinstance(breakdown, str):
+        breakdown = ast.literal_eval(breakdown)
     current_date = datetime.strptime(effective_date, '%Y-%m-%d').date()
     end_date = latest_transaction_date.replace(day=1) + relativedelta(months=1) - relativedelta(days=1)
     today = date.today()
 
+    # Only process months that have ended
+    month_dates = []
     while current_date <= end_date:
-        # Only process months that have ended
         if current_date.replace(day=1) + relativedelta(months=1) <= today:
-            net_income = db_operations.get_net_income_for_month(conn, current_date.year, current_date.month)
-            breakdown = ast.literal_eval(active_breakdown['breakdown'])
-            for category_or_description, pct_breakdown in breakdown.items():
-                amount = net_income * Decimal(pct_breakdown)
-                if category_or_description in valid_categories:
-                    category = description = category_or_description
-                else:
-                    category, description = None, category_or_description
-
-                # check if the breakdown item count less than breakdown item count in the database
-                if len(db_operations.get_breakdown_items_by_date(conn, current_date.year, current_date.month)) < len(breakdown):
-                    db_operations.insert_surplus_deficit_breakdown_item(conn, breakdown_id, category, description, amount, current_date)
-                else:
-                    print(f"Breakdown item already exists for {current_date.year}-{current_date.month:02d}")
-
+            month_dates.append(current_date)
         current_date += relativedelta(months=1)
+    if not month_dates:
+        return
+
+    # One grouped query for every month's net income and one for the items already stored
+    range_start = month_dates[0].replace(day=1)
+    range_end = month_dates[-1].replace(day=1) + relativedelta(months=1)
+    net_incomes = db_operations.get_net_income_by_month(conn, range_start, range_end)
+    existing_items = db_operations.get_breakdown_item_months(conn, breakdown_id, range_start, range_end)
+
+    new_items = []
+    for month_date in month_dates:
+        net_income = net_incomes.get(month_date.replace(day=1), 0)
+        for category_or_description, pct_breakdown in breakdown.items():
+            if category_or_description in valid_categories:
+                category = description = category_or_description
+            else:
+                category, description = None, category_or_description
+
+            if (month_date.replace(day=1), description) in existing_items:
+                print(f"Breakdown item already exists for {month_date.year}-{month_date.month:02d}: {description}")
+                continue
+            amount = net_income * Decimal(pct_breakdown)
+            new_items.append((breakdown_id, category, description, amount, month_date))
+
+    db_operations.insert_surplus_deficit_breakdown_items(conn, new_items)
 
 def recategorize_transaction(conn, df, categories, selected_category):
     transaction_id = get_user_input("Enter the ID of the transaction to recategorize: ", int, lambda x: x in df['id'].values)
@@ -335,9 +289,10 @@ def recategorize_transaction(conn, df, categories, selected_category):
 def recategorize_all_vendor_transactions(conn, vendor, new_category):
     try:
         conn.execute("BEGIN TRANSACTION")
-        all_transactions = db_operations.get_transactions_by_vendor(conn, vendor)
-        transaction_ids = all_transactions['id'].tolist()
-        db_operations.recategorize_transactions(conn, transaction_ids, new_category)
+        summary = db_operations.recategorize_vendor_transactions(conn, vendor, new_category)
+        for _, row in summary.iterrows():
+            print(f"  {row['old_category'] if isinstance(row['old_category'], str) else 'NULL'} -> "
+                  f"{new_category or 'NULL (Excluded)'}: {row['transaction_count']} transactions")
         
         existing_mapping = db_operations.get_vendor_category_mapping(conn, vendor)
         if existing_mapping != new_category:
@@ -354,6 +309,25 @@ def recategorize_all_vendor_transactions(conn, vendor, new_category):
         conn.rollback()
         print(f"An error occurred. All operations have been rolled back. Error: {str(e)}")
 
+def search_vendor_transactions(conn):
+    print_divider("Search Transactions by Vendor")
+    text = get_user_input("Enter part of a vendor name: ", str, lambda x: x.strip() != '').strip()
+    matches = db_operations.search_descriptions(conn, text)
+    if matches.empty:
+        print(f"No descriptions resembling '{text}' found.")
+        return
+
+    print_dataframe(matches.assign(number=range(1, len(matches) + 1))[
+        ['number', 'description', 'coverage', 'similarity', 'transaction_count', 'last_date']])
+    choice = get_user_choice("\nEnter the number of a description to list its transactions (0 to go back): ",
+                             range(0, len(matches) + 1))
+    if choice == 0:
+        return
+
+    description = matches.iloc[choice - 1]['description']
+    print_divider(description)
+    print_dataframe(db_operations.get_transactions_by_vendor(conn, description))
+
 def validate_date(date_string):
     try:
         datetime.strptime(date_string, '%Y-%m-%d')
@@ -1,13 +1,17 @@
 import os
+import concurrent.futures
 import pandas as pd
-import duckdb
-import matplotlib.pyplot as plt
 import webbrowser
-from db_operations import query_and_return_df, get_month_summary, execute_query, get_active_breakdowns, get_breakdown_items, get_actual_spending, get_goals_and_breakdown_items, get_breakdown_items_by_date, get_subtotal_by_category_group_for_month
+from db_operations import query_and_return_df, get_month_summary, ensure_monthly_category_totals, execute_query, get_active_breakdowns, get_breakdown_items, get_actual_spending, get_goals_and_breakdown_items, get_breakdown_items_by_date, get_subtotal_by_category_group_for_month
 import math
 from transactions import calculate_and_conditionally_insert_monthly_breakdowns
 import json
-import hashlib  # Add this import
+from plot_cache import get_plot_cache_key, get_cached_plot, store_plot, publish_plot
+from db_session import get_cursor, read_only_cursor
+
+# Bump whenever create_plot changes what it draws, so cached plots are re-rendered
+PLOT_STYLE_VERSION = 1
+PLOT_COLUMNS = ['category', 'specified_month_sum', 'p50_monthly_sum', 'p85_monthly_sum']
 
 def print_divider(title):
     print("\n" + "=" * 40)
@@ -15,6 +19,12 @@ def print_divider(title):
     print("=" * 40)
 
 def create_plot(df):
+    # Imported here so that cached plots never pay for loading matplotlib. The chart is only
+    # saved to a file, possibly from a worker thread, so the non-interactive backend is used.
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(15, 10))
     x = range(len(df))
     width = 0.6
@@ -37,6 +47,12 @@ def create_plot(df):
                  ha='center', va='bottom')
 
     plt.gca().yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${int(x):,}'))
+    return plt
+
+def render_plot(df, plot_file):
+    plt = create_plot(df)
+    plt.savefig(plot_file, dpi=300, bbox_inches='tight')
+    plt.close()
 
 # calculate net_income, per categories.category_group, as revenue - cost of revenue - discretionary_expenses - non_discretionary_expenses
 def calculate_net_income(conn, year, month):
@@ -158,14 +174,6 @@ def display_goal_progress(conn, year, month):
     else:
         print(f"No goal items found for {year}-{month:02d}.")
 
-def get_file_hash(filename):
-    """Calculate the SHA-256 hash of a file."""
-    sha256_hash = hashlib.sha256()
-    with open(filename, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
-
 def main(year, month):
     """
     Main function to visualize and analyze financial data for a specified month.
@@ -176,7 +184,8 @@ def main(year, month):
     3. Calculates and displays the net income for the month.
     4. Display the month's goals and goal breakdown items if they exist.
     5. Display the goal progress as the breakdown item's amount minus the category total.
-    6. Creates a bar plot comparing specified month sum with P50 and P85 markers for each category.
+    6. Creates a bar plot comparing specified month sum with P50 and P85 markers for each category,
+       reusing the cached image when the plotted data has not changed.
     7. Saves the plot as an image file and opens it in the default web browser.
 
     The function excludes income categories (Salary and Rental income) from the visualization
@@ -186,47 +195,45 @@ def main(year, month):
     year (int): The year for which to generate the report.
     month (int): The month (1-12) for which to generate the report.
     """
-    db_name = 'budgeting-tool.db'
-    conn = duckdb.connect(db_name)
-
-    # Use the provided year and month instead of asking for user input
-    # TODO: query doesn't take into account positive data like Health for September 2024
-    df = get_month_summary(conn, year, month)
-    # Get the month name from the dataframe
-    month_name = df['Month'].iloc[0]
-    output_file = f'spending_comparison_{month_name}_{year}.png'
-    
-    # print_divider(f"Month Summary - {month_name} {year}")
-    # print(df.drop(columns=['Month', 'Year']))  # Drop Month and Year columns from display
- 
-    calculate_net_income(conn, year, month)
+    conn = get_cursor()
+    ensure_monthly_category_totals(conn)
+
+    # The month summary and net income only read, from one consistent snapshot
+    with read_only_cursor() as report_conn:
+        # TODO: query doesn't take into account positive data like Health for September 2024
+        df = get_month_summary(report_conn, year, month)
+        # Get the month name from the dataframe
+        month_name = df['Month'].iloc[0]
+        output_file = f'spending_comparison_{month_name}_{year}.png'
+
+        # print_divider(f"Month Summary - {month_name} {year}")
+        # print(df.drop(columns=['Month', 'Year']))  # Drop Month and Year columns from display
+
+        calculate_net_income(report_conn, year, month)
 
     df_filtered = df[df['category_group'] != 'Revenue'].sort_values('specified_month_sum', ascending=False)
 
-    display_goal_progress(conn, year, month)
-    create_plot(df_filtered)
+    # Plots are cached by the data they show, so an unchanged month skips rendering entirely.
+    # Otherwise the chart renders in the background while goal progress is shown.
+    plot_data = df_filtered[PLOT_COLUMNS]
+    cache_key = get_plot_cache_key(plot_data, PLOT_STYLE_VERSION)
+    cached_plot = get_cached_plot(cache_key)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        temp_file = 'temp_plot.png'
+        rendering = executor.submit(render_plot, plot_data, temp_file) if cached_plot is None else None
 
-    # Save the plot to a temporary file
-    temp_file = 'temp_plot.png'
-    plt.savefig(temp_file, dpi=300, bbox_inches='tight')
-    
-    # Calculate hash of the new plot
-    new_hash = get_file_hash(temp_file)
-
-    # Check if the output file already exists
-    if os.path.exists(output_file):
-        existing_hash = get_file_hash(output_file)
-        if new_hash == existing_hash:
-            print(f"Plot unchanged. Keeping existing file: {output_file}")
-            os.remove(temp_file)  # Remove the temporary file
-        else:
-            os.replace(temp_file, output_file)
-            print(f"Plot updated. Saved as: {output_file}")
+        display_goal_progress(conn, year, month)
+
+        if rendering is not None:
+            rendering.result()
+            cached_plot = store_plot(cache_key, temp_file)
+
+    if publish_plot(cached_plot, output_file):
+        print(f"Plot updated. Saved as: {output_file}")
     else:
-        os.rename(temp_file, output_file)
-        print(f"New plot saved as: {output_file}")
+        print(f"Plot unchanged. Keeping existing file: {output_file}")
 
     full_path = os.path.abspath(output_file)
     webbrowser.open(f'file://{full_path}')
 
-    conn.close()
\ No newline at end of file
+    conn.close()